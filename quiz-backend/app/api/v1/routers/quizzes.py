@@ -1,16 +1,18 @@
+import hashlib
 import json
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response, status
 from redis.asyncio import Redis
 from typing import Annotated
 
-from ....schemas.quiz_schemas import QuizCreateIn, QuizOut, QuizUpdateIn, QuizListItem
+from ....schemas.quiz_schemas import QuizCreateIn, QuizOut, QuizUpdateIn, QuizListPage
 from ....services.quiz_service import QuizService
 from ....repositories.quiz_repository import QuizRepository
 from ....core.supabase_client import get_supabase
 from ....core.redis_manager import get_redis
 from ....services.room_quiz_cache import fetch_room_quiz, store_room_quiz
+from ....services.quiz_cache import get_quiz_cache
 
 router = APIRouter(prefix="/quizzes", tags=["quizzes"])
 
@@ -18,13 +20,42 @@ router = APIRouter(prefix="/quizzes", tags=["quizzes"])
 
 def get_service() -> QuizService:
     repo = QuizRepository(get_supabase())
-    return QuizService(repo)
+    return QuizService(repo, cache=get_quiz_cache())
 
 ServiceDep = Annotated[QuizService, Depends(get_service)]
 
-@router.get("/", response_model=list[QuizListItem])
-async def list_quizzes(svc: ServiceDep):
-    return svc.list_quizzes()
+LIST_PAGE_SIZE = 20
+LIST_PAGE_MAX = 100
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+@router.get("/", response_model=QuizListPage)
+async def list_quizzes(
+    svc: ServiceDep,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(LIST_PAGE_SIZE, ge=1, le=LIST_PAGE_MAX),
+    if_none_match: str | None = Header(None),
+):
+    # ETag сторінки: версія списку (лічильник змін у БД) і параметри сторінки;
+    # якщо нічого не змінилось - 304 без вибірки самих квізів
+    version = await svc.list_version()
+    digest = hashlib.sha1(f"{version}|{cursor or ''}|{limit}".encode()).hexdigest()
+    etag = f'W/"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        page = await svc.list_quizzes(limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    response.headers.update(headers)
+    return page
 
 def _is_uuid_like(value: str) -> bool:
     try:
@@ -39,7 +70,7 @@ async def get_quiz(quiz_id: str, svc: ServiceDep, redis: Redis = Depends(get_red
     data: dict | None = None
 
     if _is_uuid_like(quiz_id):
-        data = svc.get_quiz(quiz_id)
+        data = await svc.get_quiz(quiz_id)
     else:
         # 1) пробуємо знайти в Redis за roomCode
         data = await fetch_room_quiz(redis, quiz_id)
@@ -51,7 +82,7 @@ async def get_quiz(quiz_id: str, svc: ServiceDep, redis: Redis = Depends(get_red
                 meta = json.loads(meta_raw)
                 original_id = meta.get("quizId")
                 if original_id:
-                    data = svc.get_quiz(original_id)
+                    data = await svc.get_quiz(original_id)
                     if data:
                         await store_room_quiz(redis, quiz_id, data)
 
@@ -61,7 +92,7 @@ async def get_quiz(quiz_id: str, svc: ServiceDep, redis: Redis = Depends(get_red
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_quiz(payload: QuizCreateIn, svc: ServiceDep):
-    quiz_id = svc.create_quiz(
+    quiz_id = await svc.create_quiz(
         payload.title,
         payload.description,          
         [q.model_dump() for q in payload.questions]
@@ -74,10 +105,10 @@ async def update_quiz(quiz_id: str, payload: QuizUpdateIn, svc: ServiceDep):
     if payload.title is None and payload.description is None and payload.questions is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nothing to update")
 
-    if not svc.get_quiz(quiz_id):
+    if not await svc.get_quiz(quiz_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
 
-    svc.update_quiz(
+    await svc.update_quiz(
         quiz_id,
         payload.title,
         payload.description,    
@@ -89,7 +120,7 @@ async def update_quiz(quiz_id: str, payload: QuizUpdateIn, svc: ServiceDep):
 @router.delete("/{quiz_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_quiz(quiz_id: str, svc: ServiceDep):
     # Ідемпотентність: не розкривати існування — але дамо 404 для чіткості фронту
-    if not svc.get_quiz(quiz_id):
+    if not await svc.get_quiz(quiz_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
-    svc.delete_quiz(quiz_id)
+    await svc.delete_quiz(quiz_id)
     return None
\ No newline at end of file
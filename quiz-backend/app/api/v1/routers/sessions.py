@@ -10,6 +10,7 @@ from app.services.quiz_service import QuizService
 from app.repositories.quiz_repository import QuizRepository
 from app.core.supabase_client import get_supabase
 from app.services.room_quiz_cache import store_room_quiz, ROOM_CACHE_TTL
+from app.services.quiz_cache import get_quiz_cache
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
@@ -27,8 +28,8 @@ SESSION_META_TTL = ROOM_CACHE_TTL
 async def create_session(payload: CreateSessionRequest, r: Redis = Depends(get_redis)):
     # 1. Отримуємо дані про квіз (нам потрібна назва для Lobby)
     repo = QuizRepository(get_supabase())
-    svc = QuizService(repo)
-    quiz = svc.get_quiz(payload.quizId)
+    svc = QuizService(repo, cache=get_quiz_cache())
+    quiz = await svc.get_quiz(payload.quizId)
     
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
@@ -72,10 +73,11 @@ async def get_session_info(room_code: str, r: Redis = Depends(get_redis)):
              if meta_raw:
                  quiz_title = json.loads(meta_raw).get("quizTitle")
         
-        state_raw = await r.get(f"quiz:room:{room_code}:state")
+        # стан кімнати - hash з JSON-значеннями, читаємо лише фазу
+        phase_raw = await r.hget(f"quiz:room:{room_code}:state", "phase")
         status_val = "UNKNOWN"
-        if state_raw:
-            status_val = json.loads(state_raw).get("phase", "UNKNOWN")
+        if phase_raw:
+            status_val = json.loads(phase_raw)
             
         return {
             "roomCode": room_code,
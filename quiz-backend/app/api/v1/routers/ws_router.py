@@ -1,10 +1,13 @@
 import json
 import time
 import uuid
-import asyncio
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 from pydantic import ValidationError
+from app.core.config import settings
 from app.core.redis_manager import get_redis
+from app.ws.broadcast import make_broadcast
+from app.ws.dispatcher import EventContext, EventDispatcher, ForbiddenEvent, UnknownEvent
+from app.ws.encoding import JSON, get_encoder
 from app.ws.room_manager import RoomManager
 from app.ws.schemas import (
     EventPayload,
@@ -13,23 +16,49 @@ from app.ws.schemas import (
     HostRevealAnswer,
     HostNextQuestion,
     HostEndSession,
+    HostScoreboardPage,
     PlayerJoin,
     PlayerAnswer,
     ServerStateSync,
+    ServerResumed,
     FinishedSessionSnapshot,
 )
-from app.services.quiz_session_service import QuizSessionService
+from app.services.session_outbox import SessionOutbox
 from app.services.room_quiz_cache import (
     fetch_room_quiz,
     questions_to_runtime,
-    delete_room_quiz,
+    quiz_from_runtime,
 )
 
 ws_router = APIRouter()
-manager = RoomManager()
+manager = RoomManager(
+    send_queue_size=settings.WS_SEND_QUEUE_SIZE,
+    event_log_size=settings.WS_EVENT_LOG_SIZE,
+    send_soft_limit=settings.WS_SEND_SOFT_LIMIT,
+    slow_consumer_timeout_ms=settings.WS_SLOW_CONSUMER_TIMEOUT_MS,
+    backend=make_broadcast(settings.WS_BROADCAST_BACKEND, get_redis),
+    join_batch_ms=settings.WS_JOIN_BATCH_MS,
+    leaderboard_top_n=settings.WS_LEADERBOARD_TOP_N,
+    progress_interval_ms=settings.WS_ANSWER_PROGRESS_MS,
+)
+
+# завершені сесії зберігаються в Supabase фоновим воркером, а не в обробнику
+session_outbox = SessionOutbox(
+    batch_size=settings.SESSION_OUTBOX_BATCH_SIZE,
+    max_attempts=settings.SESSION_OUTBOX_MAX_ATTEMPTS,
+    retry_base_ms=settings.SESSION_OUTBOX_RETRY_BASE_MS,
+    retry_max_ms=settings.SESSION_OUTBOX_RETRY_MAX_MS,
+)
+
+# події клієнтів маршрутизуються через таблицю обробників (див. кінець модуля)
+dispatcher = EventDispatcher()
+
+# скільки чекаємо повернення хоста в LOBBY, перш ніж скасувати вікторину
+HOST_DISCONNECT = "host_disconnect"
+HOST_DISCONNECT_TIMEOUT_MS = 60 * 1000
 
 async def send_error(websocket: WebSocket, message: str) -> None:
-    await websocket.send_text(json.dumps({"type": "error", "message": message}))
+    await manager.send_personal(websocket, {"type": "error", "message": message})
 
 @ws_router.websocket("/ws")
 async def ws_endpoint(
@@ -38,18 +67,28 @@ async def ws_endpoint(
     roomCode: str = Query(...),
     name: str | None = None,
     playerId: str | None = Query(default=None),
+    protocol: str = Query(default="json", regex="^(json|msgpack)$"),
+    lastSeq: int | None = Query(default=None),
 ) -> None:
     print("\n" + "=" * 60)
     print(f"Новий WebSocket запит: Role: {role}, RoomCode: {roomCode}, Name: {name}")
     print("=" * 60 + "\n")
 
     r = await get_redis()
-    await manager.register(roomCode, websocket)
+    encoder = get_encoder(protocol)
+    # клієнт, що догоняє пропущені події, не повинен отримати нові раніше за них
+    conn = await manager.register(roomCode, websocket, encoder or JSON, role=role, start=lastSeq is None)
+    if encoder is None:
+        await send_error(websocket, f"Протокол {protocol} не підтримується сервером")
+        await manager.close_connection(websocket)
+        await manager.unregister(roomCode, websocket)
+        return
 
     player_id: str | None = None
     player_name: str | None = None
+    # номер події, до якої клієнт отримав стан (знімок або догін)
+    seq: int | None = None
     session_key = f"session:{roomCode}"
-    monitor_task = None
 
     try:
         if role == "player":
@@ -60,14 +99,14 @@ async def ws_endpoint(
             
             if not session_exists and not meta_exists:
                 await send_error(websocket, "Вікторина не знайдена або ще не створена")
-                await websocket.close()
+                await manager.close_connection(websocket)
                 return
 
             if session_exists:
                 session_data = json.loads(session_raw)
                 if session_data.get("phase") == "ENDED":
                     await send_error(websocket, "Вікторина вже завершена")
-                    await websocket.close()
+                    await manager.close_connection(websocket)
                     return
 
             if playerId is not None:
@@ -78,106 +117,107 @@ async def ws_endpoint(
                     print(f"Відновлено гравця за playerId={player_id[:8]}")
 
             if player_id is None and name:
-                all_players = await r.hgetall(manager.k_players(roomCode))
-                for pid, pname in all_players.items():
-                    if pname == name:
-                        player_id = pid
-                        player_name = pname
-                        print(f"Відновлено гравця за ім'ям, player_id={player_id[:8]}")
-                        break
+                pid = await manager.find_player_by_name(r, roomCode, name)
+                if pid is not None:
+                    player_id = pid
+                    player_name = name
+                    print(f"Відновлено гравця за ім'ям, player_id={player_id[:8]}")
 
             if player_id is None:
                 player_id = str(uuid.uuid4())
                 player_name = name or "Player"
                 print(f"Створено нового player_id: {player_id[:8]}")
 
-            await r.hset(manager.k_players(roomCode), mapping={player_id: player_name})
-            await r.expire(manager.k_players(roomCode), 6 * 60 * 60)
+            await manager.save_player(r, roomCode, player_id, player_name)
+            conn.player_id = player_id
 
             state = await manager.get_state(r, roomCode)
-            questions = await manager.load_questions(r, roomCode)
-            qidx = state.get("questionIndex", -1)
-            question = questions[qidx] if 0 <= qidx < len(questions) else None
-            sb = await manager.scoreboard(r, roomCode)
-
-            ss = ServerStateSync(
-                roomCode=roomCode,
-                phase=state.get("phase", "LOBBY"),
-                questionIndex=qidx,
-                startedAt=state.get("startedAt"),
-                durationMs=state.get("durationMs"),
-                question=question,
-                scoreboard=sb,
-                reveal=None,
-                playerId=player_id,
-            )
-            await websocket.send_text(ss.model_dump_json())
-
-            # Завжди відправляємо player_joined broadcast, щоб хост міг оновити список
-            # (навіть якщо гравець перезавантажує сторінку)
-            await manager.broadcast(
-                roomCode,
-                {"type": "player_joined", "playerName": player_name, "playerId": player_id, "roomCode": roomCode},
-                exclude=websocket,
-            )
+            phase = state.get("phase", "LOBBY")
+            seq = await resume_session(websocket, r, roomCode, lastSeq, role, player_id)
+            if seq is None:
+                seq = await manager.current_seq(r, roomCode)
+                frames = await manager.question_frames(r, roomCode)
+                qidx = state.get("questionIndex", -1)
+                # гравець отримує питання без правильної відповіді
+                question = frames[qidx].message["question"] if 0 <= qidx < len(frames) else None
+                # У лобі всі бали нульові, а гравець таблицю не бачить - не будуємо
+                # таблицю на кожне підключення. Далі гравець отримує лише топ
+                # і окремим кадром своє місце
+                leaderboard = {} if phase == "LOBBY" else await manager.leaderboard(r, roomCode)
+
+                ss = ServerStateSync(
+                    roomCode=roomCode,
+                    phase=phase,
+                    questionIndex=qidx,
+                    startedAt=state.get("startedAt"),
+                    durationMs=state.get("durationMs"),
+                    question=question,
+                    scoreboard=leaderboard.get("scoreboard"),
+                    totalPlayers=leaderboard.get("totalPlayers"),
+                    reveal=None,
+                    playerId=player_id,
+                    seq=seq,
+                )
+                await manager.send_personal(websocket, ss)
+                await send_staged_question(websocket, state, frames)
+            if phase != "LOBBY":
+                ranks = await manager.player_ranks(r, roomCode, [player_id])
+                if player_id in ranks:
+                    await manager.send_personal(websocket, ranks[player_id])
+
+            # Завжди повідомляємо про підключення, щоб хост міг оновити список
+            # (навіть якщо гравець перезавантажує сторінку). Підключення
+            # кімнати збираються в пакетний players_joined
+            manager.announce_join(roomCode, player_id, player_name)
 
         elif role == "host":
             print(f"Обробка підключення HOST для кімнати: {roomCode}")
             # Якщо хост підключається - видаляємо ключ відсутності (якщо він був встановлений)
             # Це означає, що хост повернувся і таймер не повинен спрацювати
-            # Видалення ключа також сигналізує monitor_host_disconnect, що хост повернувся
+            # і скасовуємо дедлайн відсутності хоста
             await r.delete(manager.k_host_presence(roomCode))
+            await manager.scheduler.cancel(r, HOST_DISCONNECT, roomCode)
             
-            state = await manager.get_state(r, roomCode)
-            questions = await manager.load_questions(r, roomCode)
-            qidx = state.get("questionIndex", -1)
-            question = questions[qidx] if 0 <= qidx < len(questions) else None
-            sb = await manager.scoreboard(r, roomCode)
-
-            ss = ServerStateSync(
-                roomCode=roomCode,
-                phase=state.get("phase", "LOBBY"),
-                questionIndex=qidx,
-                startedAt=state.get("startedAt"),
-                durationMs=state.get("durationMs"),
-                question=question,
-                scoreboard=sb,
-                reveal=None,
-                playerId=None,
-            )
-            await websocket.send_text(ss.model_dump_json())
+            seq = await resume_session(websocket, r, roomCode, lastSeq, role)
+            if seq is None:
+                seq = await manager.current_seq(r, roomCode)
+                state = await manager.get_state(r, roomCode)
+                questions = await manager.load_questions(r, roomCode)
+                qidx = state.get("questionIndex", -1)
+                question = questions[qidx] if 0 <= qidx < len(questions) else None
+                sb = await manager.scoreboard(r, roomCode)
+                frames = await manager.question_frames(r, roomCode)
+
+                ss = ServerStateSync(
+                    roomCode=roomCode,
+                    phase=state.get("phase", "LOBBY"),
+                    questionIndex=qidx,
+                    startedAt=state.get("startedAt"),
+                    durationMs=state.get("durationMs"),
+                    question=question,
+                    scoreboard=sb,
+                    reveal=None,
+                    playerId=None,
+                    seq=seq,
+                )
+                await manager.send_personal(websocket, ss)
+                await send_staged_question(websocket, state, frames)
 
-        while True:
-            raw = await websocket.receive_text()
-            data = json.loads(raw)
-            event_type = data.get("type")
-            print(f"\nОтримано подію: {event_type} від {role}")
+        # початковий знімок або пропущені події вже в черзі - відкриваємо відправку;
+        # з подій, що прийшли за цей час, клієнт отримує лише новіші за них
+        conn.start(after_seq=seq)
 
+        ctx = EventContext(websocket, r, roomCode, role, session_key, player_id, player_name)
+        while True:
+            raw = await conn.receive_raw()
             try:
-                if event_type == "host:create_session":
-                    evt = HostCreateSession(**data)
-                    await handle_create_session(websocket, r, roomCode, evt, session_key)
-                elif event_type == "host:start_question":
-                    evt = HostStartQuestion(**data)
-                    await handle_start_question(websocket, r, roomCode, evt)
-                elif event_type == "host:next_question":
-                    evt = HostNextQuestion(**data)
-                    await handle_next_question(websocket, r, roomCode, evt)
-                elif event_type == "host:reveal_answer":
-                    evt = HostRevealAnswer(**data)
-                    await handle_reveal_answer(websocket, r, roomCode, evt)
-                elif event_type == "host:end_session":
-                    evt = HostEndSession(**data)
-                    await handle_end_session(websocket, r, roomCode, session_key)
-                elif event_type == "player:join":
-                    evt = PlayerJoin(**data)
-                    await handle_player_join(websocket, r, roomCode, evt, player_id, player_name)
-                elif event_type == "player:answer":
-                    evt = PlayerAnswer(**data)
-                    await handle_player_answer(websocket, r, roomCode, evt, player_id)
-                else:
-                    await send_error(websocket, f"Невідомий тип події: {event_type}")
-
+                evt = dispatcher.parse(raw, conn.encoder)
+                print(f"\nОтримано подію: {evt.type} від {role}")
+                await dispatcher.dispatch(ctx, evt)
+            except UnknownEvent as e:
+                await send_error(websocket, f"Невідомий тип події: {e}")
+            except ForbiddenEvent as e:
+                await send_error(websocket, f"Подія {e} доступна лише хосту")
             except ValidationError as e:
                 print(f"Помилка валідації: {str(e)}")
                 await send_error(websocket, f"Помилка валідації: {str(e)}")
@@ -190,21 +230,26 @@ async def ws_endpoint(
             if state.get("phase") == "LOBBY":
                 # Встановлюємо ключ відсутності хоста (TTL 70 секунд для безпеки)
                 await r.setex(manager.k_host_presence(roomCode), 70, "disconnected")
-                # Запускаємо моніторинг - якщо хост не повернеться за 1 хвилину, викинемо гравців
-                monitor_task = asyncio.create_task(monitor_host_disconnect(r, roomCode))
-                print(f"[host_disconnect] Запущено моніторинг відсутності хоста для {roomCode}")
+                # Плануємо дедлайн - якщо хост не повернеться за 1 хвилину, викинемо гравців
+                await manager.scheduler.schedule(
+                    r,
+                    HOST_DISCONNECT,
+                    roomCode,
+                    "",
+                    int(time.time() * 1000) + HOST_DISCONNECT_TIMEOUT_MS,
+                )
+                print(f"[host_disconnect] Заплановано дедлайн відсутності хоста для {roomCode}")
     except Exception as e:
         print(f"\nПомилка WebSocket: {str(e)}")
     finally:
         await manager.unregister(roomCode, websocket)
         if role == "host":
-            # Якщо хост відключився в фазі LOBBY, моніторинг вже запущений
+            # Якщо хост відключився в фазі LOBBY, дедлайн вже заплановано
             # Якщо хост відключився в іншій фазі або під час помилки - просто видаляємо ключ
             state = await manager.get_state(r, roomCode)
             if state.get("phase") != "LOBBY":
                 await r.delete(manager.k_host_presence(roomCode))
-                if monitor_task:
-                    monitor_task.cancel()
+                await manager.scheduler.cancel(r, HOST_DISCONNECT, roomCode)
 
 async def handle_create_session(
     websocket: WebSocket,
@@ -219,6 +264,9 @@ async def handle_create_session(
     quiz_id = evt.quizId
     questions = [q.model_dump() for q in evt.questions]
     quiz_title = None 
+    # канонічний запис квізу кімнати; None - якщо вже збережений REST-ом
+    quiz_record: dict | None = None
+    quiz_base: dict | None = None
 
     # Спроба дістати дані з метаданих (які створив REST endpoint)
     meta_raw = await r.get(f"quiz:session_meta:{roomCode}")
@@ -231,12 +279,14 @@ async def handle_create_session(
     # Якщо REST уже закешував повний квіз — використовуємо його
     cached_quiz = await fetch_room_quiz(r, roomCode)
     if cached_quiz:
+        quiz_base = cached_quiz
         if not quiz_id:
             quiz_id = cached_quiz.get("id")
         if not quiz_title:
             quiz_title = cached_quiz.get("title")
         if not questions:
             questions = questions_to_runtime(cached_quiz)
+            quiz_record = cached_quiz
 
     # Якщо питань немає (фронтенд надіслав пустий список) і кешу не було, вантажимо з БД
     if not questions and quiz_id:
@@ -245,12 +295,14 @@ async def handle_create_session(
             from app.services.quiz_service import QuizService
             from app.repositories.quiz_repository import QuizRepository
             from app.core.supabase_client import get_supabase
+            from app.services.quiz_cache import get_quiz_cache
             
             repo = QuizRepository(get_supabase())
-            svc = QuizService(repo)
+            svc = QuizService(repo, cache=get_quiz_cache())
             
-            quiz_data = svc.get_quiz(quiz_id)
+            quiz_data = await svc.get_quiz(quiz_id)
             if quiz_data:
+                quiz_base = quiz_data
                 questions = questions_to_runtime(quiz_data)
                 # Якщо title не було в метаданих, беремо з БД
                 if not quiz_title:
@@ -264,23 +316,33 @@ async def handle_create_session(
     session_id = str(uuid.uuid4())
     created_at_ms = int(time.time() * 1000)
 
+    # питання зберігаються один раз - у записі квізу кімнати
+    new_quiz = None
+    if quiz_record is None:
+        new_quiz = quiz_from_runtime(questions, quiz_base, quiz_id, quiz_title)
+
     session_data = {
         "sessionId": session_id,
         "roomCode": roomCode,
         "quizId": quiz_id,
         "quizTitle": quiz_title, # <--- ЗБЕРІГАЄМО TITLE
-        "questions": questions,
         "phase": "LOBBY",
         "questionIndex": -1,
         "players": [],
         "createdAt": created_at_ms,
     }
     
-    await r.set(session_key, json.dumps(session_data))
+    await manager.create_session(
+        r,
+        roomCode,
+        questions,
+        session_id,
+        created_at_ms,
+        quiz=new_quiz,
+        extra={session_key: json.dumps(session_data)},
+    )
     print(f"Збережено {session_key} (Title: {quiz_title})")
 
-    await manager.create_session(r, roomCode, questions, session_id, created_at_ms)
-
     state = await manager.get_state(r, roomCode)
     # Отримуємо актуальний список гравців з Redis
     sb = await manager.scoreboard(r, roomCode)
@@ -296,7 +358,40 @@ async def handle_create_session(
         playerId=None,
     )
     
-    await manager.broadcast(roomCode, json.loads(out.model_dump_json()))
+    await manager.broadcast(roomCode, out)
+    # перше питання розсилається наперед, поки триває лобі
+    await manager.stage_question(r, roomCode, 0)
+
+async def resume_session(
+    websocket: WebSocket,
+    r,
+    roomCode: str,
+    last_seq: int | None,
+    role: str,
+    player_id: str | None = None,
+) -> int | None:
+    """
+    Досилає клієнту, що перепідключився з lastSeq, лише пропущені події.
+    Повертає номер останньої з них або None, якщо потрібен повний state_sync.
+    """
+    if last_seq is None:
+        return None
+    replay = await manager.replay(r, roomCode, last_seq, role)
+    if replay is None:
+        print(f"Клієнт відстав надто сильно (lastSeq={last_seq}), надсилаємо повний знімок")
+        return None
+    seq, frames = replay
+    for frame in frames:
+        await manager.send_personal(websocket, frame)
+    await manager.send_personal(websocket, ServerResumed(seq=seq, playerId=player_id))
+    print(f"Сесію відновлено: {len(frames)} пропущених подій (lastSeq={last_seq}, seq={seq})")
+    return seq
+
+async def send_staged_question(websocket: WebSocket, state: dict, frames: list) -> None:
+    """Клієнт, що підключився після розсилки наперед, отримує кадр наступного питання"""
+    staged = state.get("stagedQuestion", -1)
+    if staged > state.get("questionIndex", -1) and 0 <= staged < len(frames):
+        await manager.send_personal(websocket, frames[staged])
 
 async def handle_start_question(websocket: WebSocket, r, roomCode: str, evt: HostStartQuestion) -> None:
     msg = await manager.start_question(r, roomCode, evt.questionIndex, evt.durationMs)
@@ -320,9 +415,16 @@ async def handle_reveal_answer(websocket: WebSocket, r, roomCode: str, evt: Host
     state = await manager.get_state(r, roomCode)
     current_idx = evt.questionIndex or state.get("questionIndex", -1)
     msg = await manager.reveal_answer(r, roomCode, current_idx)
-    sb = await manager.scoreboard(r, roomCode)
-    msg["scoreboard"] = sb
+    if msg is None:
+        await send_error(websocket, "Відповідь на це питання вже розкрита")
+        return
+    msg.update(await manager.leaderboard(r, roomCode))
     await manager.broadcast(roomCode, msg)
+    await manager.stage_question(r, roomCode, current_idx + 1)
+
+async def handle_scoreboard_page(websocket: WebSocket, r, roomCode: str, evt: HostScoreboardPage) -> None:
+    page = await manager.scoreboard_page(r, roomCode, evt.offset, evt.limit)
+    await manager.send_personal(websocket, page)
 
 async def handle_end_session(websocket: WebSocket, r, roomCode: str, session_key: str) -> None:
     await manager.set_state(r, roomCode, phase="ENDED")
@@ -335,9 +437,6 @@ async def handle_end_session(websocket: WebSocket, r, roomCode: str, session_key
     created_at_ms = session_data.get("createdAt") or int(time.time() * 1000)
     ended_at_ms = int(time.time() * 1000)
 
-    session_data.update({"phase": "ENDED", "endedAt": ended_at_ms})
-    await r.set(session_key, json.dumps(session_data))
-
     questions = await manager.load_questions(r, roomCode)
     snapshot = FinishedSessionSnapshot(
         sessionId=session_id,
@@ -349,23 +448,33 @@ async def handle_end_session(websocket: WebSocket, r, roomCode: str, session_key
         scoreboard=sb,
     )
     
+    # архів і черга на збереження в Supabase - один запис у Redis;
+    # саму вставку в БД виконує воркер session_outbox
+    snapshot_json = snapshot.model_dump_json()
     archive_key = f"quiz:session:{session_id}"
-    await r.set(archive_key, snapshot.model_dump_json())
-    await r.zadd("quiz:session:index", {session_id: ended_at_ms})
-    await r.sadd(f"quiz:room_sessions:{roomCode}", session_id)
-
-    try:
-        session_service = QuizSessionService()
-        session_service.save_finished_session(snapshot.model_dump())
-    except Exception as e:
-        print(f"Помилка збереження в Supabase: {e}")
-
-    await manager.cleanup_room_data(r, roomCode)
-    await r.delete(f"quiz:session_meta:{roomCode}")
-    await r.delete(session_key)
-    await delete_room_quiz(r, roomCode)
+    pipe = r.pipeline(transaction=True)
+    pipe.set(archive_key, snapshot_json)
+    pipe.zadd("quiz:session:index", {session_id: ended_at_ms})
+    pipe.sadd(f"quiz:room_sessions:{roomCode}", session_id)
+    session_outbox.enqueue(pipe, snapshot_json)
+    await pipe.execute()
+
+    await manager.broadcast(
+        roomCode,
+        {
+            "type": "session_ended",
+            "scoreboard": sb[: manager.leaderboard_top_n],
+            "totalPlayers": len(sb),
+            "sessionId": session_id,
+        },
+    )
 
-    await manager.broadcast(roomCode, {"type": "session_ended", "scoreboard": sb, "sessionId": session_id})
+    # після розсилки, щоб журнал подій кімнати не створився знову
+    await manager.cleanup_room_data(
+        r,
+        roomCode,
+        extra_keys=[f"quiz:session_meta:{roomCode}", session_key],
+    )
 
 async def handle_player_join(websocket: WebSocket, r, roomCode: str, evt: PlayerJoin, player_id: str | None, player_name: str | None) -> None:
     pass
@@ -375,38 +484,69 @@ async def handle_player_answer(websocket: WebSocket, r, roomCode: str, evt: Play
         await send_error(websocket, "Player not registered")
         return
     ok = await manager.submit_answer(r, roomCode, evt.questionIndex, player_id, evt.optionIndex)
-    await websocket.send_text(json.dumps({"type": "answer_ack", "ok": ok}))
+    await manager.send_personal(websocket, {"type": "answer_ack", "ok": ok})
 
 
-async def monitor_host_disconnect(r, roomCode: str) -> None:
+async def on_host_disconnect_deadline(r, roomCode: str, _arg: str) -> None:
     """
-    Моніторить відсутність хоста. Якщо хост не повертається протягом 1 хвилини
+    Дедлайн відсутності хоста. Якщо хост не повернувся протягом 1 хвилини
     після відключення, відправляє connection_closed всім гравцям.
     """
-    try:
-        # Чекаємо 1 хвилину
-        await asyncio.sleep(60)
-        
-        # Перевіряємо, чи хост повернувся (ключ має бути видалений, якщо хост підключився)
-        presence_exists = await r.exists(manager.k_host_presence(roomCode))
-        if presence_exists:
-            # Хост не повернувся - відправляємо connection_closed всім гравцям
-            state = await manager.get_state(r, roomCode)
-            # Перевіряємо, що ми все ще в фазі LOBBY
-            if state.get("phase") == "LOBBY":
-                print(f"[monitor_host_disconnect] Хост не повернувся для кімнати {roomCode}, відправляємо connection_closed")
-                await manager.broadcast(
-                    roomCode,
-                    {
-                        "type": "connection_closed",
-                        "message": "Хост вийшов з кімнати. Вікторина скасована.",
-                    },
-                )
-                # Видаляємо ключ після відправки повідомлення
-                await r.delete(manager.k_host_presence(roomCode))
-    except asyncio.CancelledError:
-        print(f"[monitor_host_disconnect] Моніторинг скасовано для {roomCode}")
-        # Якщо таймер скасовано (хост повернувся), видаляємо ключ
-        await r.delete(manager.k_host_presence(roomCode))
-    except Exception as e:
-        print(f"[monitor_host_disconnect] Помилка: {e}")
\ No newline at end of file
+    # Перевіряємо, чи хост повернувся (ключ має бути видалений, якщо хост підключився)
+    presence_exists = await r.exists(manager.k_host_presence(roomCode))
+    if not presence_exists:
+        return
+
+    # Хост не повернувся - відправляємо connection_closed всім гравцям
+    state = await manager.get_state(r, roomCode)
+    # Перевіряємо, що ми все ще в фазі LOBBY
+    if state.get("phase") == "LOBBY":
+        print(f"[host_disconnect] Хост не повернувся для кімнати {roomCode}, відправляємо connection_closed")
+        await manager.broadcast(
+            roomCode,
+            {
+                "type": "connection_closed",
+                "message": "Хост вийшов з кімнати. Вікторина скасована.",
+            },
+        )
+    # Видаляємо ключ після відправки повідомлення
+    await r.delete(manager.k_host_presence(roomCode))
+
+
+manager.scheduler.register(HOST_DISCONNECT, on_host_disconnect_deadline)
+
+
+# --- таблиця обробників подій клієнтів ---
+# Команди, що змінюють кімнату, виконуються по черзі в акторі кімнати
+
+@dispatcher.on("host:create_session", role="host")
+async def on_create_session(ctx: EventContext, evt: HostCreateSession) -> None:
+    await manager.in_room(ctx.roomCode, handle_create_session, ctx.websocket, ctx.r, ctx.roomCode, evt, ctx.session_key)
+
+@dispatcher.on("host:start_question", role="host")
+async def on_start_question(ctx: EventContext, evt: HostStartQuestion) -> None:
+    await manager.in_room(ctx.roomCode, handle_start_question, ctx.websocket, ctx.r, ctx.roomCode, evt)
+
+@dispatcher.on("host:next_question", role="host")
+async def on_next_question(ctx: EventContext, evt: HostNextQuestion) -> None:
+    await manager.in_room(ctx.roomCode, handle_next_question, ctx.websocket, ctx.r, ctx.roomCode, evt)
+
+@dispatcher.on("host:reveal_answer", role="host")
+async def on_reveal_answer(ctx: EventContext, evt: HostRevealAnswer) -> None:
+    await manager.in_room(ctx.roomCode, handle_reveal_answer, ctx.websocket, ctx.r, ctx.roomCode, evt)
+
+@dispatcher.on("host:end_session", role="host")
+async def on_end_session(ctx: EventContext, evt: HostEndSession) -> None:
+    await manager.in_room(ctx.roomCode, handle_end_session, ctx.websocket, ctx.r, ctx.roomCode, ctx.session_key)
+
+@dispatcher.on("host:scoreboard_page", role="host")
+async def on_scoreboard_page(ctx: EventContext, evt: HostScoreboardPage) -> None:
+    await handle_scoreboard_page(ctx.websocket, ctx.r, ctx.roomCode, evt)
+
+@dispatcher.on("player:join")
+async def on_player_join(ctx: EventContext, evt: PlayerJoin) -> None:
+    await handle_player_join(ctx.websocket, ctx.r, ctx.roomCode, evt, ctx.player_id, ctx.player_name)
+
+@dispatcher.on("player:answer")
+async def on_player_answer(ctx: EventContext, evt: PlayerAnswer) -> None:
+    await handle_player_answer(ctx.websocket, ctx.r, ctx.roomCode, evt, ctx.player_id)
@@ -57,7 +57,90 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("SUPABASE_SCHEMA", "supabase_schema"),
         description="Supabase schema name",
     )
-   
+
+    DB_THREADPOOL_SIZE: int = Field(
+        8,
+        validation_alias=AliasChoices("DB_THREADPOOL_SIZE", "db_threadpool_size"),
+        description="Worker threads for blocking Supabase calls made from async handlers",
+    )
+
+    QUIZ_CACHE_TTL_SECONDS: int = Field(
+        300,
+        validation_alias=AliasChoices("QUIZ_CACHE_TTL_SECONDS", "quiz_cache_ttl_seconds"),
+        description="Lifetime of the shared Redis copy of a quiz (bounds staleness of its rating)",
+    )
+    QUIZ_CACHE_LOCAL_TTL_MS: int = Field(
+        2000,
+        validation_alias=AliasChoices("QUIZ_CACHE_LOCAL_TTL_MS", "quiz_cache_local_ttl_ms"),
+        description="How long a worker serves its in-process quiz copy before revalidating it against Redis",
+    )
+    QUIZ_CACHE_LOCAL_SIZE: int = Field(
+        512,
+        validation_alias=AliasChoices("QUIZ_CACHE_LOCAL_SIZE", "quiz_cache_local_size"),
+        description="Quizzes kept in the per-worker LRU",
+    )
+    SESSION_OUTBOX_BATCH_SIZE: int = Field(
+        50,
+        validation_alias=AliasChoices("SESSION_OUTBOX_BATCH_SIZE", "session_outbox_batch_size"),
+        description="Finished sessions inserted into Supabase per write-behind batch",
+    )
+    SESSION_OUTBOX_MAX_ATTEMPTS: int = Field(
+        8,
+        validation_alias=AliasChoices("SESSION_OUTBOX_MAX_ATTEMPTS", "session_outbox_max_attempts"),
+        description="Failed inserts of one session before it is moved to the dead-letter list",
+    )
+    SESSION_OUTBOX_RETRY_BASE_MS: int = Field(
+        500,
+        validation_alias=AliasChoices("SESSION_OUTBOX_RETRY_BASE_MS", "session_outbox_retry_base_ms"),
+        description="Initial backoff after a failed batch; doubles on each consecutive failure",
+    )
+    SESSION_OUTBOX_RETRY_MAX_MS: int = Field(
+        60_000,
+        validation_alias=AliasChoices("SESSION_OUTBOX_RETRY_MAX_MS", "session_outbox_retry_max_ms"),
+        description="Upper bound for the write-behind retry backoff",
+    )
+
+    # WebSocket
+    WS_SEND_QUEUE_SIZE: int = Field(
+        256,
+        validation_alias=AliasChoices("WS_SEND_QUEUE_SIZE", "ws_send_queue_size"),
+        description="Max outbound frames buffered per WebSocket before the client is dropped",
+    )
+    WS_SEND_SOFT_LIMIT: int | None = Field(
+        None,
+        validation_alias=AliasChoices("WS_SEND_SOFT_LIMIT", "ws_send_soft_limit"),
+        description="Queued frames above which non-critical frames are dropped (default: half of WS_SEND_QUEUE_SIZE)",
+    )
+    WS_SLOW_CONSUMER_TIMEOUT_MS: int = Field(
+        5000,
+        validation_alias=AliasChoices("WS_SLOW_CONSUMER_TIMEOUT_MS", "ws_slow_consumer_timeout_ms"),
+        description="How long a client may stay above the soft limit before it is disconnected",
+    )
+    WS_BROADCAST_BACKEND: str = Field(
+        "local",
+        validation_alias=AliasChoices("WS_BROADCAST_BACKEND", "ws_broadcast_backend"),
+        description="Room broadcast backend: local (single worker) | redis (pub/sub across workers)",
+    )
+    WS_EVENT_LOG_SIZE: int = Field(
+        500,
+        validation_alias=AliasChoices("WS_EVENT_LOG_SIZE", "ws_event_log_size"),
+        description="Room events kept in the per-room Redis Stream for reconnect catch-up",
+    )
+    WS_LEADERBOARD_TOP_N: int = Field(
+        10,
+        validation_alias=AliasChoices("WS_LEADERBOARD_TOP_N", "ws_leaderboard_top_n"),
+        description="Number of leaderboard entries broadcast to the whole room",
+    )
+    WS_ANSWER_PROGRESS_MS: int = Field(
+        250,
+        validation_alias=AliasChoices("WS_ANSWER_PROGRESS_MS", "ws_answer_progress_ms"),
+        description="Minimum interval between answer_progress frames sent to the host",
+    )
+    WS_JOIN_BATCH_MS: int = Field(
+        100,
+        validation_alias=AliasChoices("WS_JOIN_BATCH_MS", "ws_join_batch_ms"),
+        description="Window for coalescing lobby joins into one players_joined frame per room",
+    )
 
     # CORS origins
     FRONTEND_ORIGINS: list[str] = [
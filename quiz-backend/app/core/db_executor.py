@@ -0,0 +1,41 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+# Окремий обмежений пул для синхронного клієнта Supabase: запити до БД
+# не блокують цикл подій і не забирають потоки у стандартного пулу
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DB_THREADPOOL_SIZE,
+            thread_name_prefix="supabase",
+        )
+    return _executor
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Виконує синхронний виклик сервісу/репозиторію в пулі потоків БД.
+    Усі потоки ділять один клієнт Supabase (і його пул HTTP-з'єднань).
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_db_executor(), call)
+
+
+def shutdown_db_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
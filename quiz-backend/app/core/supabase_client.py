@@ -1,12 +1,18 @@
 # app/core/supabase_client.py
+import threading
+
 from supabase import create_client, Client
 from .config import settings
 
 _supabase: Client | None = None
+# клієнт створюється з потоків пулу БД (run_db), тож ініціалізація під замком
+_supabase_lock = threading.Lock()
 
 def get_supabase() -> Client:
     global _supabase
     if _supabase is None:
-        # ВАЖЛИВО: каст до str
-        _supabase = create_client(str(settings.SUPABASE_URL), str(settings.SUPABASE_SERVICE_ROLE_KEY))
+        with _supabase_lock:
+            if _supabase is None:
+                # ВАЖЛИВО: каст до str
+                _supabase = create_client(str(settings.SUPABASE_URL), str(settings.SUPABASE_SERVICE_ROLE_KEY))
     return _supabase
@@ -3,6 +3,7 @@ import strawberry
 
 from ..repositories.quiz_repository import QuizRepository
 from ..services.quiz_service import QuizService
+from ..services.quiz_cache import get_quiz_cache
 from .types import QuizInfoType
 
 # -------------------------------
@@ -15,7 +16,7 @@ def get_quiz_service() -> QuizService:
     """
     from app.core.supabase_client import get_supabase
     repo = QuizRepository(get_supabase())
-    return QuizService(repo=repo)
+    return QuizService(repo=repo, cache=get_quiz_cache())
 
 # -------------------------------
 # Query Resolver
@@ -30,7 +31,7 @@ async def resolve_quiz_info(
     Повертає інформацію про вікторину для модалки.
     """
     quiz_service = get_quiz_service()
-    data = quiz_service.get_quiz(id)
+    data = await quiz_service.get_quiz(id)
     if not data:
         return None
 
@@ -1,12 +1,34 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from .core.config import settings
+from .core.redis_manager import get_redis, close_redis
+from .core.db_executor import run_db, shutdown_db_executor
 from .core.cors import setup_cors
 from .api.v1.routers import quizzes as quizzes_router
 from .api.v1.routers import ws_router
 from .api.v1.routers import sessions as sessions_router 
 from app.graphql.router import router as graphql_router
+from app.ws.connection import stats as ws_backpressure_stats
+from app.services.quiz_session_service import QuizSessionService
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # один цикл дедлайнів на процес (авто-розкриття, відсутність хоста)
+    ws_router.manager.start(get_redis)
+    session_service = QuizSessionService()
+
+    async def persist_sessions(snapshots: list[dict]) -> None:
+        await run_db(session_service.save_finished_sessions, snapshots)
 
-app = FastAPI(title=settings.APP_NAME)
+    ws_router.session_outbox.start(get_redis, persist_sessions)
+    yield
+    await ws_router.session_outbox.stop()
+    await ws_router.manager.stop()
+    await close_redis()
+    shutdown_db_executor()
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 setup_cors(app)
 
 app.include_router(quizzes_router.router, prefix=settings.API_V1_PREFIX)
@@ -17,3 +39,12 @@ app.include_router(graphql_router, prefix="/api/v1")
 @app.get("/healthz")
 async def healthz():
     return {"status": "ok"}
+
+@app.get("/healthz/ws")
+async def healthz_ws():
+    # скільки разів спрацювали політики backpressure у цьому процесі
+    return {
+        "connections": len(ws_router.manager.clients),
+        "backpressure": ws_backpressure_stats.as_dict(),
+        "sessionOutbox": await ws_router.session_outbox.depth(await get_redis()),
+    }
@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import List, Optional, Tuple
 from supabase import Client
 
@@ -5,48 +6,62 @@ class QuizRepository:
     def __init__(self, client: Client) -> None:
         self.client = client
 
-    def list_quizzes(self) -> List[dict]:
-        res = (
+    def list_quizzes(self, limit: int, after: Optional[Tuple[str, str]] = None) -> List[dict]:
+        """
+        Сторінка списку за ключем (updated_at, id) у спадному порядку.
+        after - (updated_at, id) останнього квізу попередньої сторінки.
+        """
+        query = (
             self.client.table("quizzes")
             .select("id,title,description,updated_at")   
             .order("updated_at", desc=True)
-            .execute()
+            .order("id", desc=True)
+            .limit(limit)
         )
+        if after is not None:
+            updated_at, quiz_id = after
+            query = query.or_(
+                f'updated_at.lt."{updated_at}",'
+                f'and(updated_at.eq."{updated_at}",id.lt.{quiz_id})'
+            )
+        res = query.execute()
         return res.data or []
 
-    def get_quiz_with_questions(self, quiz_id: str) -> Optional[Tuple[dict, List[dict]]]:
-        quiz_res = (
-            self.client.table("quizzes")
-            .select("*")  
-            .eq("id", quiz_id)
-            .single()
+    def list_version(self) -> int:
+        """
+        Версія списку квізів для ETag: рядок quiz_list_version, який
+        тригер БД збільшує при кожній зміні quizzes (див. db/schema.sql).
+        """
+        res = (
+            self.client.table("quiz_list_version")
+            .select("version")
+            .limit(1)
             .execute()
         )
-        if not quiz_res.data:
-            return None
+        return int(res.data[0]["version"]) if res.data else 0
 
-        q_res = (
-            self.client.table("questions")
-            .select("*")
-            .eq("quiz_id", quiz_id)
-            .order("position", desc=False)
-            .execute()
-        )
-        return quiz_res.data, (q_res.data or [])
-    
-    def count_quiz_sessions(self, quiz_id: str) -> int:
+    def get_quiz_with_questions(self, quiz_id: str) -> Optional[Tuple[dict, List[dict]]]:
         """
-        Повертає кількість рядків у quiz_sessions для даного quiz_id.
-        Для простоти використовує вибірку і len(res.data).
-        При великих обсягах можна оптимізувати через RPC або head+count.
+        Квіз разом із впорядкованими питаннями за один запит
+        (вбудований ресурс PostgREST). Кількість зіграних сесій
+        повертається в лічильнику quizzes.session_count, який
+        підтримує тригер БД (див. db/schema.sql).
         """
         res = (
-            self.client.table("quiz_sessions")
-            .select("id")
-            .eq("quiz_id", quiz_id)
+            self.client.table("quizzes")
+            .select("*,questions(*)")
+            .eq("id", quiz_id)
+            .single()
             .execute()
         )
-        return len(res.data or [])
+        if not res.data:
+            return None
+
+        quiz = dict(res.data)
+        # order(foreign_table=...) у цій версії клієнта сортує сам квіз,
+        # тому питання впорядковуємо тут
+        questions = sorted(quiz.pop("questions", None) or [], key=lambda q: q["position"])
+        return quiz, questions
 
     def create_quiz(self, title: str, description: str, questions: List[dict]) -> str:
         quiz_ins = (
@@ -83,6 +98,9 @@ class QuizRepository:
             update_data["title"] = title
         if description is not None:
             update_data["description"] = description  
+        if questions is not None:
+            # заміна питань - теж нова версія квізу (за updated_at ключується кеш)
+            update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
 
         if update_data:
             self.client.table("quizzes").update(update_data).eq("id", quiz_id).execute()
@@ -1,4 +1,4 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from supabase import Client
 
@@ -15,3 +15,14 @@ class QuizSessionRepository:
         які напряму відповідають колонкам таблиці.
         """
         self.client.table("quiz_sessions").insert(row).execute()
+
+    def insert_sessions(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Зберігає пачку завершених сесій одним запитом.
+
+        Вже збережені id пропускаються, тож повтор пачки після збою
+        (частина рядків могла дійти до БД) безпечний.
+        """
+        self.client.table("quiz_sessions").upsert(
+            rows, on_conflict="id", ignore_duplicates=True
+        ).execute()
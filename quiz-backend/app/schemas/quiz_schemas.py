@@ -41,3 +41,7 @@ class QuizListItem(BaseModel):
     title: str
     description: str                
     updatedAt: str
+
+class QuizListPage(BaseModel):
+    items: List[QuizListItem]
+    nextCursor: Optional[str] = None
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+from redis.asyncio import Redis
+
+QuizLoader = Callable[[str], Awaitable[Dict[str, Any] | None]]
+
+# Завантаження, що стартувало до останньої інвалідації (ARGV[4] - час
+# старту в мс), не записує в Redis застарілі дані.
+# ARGV: updatedAt, data (JSON; "null" - квізу немає), ttl_ms, started_ms
+STORE_QUIZ = """
+local invalidated = redis.call('GET', KEYS[2])
+if invalidated and tonumber(invalidated) > tonumber(ARGV[4]) then
+  return 0
+end
+redis.call('HSET', KEYS[1], 'updatedAt', ARGV[1], 'data', ARGV[2])
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 1
+"""
+
+
+def quiz_cache_key(quiz_id: str) -> str:
+    return f"quiz:cache:{quiz_id}"
+
+
+class QuizCache:
+    """
+    Дворівневий read-through кеш квізів (формат QuizOut) за id.
+
+    L1 — LRU у пам'яті процесу. Запис вважається свіжим local_ttl_ms,
+    після чого звіряється з Redis лише за updatedAt, без передачі тіла.
+    L2 — спільний для воркерів Redis-hash {updatedAt, data} з TTL.
+    QuizService явно видаляє обидва рівні при зміні чи видаленні квізу.
+
+    Захист від stampede: у межах процесу паралельні промахи по одному id
+    чекають на одне завантаження; між процесами БД читає лише власник
+    короткого Redis-замка, решта чекає, поки запис з'явиться в Redis
+    або замок звільниться (тоді наступний бере його і читає БД сам).
+    Відсутній квіз кешується на negative_ttl_ms, щоб запити до
+    неіснуючого id не йшли щоразу в БД.
+    Повернені словники спільні для всіх викликів — їх не можна змінювати.
+    """
+
+    def __init__(
+        self,
+        redis_factory: Callable[[], Awaitable[Redis]],
+        ttl_seconds: int = 300,
+        local_ttl_ms: int = 2000,
+        local_size: int = 512,
+        lock_ttl_ms: int = 5000,
+        lock_poll_ms: int = 50,
+        negative_ttl_ms: int = 5000,
+    ) -> None:
+        self._redis_factory = redis_factory
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl = local_ttl_ms / 1000.0
+        self.local_size = max(1, local_size)
+        self.lock_ttl_ms = lock_ttl_ms
+        self.lock_poll = lock_poll_ms / 1000.0
+        self.negative_ttl_ms = negative_ttl_ms
+        # quiz_id -> (updatedAt, дані або None, коли звірено з Redis)
+        self._local: OrderedDict[str, tuple[str, Dict[str, Any] | None, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def k_lock(quiz_id: str) -> str:
+        return f"quiz:cache:{quiz_id}:lock"
+
+    @staticmethod
+    def k_invalidated(quiz_id: str) -> str:
+        return f"quiz:cache:{quiz_id}:invalidated"
+
+    async def get(self, quiz_id: str, load: QuizLoader) -> Dict[str, Any] | None:
+        entry = self._local.get(quiz_id)
+        if entry is not None and time.monotonic() - entry[2] < self.local_ttl:
+            self._local.move_to_end(quiz_id)
+            return entry[1]
+
+        task = self._inflight.get(quiz_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(quiz_id, load, entry))
+            self._inflight[quiz_id] = task
+            task.add_done_callback(lambda t: self._forget(quiz_id, t))
+        # скасування одного з очікувачів не зриває завантаження для решти
+        return await asyncio.shield(task)
+
+    async def invalidate(self, quiz_id: str) -> None:
+        self._local.pop(quiz_id, None)
+        self._inflight.pop(quiz_id, None)
+        r = await self._redis_factory()
+        pipe = r.pipeline(transaction=True)
+        pipe.unlink(quiz_cache_key(quiz_id))
+        pipe.set(self.k_invalidated(quiz_id), int(time.time() * 1000), ex=self.ttl_seconds)
+        await pipe.execute()
+
+    def _forget(self, quiz_id: str, task: asyncio.Task) -> None:
+        if self._inflight.get(quiz_id) is task:
+            del self._inflight[quiz_id]
+
+    def _remember(self, quiz_id: str, version: str, data: Dict[str, Any] | None) -> None:
+        self._local[quiz_id] = (version, data, time.monotonic())
+        self._local.move_to_end(quiz_id)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def _fetch(
+        self,
+        quiz_id: str,
+        load: QuizLoader,
+        stale: tuple[str, Dict[str, Any] | None, float] | None,
+    ) -> Dict[str, Any] | None:
+        r = await self._redis_factory()
+        key = quiz_cache_key(quiz_id)
+
+        if stale is not None:
+            # квіз не змінювався — достатньо продовжити локальний запис
+            if await r.hget(key, "updatedAt") == stale[0]:
+                self._remember(quiz_id, stale[0], stale[1])
+                return stale[1]
+
+        found, data = await self._read_shared(r, quiz_id)
+        if found:
+            return data
+
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl_ms / 1000.0
+        while not await r.set(self.k_lock(quiz_id), token, nx=True, px=self.lock_ttl_ms):
+            # квіз уже вантажить інший воркер — чекаємо на його запис
+            await asyncio.sleep(self.lock_poll)
+            found, data = await self._read_shared(r, quiz_id)
+            if found:
+                return data
+            if time.monotonic() >= deadline:
+                # власник замка завис — читаємо БД без замка
+                break
+            # замок звільнено без запису (помилка БД або запис відхилено
+            # інвалідацією) — наступна ітерація пробує взяти його самим
+
+        started_ms = int(time.time() * 1000)
+        try:
+            data = await load(quiz_id)
+            version = str(data.get("updatedAt") or "") if data is not None else ""
+            ttl_ms = self.ttl_seconds * 1000 if data is not None else self.negative_ttl_ms
+            await r.eval(
+                STORE_QUIZ,
+                2,
+                key,
+                self.k_invalidated(quiz_id),
+                version,
+                json.dumps(data),
+                ttl_ms,
+                started_ms,
+            )
+            if self._inflight.get(quiz_id) is asyncio.current_task():
+                self._remember(quiz_id, version, data)
+            return data
+        finally:
+            if await r.get(self.k_lock(quiz_id)) == token:
+                await r.delete(self.k_lock(quiz_id))
+
+    async def _read_shared(self, r: Redis, quiz_id: str) -> tuple[bool, Dict[str, Any] | None]:
+        """(чи є запис у Redis, квіз або None, якщо його немає в БД)"""
+        version, raw = await r.hmget(quiz_cache_key(quiz_id), "updatedAt", "data")
+        if raw is None:
+            return False, None
+        data = json.loads(raw)
+        self._remember(quiz_id, version, data)
+        return True, data
+
+
+_quiz_cache: QuizCache | None = None
+
+
+def get_quiz_cache() -> QuizCache:
+    global _quiz_cache
+    if _quiz_cache is None:
+        from ..core.config import settings
+        from ..core.redis_manager import get_redis
+
+        _quiz_cache = QuizCache(
+            get_redis,
+            ttl_seconds=settings.QUIZ_CACHE_TTL_SECONDS,
+            local_ttl_ms=settings.QUIZ_CACHE_LOCAL_TTL_MS,
+            local_size=settings.QUIZ_CACHE_LOCAL_SIZE,
+        )
+    return _quiz_cache
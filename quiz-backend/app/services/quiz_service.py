@@ -1,25 +1,60 @@
-from typing import List, Optional
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+
 from .typing import to_iso
+from .quiz_cache import QuizCache
+from ..core.db_executor import run_db
 from ..repositories.quiz_repository import QuizRepository
 
 class QuizService:
-    def __init__(self, repo: QuizRepository) -> None:
+    """
+    Сервіс квізів для async-обробників: синхронний репозиторій
+    виконується в пулі потоків БД (run_db), а get_quiz читає через
+    кеш, якщо він переданий; зміни квізу його інвалідовують.
+    """
+
+    def __init__(self, repo: QuizRepository, cache: QuizCache | None = None) -> None:
         self.repo = repo
+        self.cache = cache
+
+    async def list_quizzes(self, limit: int, cursor: Optional[str] = None) -> dict:
+        """
+        Сторінка архіву (keyset-пагінація). ValueError - якщо курсор зіпсований.
+        """
+        after = decode_list_cursor(cursor) if cursor else None
+        # на один рядок більше, щоб знати, чи є наступна сторінка
+        items = await run_db(self.repo.list_quizzes, limit + 1, after)
+        page = items[:limit]
+        next_cursor = None
+        if len(items) > limit:
+            next_cursor = encode_list_cursor(page[-1]["updated_at"], page[-1]["id"])
+        return {
+            "items": [
+                {
+                    "id": i["id"],
+                    "title": i["title"],
+                    "description": i["description"],   
+                    "updatedAt": to_iso(i["updated_at"]),
+                }
+                for i in page
+            ],
+            "nextCursor": next_cursor,
+        }
 
-    def list_quizzes(self) -> list[dict]:
-        items = self.repo.list_quizzes()
-        return [
-            {
-                "id": i["id"],
-                "title": i["title"],
-                "description": i["description"],   
-                "updatedAt": to_iso(i["updated_at"]),
-            }
-            for i in items
-        ]
-
-    def get_quiz(self, quiz_id: str) -> Optional[dict]:
-        res = self.repo.get_quiz_with_questions(quiz_id)
+    async def list_version(self) -> str:
+        """Версія списку квізів для ETag"""
+        return str(await run_db(self.repo.list_version))
+
+    async def get_quiz(self, quiz_id: str) -> Optional[dict]:
+        if self.cache is None:
+            return await self._load_quiz(quiz_id)
+        return await self.cache.get(quiz_id, self._load_quiz)
+
+    async def _load_quiz(self, quiz_id: str) -> Optional[dict]:
+        res = await run_db(self.repo.get_quiz_with_questions, quiz_id)
         if not res:
             return None
         quiz, questions = res
@@ -27,8 +62,8 @@ class QuizService:
         # question count
         q_count = len(questions or [])
 
-        # rating = number of sessions for this quiz
-        rating = self.repo.count_quiz_sessions(quiz_id)
+        # rating = number of sessions for this quiz (лічильник у БД)
+        rating = quiz.get("session_count") or 0
 
         return {
             "id": quiz["id"],
@@ -51,11 +86,39 @@ class QuizService:
         }
 
 
-    def create_quiz(self, title: str, description: str, questions: List[dict]) -> str:
-        return self.repo.create_quiz(title, description, questions)
+    async def create_quiz(self, title: str, description: str, questions: List[dict]) -> str:
+        return await run_db(self.repo.create_quiz, title, description, questions)
+
+    async def update_quiz(self, quiz_id: str, title: Optional[str], description: Optional[str], questions: Optional[List[dict]]) -> None:
+        try:
+            await run_db(self.repo.update_quiz, quiz_id, title, description, questions)
+        finally:
+            # навіть частково застосована зміна не має лишитись у кеші
+            await self._invalidate(quiz_id)
+
+    async def delete_quiz(self, quiz_id: str) -> None:
+        try:
+            await run_db(self.repo.delete_quiz, quiz_id)
+        finally:
+            await self._invalidate(quiz_id)
+
+    async def _invalidate(self, quiz_id: str) -> None:
+        if self.cache is not None:
+            await self.cache.invalidate(quiz_id)
+
+
+def encode_list_cursor(updated_at: str, quiz_id: str) -> str:
+    raw = json.dumps([to_iso(updated_at), str(quiz_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
 
-    def update_quiz(self, quiz_id: str, title: Optional[str], description: Optional[str], questions: Optional[List[dict]]) -> None:
-        self.repo.update_quiz(quiz_id, title, description, questions)
 
-    def delete_quiz(self, quiz_id: str) -> None:
-        self.repo.delete_quiz(quiz_id)
+def decode_list_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, quiz_id = json.loads(raw)
+        # значення потрапляють у фільтр PostgREST - приймаємо лише коректні
+        datetime.fromisoformat(updated_at)
+        UUID(quiz_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+    return updated_at, quiz_id
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from ..core.supabase_client import get_supabase
 from ..repositories.quiz_session_repository import QuizSessionRepository
@@ -20,6 +20,16 @@ class QuizSessionService:
         Приймає snapshot завершеної сесії (FinishedSessionSnapshot.model_dump())
         і зберігає його у таблицю quiz_sessions.
         """
+        self.repo.insert_session(self._to_row(snapshot))
+
+    def save_finished_sessions(self, snapshots: List[Dict[str, Any]]) -> None:
+        """
+        Пакетний варіант save_finished_session для черги збереження сесій.
+        """
+        self.repo.insert_sessions([self._to_row(s) for s in snapshots])
+
+    @staticmethod
+    def _to_row(snapshot: Dict[str, Any]) -> Dict[str, Any]:
         session_id = snapshot["sessionId"]
         room_code = snapshot["roomCode"]
         quiz_id = snapshot.get("quizId")
@@ -41,7 +51,7 @@ class QuizSessionService:
 
         # ВАЖЛИВО: Supabase очікує JSON-серіалізовні значення,
         # тому datetime конвертуємо в ISO-строки.
-        row = {
+        return {
             "id": session_id,
             "room_code": room_code,
             "quiz_id": quiz_id,
@@ -50,5 +60,3 @@ class QuizSessionService:
             "questions": questions,
             "scoreboard": scoreboard,
         }
-
-        self.repo.insert_session(row)
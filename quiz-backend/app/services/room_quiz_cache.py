@@ -6,7 +6,12 @@ from redis.asyncio import Redis
 ROOM_CACHE_TTL = 6 * 60 * 60  # 6 hours
 
 
-def _room_quiz_key(room_code: str) -> str:
+def room_quiz_key(room_code: str) -> str:
+    """
+    The canonical per-room quiz record (QuizOut shape). REST endpoints and
+    the WebSocket game loop read the questions from here; nothing else in
+    Redis keeps a copy of them.
+    """
     return f"quiz:room:{room_code}:quiz"
 
 
@@ -16,20 +21,16 @@ async def store_room_quiz(r: Redis, room_code: str, quiz_payload: Dict[str, Any]
     """
     if not quiz_payload:
         return
-    await r.setex(_room_quiz_key(room_code), ROOM_CACHE_TTL, json.dumps(quiz_payload))
+    await r.setex(room_quiz_key(room_code), ROOM_CACHE_TTL, json.dumps(quiz_payload))
 
 
 async def fetch_room_quiz(r: Redis, room_code: str) -> Dict[str, Any] | None:
-    raw = await r.get(_room_quiz_key(room_code))
+    raw = await r.get(room_quiz_key(room_code))
     if not raw:
         return None
     return json.loads(raw)
 
 
-async def delete_room_quiz(r: Redis, room_code: str) -> None:
-    await r.delete(_room_quiz_key(room_code))
-
-
 def questions_to_runtime(quiz_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Convert QuizOut.questions (camelCase) into runtime format (snake_case)
@@ -48,3 +49,33 @@ def questions_to_runtime(quiz_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
         )
     return runtime_questions
 
+
+def quiz_from_runtime(
+    questions: List[Dict[str, Any]],
+    base: Dict[str, Any] | None = None,
+    quiz_id: str | None = None,
+    title: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Build a QuizOut-shaped record from runtime questions, keeping the quiz
+    metadata of `base` (if any). Inverse of `questions_to_runtime`.
+    """
+    base = base or {}
+    return {
+        "id": quiz_id or base.get("id") or "",
+        "title": title or base.get("title") or "",
+        "description": base.get("description") or "",
+        "questions": [
+            {
+                "id": str(item.get("id")),
+                "questionText": item.get("question_text"),
+                "answers": item.get("answers", []),
+                "correctAnswer": item.get("correct_answer"),
+                "position": item.get("position"),
+            }
+            for item in questions
+        ],
+        "createdAt": base.get("createdAt") or "",
+        "updatedAt": base.get("updatedAt") or "",
+    }
+
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+from redis.asyncio import Redis
+
+OUTBOX_KEY = "quiz:outbox:sessions"
+PROCESSING_KEY = "quiz:outbox:sessions:processing"
+DEAD_LETTER_KEY = "quiz:outbox:sessions:dead"
+# zset worker_id -> мс, до якої діє оренда воркера на його список "в обробці"
+WORKERS_KEY = "quiz:outbox:sessions:workers"
+
+# Прибирає воркера з реєстру, лише якщо він не продовжив оренду
+# (ARGV[2] - момент, на який оренду визнано сплилою)
+RELEASE_WORKER = """
+local expires = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if expires and tonumber(expires) <= tonumber(ARGV[2]) then
+  redis.call('ZREM', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+# список snapshot-ів завершених сесій -> збереження у БД одним запитом
+PersistBatch = Callable[[list[dict]], Awaitable[None]]
+
+
+def outbox_entry(snapshot_json: str, attempts: int = 0) -> str:
+    """Запис черги: лічильник спроб + snapshot без повторної серіалізації"""
+    return f'{{"attempts":{attempts},"snapshot":{snapshot_json}}}'
+
+
+def processing_key(worker_id: str) -> str:
+    return f"{PROCESSING_KEY}:{worker_id}"
+
+
+class SessionOutbox:
+    """
+    Write-behind збереження завершених сесій у Supabase.
+
+    Кінець сесії коштує один запис у Redis-список (enqueue у тому ж
+    pipeline, що й архів сесії). Фоновий воркер забирає записи пачками
+    через LMOVE у власний список "в обробці", зберігає пачку одним
+    insert-ом і лише після успіху видаляє її з обробки. Пачка, що впала,
+    розбирається поштучно: невдалі записи повертаються в чергу з
+    лічильником спроб, а після max_attempts переносяться в dead-letter.
+
+    Кожен воркер тримає оренду (WORKERS_KEY) і продовжує її, поки живий.
+    Список "в обробці" воркера, чия оренда сплила (процес упав), інші
+    воркери повертають у чергу; повтор безпечний, бо вставка ігнорує вже
+    збережені id.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 50,
+        max_attempts: int = 8,
+        retry_base_ms: int = 500,
+        retry_max_ms: int = 60_000,
+        poll_timeout: float = 1.0,
+        lease_ms: int = 30_000,
+        worker_id: str | None = None,
+    ) -> None:
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_ms = retry_base_ms
+        self.retry_max_ms = retry_max_ms
+        self.poll_timeout = poll_timeout
+        self.lease_ms = lease_ms
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self.processing_key = processing_key(self.worker_id)
+        self._redis_factory: Callable[[], Awaitable[Redis]] | None = None
+        self._persist: PersistBatch | None = None
+        self._loop_task: asyncio.Task | None = None
+        self._lease_task: asyncio.Task | None = None
+        self._stopping = False
+
+    @staticmethod
+    def enqueue(pipe, snapshot_json: str) -> None:
+        """Додає snapshot у чергу; викликається в pipeline кінця сесії"""
+        pipe.lpush(OUTBOX_KEY, outbox_entry(snapshot_json))
+
+    async def depth(self, r: Redis) -> dict[str, int]:
+        workers = await r.zrange(WORKERS_KEY, 0, -1)
+        pipe = r.pipeline(transaction=False)
+        pipe.llen(OUTBOX_KEY)
+        pipe.llen(DEAD_LETTER_KEY)
+        for worker_id in workers:
+            pipe.llen(processing_key(worker_id))
+        pending, dead, *processing = await pipe.execute()
+        return {"pending": pending, "processing": sum(processing), "dead": dead}
+
+    def start(self, redis_factory: Callable[[], Awaitable[Redis]], persist: PersistBatch) -> None:
+        self._redis_factory = redis_factory
+        self._persist = persist
+        self._stopping = False
+        if self._loop_task is None or self._loop_task.done():
+            self._lease_task = asyncio.create_task(self._keep_lease())
+            self._loop_task = asyncio.create_task(self._run())
+            print(f"[outbox] Воркер збереження сесій {self.worker_id} запущено")
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            # прапорець - на випадок, якщо скасування поглине блокуючий BLMOVE;
+            # тоді цикл завершиться після poll_timeout
+            self._stopping = True
+            for task in (self._loop_task, self._lease_task):
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+            self._loop_task = None
+            self._lease_task = None
+            # незавершена пачка лишається в обробці: знімаємо оренду, щоб
+            # інші воркери (або наступний старт) одразу повернули її в чергу
+            try:
+                r = await self._redis_factory()
+                await r.zadd(WORKERS_KEY, {self.worker_id: 0})
+            except Exception as e:
+                print(f"[outbox] Не вдалося зняти оренду воркера: {e}")
+
+    async def recover(self, r: Redis) -> int:
+        """Повертає в чергу записи воркерів, чия оренда сплила"""
+        now_ms = int(time.time() * 1000)
+        moved = 0
+        for worker_id in await r.zrangebyscore(WORKERS_KEY, "-inf", now_ms):
+            if worker_id == self.worker_id:
+                continue
+            # LMOVE атомарний - два воркери, що відновлюють один список, не дублюють записи
+            while await r.lmove(processing_key(worker_id), OUTBOX_KEY, "RIGHT", "RIGHT") is not None:
+                moved += 1
+            # воркер міг ожити й продовжити оренду, поки ми переносили записи
+            await r.eval(RELEASE_WORKER, 1, WORKERS_KEY, worker_id, now_ms)
+        if moved:
+            print(f"[outbox] Повернуто в чергу {moved} незбережених сесій")
+        return moved
+
+    async def _renew_lease(self, r: Redis) -> None:
+        await r.zadd(WORKERS_KEY, {self.worker_id: int(time.time() * 1000) + self.lease_ms})
+        await self.recover(r)
+
+    async def _keep_lease(self) -> None:
+        """Продовжує оренду цього воркера і підбирає списки мертвих"""
+        while not self._stopping:
+            await asyncio.sleep(self.lease_ms / 3000.0)
+            try:
+                await self._renew_lease(await self._redis_factory())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[outbox] Не вдалося продовжити оренду: {e}")
+
+    async def _run(self) -> None:
+        failures = 0
+        leased = False
+        while not self._stopping:
+            try:
+                r = await self._redis_factory()
+                if not leased:
+                    # список "в обробці" з'являється в реєстрі до першого LMOVE
+                    await self._renew_lease(r)
+                    leased = True
+                entries = await self._claim(r)
+                if not entries:
+                    continue
+                if await self._flush(r, entries):
+                    failures = 0
+                else:
+                    failures += 1
+                    await asyncio.sleep(self._backoff(failures))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[outbox] Помилка воркера: {e}")
+                failures += 1
+                await asyncio.sleep(self._backoff(failures))
+
+    def _backoff(self, failures: int) -> float:
+        delay = min(self.retry_base_ms * 2 ** (failures - 1), self.retry_max_ms)
+        # jitter, щоб воркери різних процесів не били в БД синхронно
+        return delay * random.uniform(0.5, 1.0) / 1000.0
+
+    async def _claim(self, r: Redis) -> list[str]:
+        first = await r.blmove(OUTBOX_KEY, self.processing_key, self.poll_timeout, "RIGHT", "LEFT")
+        if first is None:
+            return []
+        entries = [first]
+        if self.batch_size > 1:
+            pipe = r.pipeline(transaction=False)
+            for _ in range(self.batch_size - 1):
+                pipe.lmove(OUTBOX_KEY, self.processing_key, "RIGHT", "LEFT")
+            entries.extend(raw for raw in await pipe.execute() if raw is not None)
+        return entries
+
+    async def _flush(self, r: Redis, entries: list[str]) -> bool:
+        parsed: list[tuple[str, dict[str, Any]]] = []
+        for raw in entries:
+            try:
+                parsed.append((raw, json.loads(raw)))
+            except ValueError as e:
+                await self._dead_letter(r, raw, {"snapshot": raw}, f"invalid entry: {e}")
+
+        if not parsed:
+            return True
+        try:
+            await self._persist([entry["snapshot"] for _, entry in parsed])
+            await self._ack(r, [raw for raw, _ in parsed])
+            return True
+        except Exception as e:
+            print(f"[outbox] Не вдалося зберегти пачку з {len(parsed)} сесій: {e}")
+            if len(parsed) == 1:
+                raw, entry = parsed[0]
+                await self._retry(r, raw, entry, e)
+                return False
+
+        # поштучно: один зіпсований запис не блокує решту пачки
+        ok = True
+        for raw, entry in parsed:
+            try:
+                await self._persist([entry["snapshot"]])
+                await self._ack(r, [raw])
+            except Exception as e:
+                ok = False
+                await self._retry(r, raw, entry, e)
+        return ok
+
+    async def _ack(self, r: Redis, raws: list[str]) -> None:
+        pipe = r.pipeline(transaction=False)
+        for raw in raws:
+            pipe.lrem(self.processing_key, 1, raw)
+        await pipe.execute()
+
+    async def _retry(self, r: Redis, raw: str, entry: dict[str, Any], error: Exception) -> None:
+        attempts = int(entry.get("attempts", 0)) + 1
+        if attempts >= self.max_attempts:
+            await self._dead_letter(r, raw, {**entry, "attempts": attempts}, str(error))
+            return
+        pipe = r.pipeline(transaction=True)
+        pipe.lrem(self.processing_key, 1, raw)
+        pipe.lpush(OUTBOX_KEY, json.dumps({"attempts": attempts, "snapshot": entry["snapshot"]}))
+        await pipe.execute()
+
+    async def _dead_letter(self, r: Redis, raw: str, entry: dict[str, Any], error: str) -> None:
+        session_id = entry["snapshot"].get("sessionId") if isinstance(entry["snapshot"], dict) else None
+        print(f"[outbox] Сесію {session_id} перенесено в dead-letter: {error}")
+        pipe = r.pipeline(transaction=True)
+        pipe.lrem(self.processing_key, 1, raw)
+        pipe.lpush(DEAD_LETTER_KEY, json.dumps({**entry, "error": error}))
+        await pipe.execute()
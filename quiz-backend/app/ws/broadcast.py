@@ -0,0 +1,133 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from redis.asyncio import Redis
+
+from app.ws.encoding import Frame, JSON
+
+CHANNEL_PREFIX = "quiz:events:"
+
+# (room, frame, exclude_id) -> локальна доставка на цьому вузлі
+DeliverFn = Callable[[str, Frame, Optional[str]], Awaitable[None]]
+
+
+class LocalBroadcast:
+    """
+    Розсилка в межах одного процесу.
+
+    Підходить лише для одного воркера: події доставляються тільки тим
+    з'єднанням, які тримає цей процес.
+    """
+
+    # стан кімнат змінюється лише цим процесом
+    shared = False
+
+    def __init__(self) -> None:
+        self._deliver: DeliverFn | None = None
+
+    def bind(self, deliver: DeliverFn) -> None:
+        self._deliver = deliver
+
+    async def subscribe(self, room: str) -> None:
+        pass
+
+    async def unsubscribe(self, room: str) -> None:
+        pass
+
+    async def publish(self, room: str, frame: Frame, exclude_id: Optional[str] = None) -> None:
+        if self._deliver is not None:
+            await self._deliver(room, frame, exclude_id)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisBroadcast:
+    """
+    Розсилка між воркерами/подами через Redis pub/sub.
+
+    Кожна кімната має власний канал. Вузол підписується на канал кімнати,
+    поки тримає хоча б одне її з'єднання, і доставляє отримані події
+    локально. Публікуючий вузол отримує власну подію так само, тому
+    доставка завжди йде одним шляхом.
+    """
+
+    # стан кімнат можуть змінювати інші вузли
+    shared = True
+
+    def __init__(self, redis_factory: Callable[[], Awaitable[Redis]]) -> None:
+        self._redis_factory = redis_factory
+        self._deliver: DeliverFn | None = None
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    def bind(self, deliver: DeliverFn) -> None:
+        self._deliver = deliver
+
+    @staticmethod
+    def channel(room: str) -> str:
+        return f"{CHANNEL_PREFIX}{room}"
+
+    async def subscribe(self, room: str) -> None:
+        async with self._lock:
+            if self._pubsub is None:
+                r = await self._redis_factory()
+                self._pubsub = r.pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.subscribe(self.channel(room))
+            # get_message потребує активного з'єднання, тому слухача
+            # запускаємо лише після першої підписки
+            if self._listener is None or self._listener.done():
+                self._listener = asyncio.create_task(self._listen())
+        print(f"[broadcast] Підписка на канал кімнати {room}")
+
+    async def unsubscribe(self, room: str) -> None:
+        async with self._lock:
+            if self._pubsub is not None:
+                await self._pubsub.unsubscribe(self.channel(room))
+        print(f"[broadcast] Відписка від каналу кімнати {room}")
+
+    async def publish(self, room: str, frame: Frame, exclude_id: Optional[str] = None) -> None:
+        r = await self._redis_factory()
+        # формат: "<type>\n<exclude_id>\n<JSON-кадр>"; JSON не містить сирих переносів рядка.
+        # Події з номером публікує скрипт APPEND_EVENT у тому ж форматі.
+        # Між вузлами кадр завжди йде як JSON, тож JSON-клієнти отримують ці ж байти
+        data = frame.encode(JSON)
+        await r.publish(self.channel(room), f"{frame.type}\n{exclude_id or ''}\n{data}")
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is None or message.get("type") != "message":
+                    continue
+                room = message["channel"][len(CHANNEL_PREFIX):]
+                frame_type, exclude_id, data = message["data"].split("\n", 2)
+                if self._deliver is not None:
+                    await self._deliver(room, Frame.from_json(data, frame_type), exclude_id or None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[broadcast] Помилка слухача pub/sub: {e}")
+                await asyncio.sleep(1.0)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+
+def make_broadcast(kind: str, redis_factory: Callable[[], Awaitable[Redis]]):
+    """Створює бекенд розсилки за назвою з налаштувань (local | redis)"""
+    if kind == "redis":
+        return RedisBroadcast(redis_factory)
+    return LocalBroadcast()
@@ -0,0 +1,265 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+
+from fastapi.websockets import WebSocket, WebSocketDisconnect
+
+from app.ws.encoding import JSON, Encoded, Frame
+
+# маркер завершення: writer відправляє все, що стоїть у черзі перед ним, і виходить
+_CLOSE = object()
+
+# кадри, з яких важливий лише останній: новий замінює ще не відправлений старий
+COLLAPSIBLE_FRAMES = {"state_sync", "scoreboard_updated", "answer_progress", "player_rank"}
+
+# кадри, які відкидаються, поки клієнт не встигає читати: лише ті, що
+# наступний кадр повністю замінює (players_joined несе тільки нові
+# підключення - без нього хост назавжди втратив би цих гравців)
+DROPPABLE_FRAMES = {"answer_progress"}
+
+
+class BackpressureStats:
+    """Лічильники спрацювань політик backpressure (на процес)"""
+
+    def __init__(self) -> None:
+        self.collapsed = 0
+        self.dropped = 0
+        self.evicted = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {"collapsed": self.collapsed, "dropped": self.dropped, "evicted": self.evicted}
+
+
+stats = BackpressureStats()
+
+
+class ClientConnection:
+    """
+    WebSocket-з'єднання з власною обмеженою чергою вихідних кадрів
+    і окремою задачею-писачем.
+
+    broadcast лише кладе готовий кадр у чергу і одразу повертається,
+    тому повільний клієнт не затримує доставку решті кімнати.
+
+    Політики для клієнта, що не встигає читати:
+      - кадр з COLLAPSIBLE_FRAMES замінює ще не відправлений кадр того ж типу;
+      - поки в черзі не менше soft_limit кадрів, кадри з DROPPABLE_FRAMES
+        відкидаються;
+      - клієнт, що тримається над soft_limit довше slow_timeout секунд
+        або досяг max_queue, відключається.
+
+    Після hold() і до start() кадри розсилки кімнати (deliver) відкладаються
+    окремо від персональних, щоб клієнт, який догоняє пропущені події,
+    отримав їх раніше за нові.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        max_queue: int,
+        encoder=JSON,
+        role: str | None = None,
+        soft_limit: int | None = None,
+        slow_timeout: float = 5.0,
+    ) -> None:
+        self.ws = ws
+        self.id = uuid.uuid4().hex
+        self.role = role
+        # заповнюється після ідентифікації гравця
+        self.player_id: str | None = None
+        # протокол клієнта: json (текстові кадри) або msgpack (бінарні)
+        self.encoder = encoder
+        self.max_queue = max_queue
+        self.soft_limit = soft_limit if soft_limit is not None else max(max_queue // 2, 1)
+        self.slow_timeout = slow_timeout
+        # записи [тип, кадр]; кадр замінених записів - None
+        self._queue: deque = deque()
+        self._pending = 0
+        self._ready = asyncio.Event()
+        # тип -> ще не відправлений запис кадру, який можна замінити
+        self._latest: dict[str, list] = {}
+        self._over_since: float | None = None
+        self.closed = False
+        self._writer: asyncio.Task | None = None
+        # кадри розсилки, відкладені до start() (None - не відкладаються)
+        self._held: list[Frame] | None = None
+
+    def hold(self) -> None:
+        """Відкладає кадри розсилки кімнати до виклику start()"""
+        if self._writer is None:
+            self._held = []
+
+    def start(self, after_seq: int | None = None) -> None:
+        """
+        Запускає задачу-писача для цього з'єднання (повторний виклик нічого не робить).
+        Відкладені кадри розсилки ставляться в чергу після вже поставлених;
+        кадри з номером не більше after_seq клієнт уже отримав - вони відкидаються.
+        """
+        held, self._held = self._held, None
+        for frame in held or ():
+            seq = frame.seq if after_seq is not None else None
+            if seq is not None and seq <= after_seq:
+                continue
+            if not self.enqueue(frame.encode(self.encoder), frame.type):
+                break
+        if self._writer is None and not self.closed:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    def deliver(self, frame: Frame) -> bool:
+        """Ставить у чергу кадр розсилки кімнати (або відкладає його, див. hold)"""
+        if self._held is None:
+            return self.enqueue(frame.encode(self.encoder), frame.type)
+        if self.closed:
+            return False
+        if len(self._held) >= self.max_queue:
+            print(f"Черга відправки переповнена ({self.max_queue}), відключаємо клієнта")
+            self._held = None
+            self._evict()
+            return False
+        self._held.append(frame)
+        return True
+
+    @property
+    def pending(self) -> int:
+        """Кількість кадрів, що чекають на відправку"""
+        return self._pending
+
+    def enqueue(self, frame: Encoded, type: str | None = None) -> bool:
+        """
+        Ставить кадр у чергу без очікування.
+
+        Повертає False, якщо з'єднання закрите або клієнта відключено
+        як повільного. Відкинутий некритичний кадр не є помилкою.
+        """
+        if self.closed:
+            return False
+
+        superseded = self._latest.pop(type, None) if type in COLLAPSIBLE_FRAMES else None
+        if superseded is not None:
+            superseded[1] = None
+            self._pending -= 1
+            stats.collapsed += 1
+
+        if self._pending >= self.soft_limit:
+            now = time.monotonic()
+            if self._over_since is None:
+                self._over_since = now
+            elif now - self._over_since > self.slow_timeout:
+                print(
+                    f"Клієнт не читає довше {self.slow_timeout}s "
+                    f"({self._pending} кадрів у черзі), відключаємо"
+                )
+                self._evict()
+                return False
+            if type in DROPPABLE_FRAMES:
+                stats.dropped += 1
+                return True
+
+        if self._pending >= self.max_queue:
+            print(
+                f"Черга відправки переповнена ({self.max_queue}), "
+                f"відключаємо повільного клієнта"
+            )
+            self._evict()
+            return False
+
+        entry = [type, frame]
+        self._queue.append(entry)
+        self._pending += 1
+        if type in COLLAPSIBLE_FRAMES:
+            self._latest[type] = entry
+        self._ready.set()
+        return True
+
+    def _evict(self) -> None:
+        stats.evicted += 1
+        self.abort()
+
+    async def _next(self):
+        while not self._queue:
+            self._ready.clear()
+            await self._ready.wait()
+        entry = self._queue.popleft()
+        if entry is _CLOSE:
+            return _CLOSE
+        type, frame = entry
+        if frame is not None:
+            self._pending -= 1
+            if self._latest.get(type) is entry:
+                del self._latest[type]
+            if self._pending < self.soft_limit:
+                self._over_since = None
+        return frame
+
+    async def _write_loop(self) -> None:
+        try:
+            while True:
+                frame = await self._next()
+                if frame is _CLOSE:
+                    break
+                if frame is None:
+                    # замінений новішим кадром того ж типу
+                    continue
+                if isinstance(frame, bytes):
+                    await self.ws.send_bytes(frame)
+                else:
+                    await self.ws.send_text(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f" Помилка відправки: {str(e)}")
+        finally:
+            self.closed = True
+
+    async def receive_raw(self) -> Encoded:
+        """Отримує наступний кадр клієнта без декодування"""
+        message = await self.ws.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        raw = message.get("bytes")
+        if raw is None:
+            raw = message.get("text")
+        return raw
+
+    async def receive(self) -> dict:
+        """Отримує і декодує наступне повідомлення клієнта у його протоколі"""
+        return self.encoder.decode(await self.receive_raw())
+
+    def abort(self, code: int = 1013) -> None:
+        """Негайно зупиняє відправку і закриває сокет (без дочитування черги)"""
+        self.closed = True
+        if self._writer is not None:
+            self._writer.cancel()
+        asyncio.create_task(self._close_socket(code))
+
+    async def close(self, code: int = 1000, timeout: float = 5.0) -> None:
+        """Дочікується відправки вже поставлених кадрів і закриває сокет"""
+        # кадри з'єднання, відправка якого ще не почалась, теж доставляються
+        self.start()
+        if not self.closed and self._writer is not None:
+            self._queue.append(_CLOSE)
+            self._ready.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._writer), timeout)
+            except asyncio.TimeoutError:
+                self._writer.cancel()
+        self.closed = True
+        await self._close_socket(code)
+
+    async def stop(self) -> None:
+        """Зупиняє задачу-писача (з'єднання вже розірване)"""
+        self.closed = True
+        if self._writer is not None and not self._writer.done():
+            self._writer.cancel()
+            try:
+                await self._writer
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await self.ws.close(code=code)
+        except Exception:
+            # сокет вже закритий іншою стороною
+            pass
@@ -0,0 +1,92 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi.websockets import WebSocket
+from pydantic import BaseModel, ValidationError
+
+from app.ws.encoding import Encoded
+from app.ws.schemas import CLIENT_EVENT_ADAPTER
+
+
+class EventContext:
+    """Дані з'єднання, з якими викликається обробник події"""
+
+    __slots__ = ("websocket", "r", "roomCode", "role", "session_key", "player_id", "player_name")
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        r: Any,
+        roomCode: str,
+        role: str,
+        session_key: str,
+        player_id: str | None = None,
+        player_name: str | None = None,
+    ) -> None:
+        self.websocket = websocket
+        self.r = r
+        self.roomCode = roomCode
+        self.role = role
+        self.session_key = session_key
+        self.player_id = player_id
+        self.player_name = player_name
+
+
+# (контекст, провалідована подія) -> обробка
+EventHandler = Callable[[EventContext, Any], Awaitable[None]]
+
+
+class UnknownEvent(Exception):
+    """Тип події не входить до EventPayload"""
+
+
+class ForbiddenEvent(Exception):
+    """Подію надіслало з'єднання з роллю, якій вона не дозволена"""
+
+
+class EventDispatcher:
+    """
+    Маршрутизація подій клієнта через таблицю обробників.
+
+    Подія валідується одним заздалегідь скомпільованим TypeAdapter
+    дискримінованого union-а (по полю type) прямо з сирого тексту кадру,
+    а обробник береться зі словника за типом. Новий тип події - це
+    модель в EventPayload і обробник, зареєстрований через on().
+    Обробник, зареєстрований з role, викликається лише для з'єднань
+    з цією роллю (команди host:* - тільки для хоста).
+    """
+
+    def __init__(self, adapter=CLIENT_EVENT_ADAPTER) -> None:
+        self._adapter = adapter
+        self._handlers: Dict[str, EventHandler] = {}
+        self._roles: Dict[str, str] = {}
+
+    def on(self, event_type: str, role: str | None = None) -> Callable[[EventHandler], EventHandler]:
+        def register(handler: EventHandler) -> EventHandler:
+            self._handlers[event_type] = handler
+            if role is not None:
+                self._roles[event_type] = role
+            return handler
+
+        return register
+
+    def parse(self, raw: Encoded, encoder) -> BaseModel:
+        """Валідує кадр клієнта у його протоколі; UnknownEvent для невідомого type"""
+        try:
+            if encoder.binary:
+                return self._adapter.validate_python(encoder.decode(raw))
+            return self._adapter.validate_json(raw)
+        except ValidationError as e:
+            errors = e.errors()
+            if errors and errors[0]["type"] in ("union_tag_invalid", "union_tag_not_found"):
+                data = errors[0].get("input")
+                raise UnknownEvent(data.get("type") if isinstance(data, dict) else None) from None
+            raise
+
+    async def dispatch(self, ctx: EventContext, evt: BaseModel) -> None:
+        handler = self._handlers.get(evt.type)
+        if handler is None:
+            raise UnknownEvent(evt.type)
+        role = self._roles.get(evt.type)
+        if role is not None and ctx.role != role:
+            raise ForbiddenEvent(evt.type)
+        await handler(ctx, evt)
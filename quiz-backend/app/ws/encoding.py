@@ -0,0 +1,125 @@
+import json
+from typing import Any, Union
+
+from pydantic import BaseModel
+
+# orjson і msgpack — необов'язкові залежності: без orjson працюємо на
+# стандартному json, без msgpack бінарний протокол просто недоступний
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+Message = Union[dict, BaseModel]
+Encoded = Union[str, bytes]
+
+
+class JsonEncoder:
+    """Текстовий JSON-протокол (за замовчуванням)"""
+
+    name = "json"
+    binary = False
+
+    def encode(self, message: Message) -> str:
+        if isinstance(message, BaseModel):
+            return message.model_dump_json()
+        if orjson is not None:
+            return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+        return json.dumps(message)
+
+    def decode(self, raw: Encoded) -> dict:
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
+
+
+class MsgpackEncoder:
+    """Компактний бінарний протокол MessagePack (вмикається ?protocol=msgpack)"""
+
+    name = "msgpack"
+    binary = True
+
+    def encode(self, message: Message) -> bytes:
+        if isinstance(message, BaseModel):
+            message = message.model_dump(mode="json")
+        return msgpack.packb(message, use_bin_type=True)
+
+    def decode(self, raw: Encoded) -> dict:
+        if isinstance(raw, str):
+            return JSON.decode(raw)
+        return msgpack.unpackb(raw, raw=False)
+
+
+JSON = JsonEncoder()
+
+ENCODERS: dict[str, Any] = {"json": JSON}
+if msgpack is not None:
+    ENCODERS["msgpack"] = MsgpackEncoder()
+
+
+def get_encoder(protocol: str):
+    """Повертає енкодер за назвою протоколу або None, якщо він недоступний"""
+    return ENCODERS.get(protocol)
+
+
+class Frame:
+    """
+    Вихідне повідомлення, яке серіалізується ліниво і не більше одного
+    разу для кожного протоколу. Одні й ті самі байти повторно
+    використовуються для всіх отримувачів.
+    """
+
+    __slots__ = ("type", "_message", "_encoded")
+
+    def __init__(self, message: Message | None = None, type: str | None = None) -> None:
+        self._message = message
+        self._encoded: dict[str, Encoded] = {}
+        if type is None and message is not None:
+            type = (
+                getattr(message, "type", None)
+                if isinstance(message, BaseModel)
+                else message.get("type")
+            )
+        self.type = type or "unknown"
+
+    @classmethod
+    def from_json(cls, data: str, type: str | None = None) -> "Frame":
+        """Кадр з уже серіалізованого JSON (наприклад, отриманого через pub/sub)"""
+        frame = cls(None, type)
+        frame._encoded[JSON.name] = data
+        return frame
+
+    @property
+    def message(self) -> Message:
+        if self._message is None:
+            self._message = JSON.decode(self._encoded[JSON.name])
+        return self._message
+
+    @property
+    def seq(self) -> int | None:
+        """Номер події кімнати (None - подія без номера)"""
+        message = self.message
+        if isinstance(message, BaseModel):
+            return getattr(message, "seq", None)
+        return message.get("seq")
+
+    def json_without(self, field: str) -> str:
+        """JSON кадру без поля верхнього рівня (наприклад, щоб задати його заново)"""
+        message = self.message
+        if isinstance(message, BaseModel):
+            return message.model_dump_json(exclude={field})
+        if field not in message:
+            return self.encode(JSON)
+        return JSON.encode({k: v for k, v in message.items() if k != field})
+
+    def encode(self, encoder=JSON) -> Encoded:
+        data = self._encoded.get(encoder.name)
+        if data is None:
+            data = encoder.encode(self.message)
+            self._encoded[encoder.name] = data
+        return data
@@ -0,0 +1,188 @@
+"""
+Lua-скрипти для атомарних операцій над станом кімнати в Redis.
+
+Кожен скрипт виконується на сервері Redis за один round trip
+(EVALSHA з автоматичним EVAL при першому виклику).
+
+Стан кімнати - hash, кожне поле якого містить JSON-значення
+(рядок у лапках, число або null), тож скрипти читають лише потрібні поля.
+"""
+
+# Прийом відповіді гравця.
+# KEYS[1] - стан кімнати (hash), KEYS[2] - hash відповідей на питання,
+# KEYS[3] - hash лічильників варіантів, KEYS[4] - set гравців, що обрали варіант
+# ARGV: qidx, player_id, option_index, now_ms, ttl_seconds, default_option_count
+# Повертає: 1 - прийнято, 0 - питання неактивне, -1 - час вийшов,
+#           -2 - гравець вже відповідав, -3 - інше питання, -4 - немає такого варіанту
+SUBMIT_ANSWER = """
+local state = redis.call('HMGET', KEYS[1], 'phase', 'questionIndex', 'startedAt', 'durationMs', 'optionCount')
+if not state[1] or cjson.decode(state[1]) ~= 'QUESTION_ACTIVE' then
+  return 0
+end
+if tonumber(state[2]) ~= tonumber(ARGV[1]) then
+  return -3
+end
+local started = tonumber(state[3])
+local duration = tonumber(state[4]) or 0
+if not started or tonumber(ARGV[4]) > started + duration then
+  return -1
+end
+local option = tonumber(ARGV[3])
+local options = tonumber(state[5]) or tonumber(ARGV[6])
+if not option or option < 0 or option >= options or option % 1 ~= 0 then
+  return -4
+end
+if redis.call('HSETNX', KEYS[2], ARGV[2], ARGV[3]) == 0 then
+  return -2
+end
+redis.call('HINCRBY', KEYS[3], ARGV[3], 1)
+redis.call('SADD', KEYS[4], ARGV[2])
+for i = 2, 4 do
+  redis.call('EXPIRE', KEYS[i], ARGV[5])
+end
+return 1
+"""
+
+# Розкриття питання: нарахування балів і перехід у фазу REVEAL.
+# Розподіл уже підрахований лічильниками при прийомі відповідей, а бали
+# нараховуються лише гравцям з set правильного варіанту - всі відповіді
+# не перебираються. Перевірка фази і перехід в одному скрипті гарантують,
+# що питання оцінюється рівно один раз (авто-розкриття і хост, кілька вузлів).
+# KEYS[1] - hash лічильників варіантів, KEYS[2] - set гравців з правильною
+# відповіддю, KEYS[3] - zset балів кімнати, KEYS[4] - стан кімнати (hash),
+# KEYS[5] - версія стану
+# ARGV: points, ttl_seconds, qidx
+# Повертає: {-1} якщо питання вже розкрите або неактивне, інакше
+#           {correct_count, total, version, option1, count1, ...}
+REVEAL_ANSWER = """
+local state = redis.call('HMGET', KEYS[4], 'phase', 'questionIndex')
+if not state[1] or cjson.decode(state[1]) ~= 'QUESTION_ACTIVE'
+    or tonumber(state[2]) ~= tonumber(ARGV[3]) then
+  return {-1}
+end
+redis.call('HSET', KEYS[4], 'phase', cjson.encode('REVEAL'))
+local version = redis.call('INCR', KEYS[5])
+
+local correct = redis.call('SMEMBERS', KEYS[2])
+for i = 1, #correct do
+  redis.call('ZINCRBY', KEYS[3], ARGV[1], correct[i])
+end
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+local counts = redis.call('HGETALL', KEYS[1])
+local out = {#correct, 0, version}
+for i = 1, #counts, 2 do
+  out[2] = out[2] + tonumber(counts[i + 1])
+  out[#out + 1] = counts[i]
+  out[#out + 1] = counts[i + 1]
+end
+return out
+"""
+
+# Атомарне оновлення полів стану кімнати з підняттям версії.
+# Записуються лише змінені поля; TTL задається, лише якщо стану ще не було.
+# KEYS[1] - стан кімнати (hash), KEYS[2] - версія стану
+# ARGV: ttl_seconds, field1, value1 (JSON), field2, value2, ...
+# Повертає: нову версію стану
+SET_STATE = """
+local existed = redis.call('EXISTS', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+if existed == 0 then
+  redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+local version = redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return version
+"""
+
+# Реєстрація гравця з підтриманням таблиці лідерів.
+# KEYS[1] - hash гравців, KEYS[2] - індекс ім'я -> playerId, KEYS[3] - zset балів,
+# KEYS[4] - список записів таблиці лідерів (JSON), KEYS[5] - версія таблиці
+# ARGV: player_id, name, entry (JSON з нульовим балом), ttl_seconds
+# Новий гравець додається в кінець таблиці (0 балів - найменший бал).
+# Повертає: 1 - новий гравець, 0 - гравець вже був у кімнаті
+JOIN_PLAYER = """
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[1])
+local added = redis.call('ZADD', KEYS[3], 'NX', 0, ARGV[1])
+if added == 1 then
+  redis.call('RPUSH', KEYS[4], ARGV[3])
+  redis.call('INCR', KEYS[5])
+end
+for i = 1, #KEYS do
+  redis.call('EXPIRE', KEYS[i], ARGV[4])
+end
+return added
+"""
+
+# Перебудова таблиці лідерів після зміни балів.
+# KEYS[1] - hash гравців, KEYS[2] - zset балів,
+# KEYS[3] - список записів таблиці лідерів (JSON), KEYS[4] - версія таблиці
+# ARGV: ttl_seconds
+# Повертає: нову версію таблиці
+REBUILD_SCOREBOARD = """
+local players = redis.call('HGETALL', KEYS[1])
+local names = {}
+for i = 1, #players, 2 do
+  names[players[i]] = players[i + 1]
+  redis.call('ZADD', KEYS[2], 'NX', 0, players[i])
+end
+local ranked = redis.call('ZREVRANGE', KEYS[2], 0, -1, 'WITHSCORES')
+redis.call('DEL', KEYS[3])
+local batch = {}
+for i = 1, #ranked, 2 do
+  local name = names[ranked[i]]
+  if name then
+    batch[#batch + 1] = cjson.encode({
+      playerId = ranked[i], name = name, score = tonumber(ranked[i + 1])
+    })
+  end
+  if #batch == 1000 then
+    redis.call('RPUSH', KEYS[3], unpack(batch))
+    batch = {}
+  end
+end
+if #batch > 0 then
+  redis.call('RPUSH', KEYS[3], unpack(batch))
+end
+redis.call('EXPIRE', KEYS[3], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+local version = redis.call('INCR', KEYS[4])
+redis.call('EXPIRE', KEYS[4], ARGV[1])
+return version
+"""
+
+# Читання таблиці лідерів, якщо вона змінилась.
+# KEYS[1] - список записів таблиці лідерів (JSON), KEYS[2] - версія таблиці
+# ARGV: версія, яка вже є у викликача
+# Повертає: {version} якщо версія та сама, інакше {version, entry1, entry2, ...}
+SCOREBOARD_SNAPSHOT = """
+local version = tonumber(redis.call('GET', KEYS[2]) or '0')
+if version == tonumber(ARGV[1]) then
+  return {version}
+end
+local out = redis.call('LRANGE', KEYS[1], 0, -1)
+table.insert(out, 1, version)
+return out
+"""
+
+
+# Додає подію кімнати в журнал з наступним порядковим номером.
+# Номер дописується останнім полем JSON-кадру, тож кадр передається без поля seq.
+# Якщо задано канал, подія публікується тут же: номер і порядок публікації
+# визначає один атомарний крок, тож усі вузли отримують події за номерами.
+# KEYS[1] - лічильник подій кімнати, KEYS[2] - stream подій
+# ARGV: maxlen, ttl_seconds, тип події, кадр (JSON-об'єкт),
+#       канал pub/sub ('' - не публікувати), exclude_id
+# Повертає: {номер події, кадр з номером}
+APPEND_EVENT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+local data = string.sub(ARGV[4], 1, -2) .. ',"seq":' .. seq .. '}'
+redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[1], seq .. '-0', 'type', ARGV[3], 'data', data)
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+if ARGV[5] ~= '' then
+  -- формат повідомлення як у RedisBroadcast.publish
+  redis.call('PUBLISH', ARGV[5], ARGV[3] .. '\\n' .. ARGV[6] .. '\\n' .. data)
+end
+return {seq, data}
+"""
@@ -0,0 +1,140 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+# скільки відповідей максимум потрапляє в один пайплайн
+ANSWER_BATCH_SIZE = 500
+
+
+class _Call:
+    __slots__ = ("fn", "args", "future")
+
+    def __init__(self, fn: Callable[..., Awaitable[Any]], args: tuple, future: asyncio.Future) -> None:
+        self.fn = fn
+        self.args = args
+        self.future = future
+
+
+class _Answer:
+    __slots__ = ("payload", "future")
+
+    def __init__(self, payload: Any, future: asyncio.Future) -> None:
+        self.payload = payload
+        self.future = future
+
+
+# (список відповідей) -> список результатів у тому ж порядку
+FlushAnswers = Callable[[list], Awaitable[list]]
+
+
+class RoomActor:
+    """
+    Єдина задача, через яку проходять усі зміни стану однієї кімнати.
+
+    Команди хоста, відповіді гравців і події таймерів ставляться у вхідну
+    чергу і виконуються строго по черзі. Відповіді, що накопичились у черзі
+    підряд, записуються в Redis одним пайплайном. Після idle_timeout без
+    подій задача завершується і знімається з реєстру.
+    """
+
+    def __init__(
+        self,
+        room: str,
+        flush_answers: FlushAnswers,
+        on_idle: Callable[["RoomActor"], None] | None = None,
+        idle_timeout: float = 30.0,
+    ) -> None:
+        self.room = room
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self._flush_answers = flush_answers
+        self._on_idle = on_idle
+        self.idle_timeout = idle_timeout
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """Виконує fn(*args) в черзі кімнати і повертає результат"""
+        future = asyncio.get_running_loop().create_future()
+        self.inbox.put_nowait(_Call(fn, args, future))
+        return await future
+
+    async def submit_answer(self, payload: Any) -> Any:
+        """Ставить відповідь у чергу; відповіді підряд записуються пакетом"""
+        future = asyncio.get_running_loop().create_future()
+        self.inbox.put_nowait(_Answer(payload, future))
+        return await future
+
+    async def _run(self) -> None:
+        pending = None
+        while True:
+            if pending is not None:
+                item, pending = pending, None
+            else:
+                try:
+                    item = await asyncio.wait_for(self.inbox.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    # між перевіркою і зняттям з реєстру немає await,
+                    # тож нова подія не може загубитись
+                    if self.inbox.empty():
+                        if self._on_idle is not None:
+                            self._on_idle(self)
+                        return
+                    continue
+
+            if isinstance(item, _Call):
+                await self._run_call(item)
+                continue
+
+            batch = [item]
+            while len(batch) < ANSWER_BATCH_SIZE and not self.inbox.empty():
+                nxt = self.inbox.get_nowait()
+                if not isinstance(nxt, _Answer):
+                    # команда виконається після запису вже прийнятих відповідей
+                    pending = nxt
+                    break
+                batch.append(nxt)
+            await self._run_answers(batch)
+
+    async def _run_call(self, item: _Call) -> None:
+        try:
+            result = await item.fn(*item.args)
+        except asyncio.CancelledError:
+            item.future.cancel()
+            raise
+        except Exception as e:
+            if not item.future.done():
+                item.future.set_exception(e)
+            return
+        if not item.future.done():
+            item.future.set_result(result)
+
+    async def _run_answers(self, batch: list[_Answer]) -> None:
+        try:
+            results = await self._flush_answers([a.payload for a in batch])
+        except asyncio.CancelledError:
+            for a in batch:
+                a.future.cancel()
+            raise
+        except Exception as e:
+            print(f"[room_actor] Помилка запису відповідей для {self.room}: {e}")
+            for a in batch:
+                if not a.future.done():
+                    a.future.set_exception(e)
+            return
+        for a, result in zip(batch, results):
+            if not a.future.done():
+                a.future.set_result(result)
@@ -0,0 +1,141 @@
+from typing import Dict, Optional
+
+
+class CachedRoom:
+    __slots__ = (
+        "version",
+        "state",
+        "session_id",
+        "questions",
+        "question_frames",
+        "epoch",
+        "scoreboard_version",
+        "scoreboard",
+    )
+
+    def __init__(self) -> None:
+        self.version: int | None = None
+        self.state: dict | None = None
+        self.session_id: str | None = None
+        self.questions: list[dict] | None = None
+        self.question_frames: list | None = None
+        # лічильник змін і інвалідацій стану: читання з Redis, під час
+        # якого стан змінився, не потрапляє в кеш
+        self.epoch = 0
+        self.scoreboard_version = -1
+        self.scoreboard: list[dict] | None = None
+
+
+class RoomStateCache:
+    """
+    In-process кеш стану кімнати, її питань і таблиці лідерів.
+
+    Питання не змінюються протягом сесії, тому зберігаються до кінця сесії
+    (прив'язані до sessionId). Стан зберігається разом з версією з Redis;
+    запис на будь-якому вузлі збільшує версію і розсилає інвалідацію,
+    після якої інші вузли перечитують стан. Таблиця лідерів звіряється
+    з версією в Redis при кожному читанні.
+    """
+
+    def __init__(self) -> None:
+        self._rooms: Dict[str, CachedRoom] = {}
+
+    def _room(self, room: str) -> CachedRoom:
+        entry = self._rooms.get(room)
+        if entry is None:
+            entry = self._rooms[room] = CachedRoom()
+        return entry
+
+    def epoch(self, room: str) -> int:
+        return self._room(room).epoch
+
+    def get_state(self, room: str) -> Optional[dict]:
+        entry = self._rooms.get(room)
+        if entry is None or entry.state is None:
+            return None
+        return dict(entry.state)
+
+    def put_state(self, room: str, version: int, state: dict, epoch: int | None = None) -> None:
+        """
+        Кешує стан. epoch - значення epoch() на початку читання з Redis:
+        якщо відтоді стан змінювався, прочитане вже застаріло і не кешується.
+        Без epoch це запис нового стану цим вузлом.
+        """
+        entry = self._room(room)
+        if epoch is not None and epoch != entry.epoch:
+            return
+        if epoch is None:
+            entry.epoch += 1
+        entry.version = version
+        entry.state = dict(state)
+
+    def patch_state(self, room: str, version: int, patch: dict) -> None:
+        """
+        Застосовує патч до закешованого стану, якщо кеш був на попередній
+        версії; інакше скидає стан (його буде перечитано з Redis)
+        """
+        entry = self._rooms.get(room)
+        if entry is None:
+            return
+        # читання, що вже йде, могло отримати стан до цього запису
+        entry.epoch += 1
+        if entry.state is not None and entry.version == version - 1:
+            entry.state.update(patch)
+            entry.version = version
+        elif entry.version != version:
+            entry.version = None
+            entry.state = None
+
+    def invalidate_state(self, room: str, version: int) -> None:
+        """Скидає стан, якщо закешована версія відрізняється від нової"""
+        entry = self._rooms.get(room)
+        if entry is None:
+            return
+        entry.epoch += 1
+        if entry.version != version:
+            entry.version = None
+            entry.state = None
+        if version == 0:
+            # дані кімнати видалено - версія таблиці лідерів почнеться спочатку
+            entry.scoreboard_version = -1
+            entry.scoreboard = None
+
+    def get_questions(self, room: str, session_id: str | None) -> Optional[list[dict]]:
+        entry = self._rooms.get(room)
+        if entry is None or entry.questions is None or entry.session_id != session_id:
+            return None
+        return entry.questions
+
+    def put_questions(self, room: str, session_id: str | None, questions: list[dict]) -> None:
+        entry = self._room(room)
+        if entry.session_id != session_id:
+            entry.question_frames = None
+        entry.session_id = session_id
+        entry.questions = questions
+
+    def get_question_frames(self, room: str, session_id: str | None) -> Optional[list]:
+        entry = self._rooms.get(room)
+        if entry is None or entry.question_frames is None or entry.session_id != session_id:
+            return None
+        return entry.question_frames
+
+    def put_question_frames(self, room: str, session_id: str | None, frames: list) -> None:
+        entry = self._room(room)
+        if entry.session_id != session_id:
+            entry.questions = None
+        entry.session_id = session_id
+        entry.question_frames = frames
+
+    def get_scoreboard(self, room: str) -> tuple[int, list[dict] | None]:
+        entry = self._rooms.get(room)
+        if entry is None:
+            return -1, None
+        return entry.scoreboard_version, entry.scoreboard
+
+    def put_scoreboard(self, room: str, version: int, scoreboard: list[dict]) -> None:
+        entry = self._room(room)
+        entry.scoreboard_version = version
+        entry.scoreboard = scoreboard
+
+    def drop(self, room: str) -> None:
+        self._rooms.pop(room, None)
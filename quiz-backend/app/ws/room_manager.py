@@ -5,50 +5,289 @@ from typing import Dict, Set, Optional
 
 from fastapi.websockets import WebSocket
 from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+
+from app.ws.broadcast import LocalBroadcast
+from app.ws.connection import ClientConnection
+from app.ws.encoding import JSON, Frame, Message
+from app.ws.room_actor import RoomActor
+from app.ws.room_cache import RoomStateCache
+from app.ws.scheduler import TIMERS_KEY, DeadlineScheduler
+from app.ws import lua_scripts
+from app.services.room_quiz_cache import questions_to_runtime, room_quiz_key
 
 REDIS_PREFIX = "quiz:room:"
+ROOM_TTL = 6 * 60 * 60  # 6 годин
+CORRECT_ANSWER_POINTS = 100
+RANKS_GRACE_SECONDS = 60
+MIN_OPTIONS = 4  # для стількох варіантів завжди прибираються ключі відповідей
+
+# службова подія між вузлами: стан кімнати змінився (клієнтам не надсилається)
+STATE_CHANGED = "_state_changed"
+
+# тип дедлайну в планувальнику
+AUTO_REVEAL = "auto_reveal"
+
+# після цих подій кожен гравець отримує своє місце в таблиці лідерів
+RANKED_EVENTS = {"answer_revealed", "session_ended"}
+
+# події, які отримують лише хости кімнати
+HOST_EVENTS = {"answer_progress"}
+
+# часті службові події хоста не потрапляють у журнал подій кімнати
+UNSEQUENCED_EVENTS = HOST_EVENTS
+
+SUBMIT_REJECT_REASONS = {
+    0: "питання неактивне",
+    -1: "час вийшов",
+    -2: "гравець вже відповідав",
+    -3: "відповідь на інше питання",
+    -4: "немає такого варіанту відповіді",
+}
+
+
+def encode_state(state: dict) -> dict[str, str]:
+    """Поля стану для hash в Redis: кожне значення зберігається як JSON"""
+    return {field: json.dumps(value) for field, value in state.items()}
+
+
+def decode_state(raw: dict) -> dict:
+    return {field: json.loads(value) for field, value in raw.items()}
+
+
+def public_question(question: dict) -> dict:
+    """Питання, яке бачать гравці: без правильної відповіді"""
+    return {k: v for k, v in question.items() if k != "correct_answer"}
+
+
+def build_question_frames(questions: list[dict]) -> list[Frame]:
+    """
+    Кадри question_staged для кожного питання сесії. Серіалізуються одразу,
+    тож під час гри ті самі байти лише ставляться в черги клієнтів.
+    """
+    frames: list[Frame] = []
+    for qidx, question in enumerate(questions):
+        frame = Frame(
+            {
+                "type": "question_staged",
+                "questionIndex": qidx,
+                "question": public_question(question),
+            }
+        )
+        frame.encode(JSON)
+        frames.append(frame)
+    return frames
 
 
 class RoomManager:
-    def __init__(self) -> None:
-        self.connections: Dict[str, Set[WebSocket]] = {}
+    def __init__(
+        self,
+        send_queue_size: int = 256,
+        backend=None,
+        scheduler: DeadlineScheduler | None = None,
+        join_batch_ms: int = 100,
+        leaderboard_top_n: int = 10,
+        progress_interval_ms: int = 250,
+        send_soft_limit: int | None = None,
+        slow_consumer_timeout_ms: int = 5000,
+        event_log_size: int = 500,
+    ) -> None:
+        self.connections: Dict[str, Set[ClientConnection]] = {}
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        # обмеження вихідної черги кожного з'єднання (див. ClientConnection)
+        self.send_queue_size = send_queue_size
+        self.send_soft_limit = send_soft_limit
+        self.slow_consumer_timeout_ms = slow_consumer_timeout_ms
+        # бекенд розсилки: локальний (один воркер) або Redis pub/sub (кілька воркерів)
+        self.backend = backend if backend is not None else LocalBroadcast()
+        self.backend.bind(self._deliver_local)
+        self._scripts: Dict[str, AsyncScript] = {}
+        # кеш стану і питань кімнат, з'єднання яких тримає цей процес
+        self.cache = RoomStateCache()
+        # спільний для процесу планувальник дедлайнів (переживає рестарт)
+        self.scheduler = scheduler if scheduler is not None else DeadlineScheduler()
+        self.scheduler.register(AUTO_REVEAL, self._on_auto_reveal_deadline)
+        # підключення гравців, які ще не розіслані: room -> {player_id: name}
+        self.join_batch_ms = join_batch_ms
+        self._pending_joins: Dict[str, Dict[str, str]] = {}
+        self._join_flushers: Dict[str, asyncio.Task] = {}
+        # скільки записів таблиці лідерів отримує вся кімната
+        self.leaderboard_top_n = leaderboard_top_n
+        self._redis_factory = None
+        self._rank_tasks: Set[asyncio.Task] = set()
+        # не частіше одного answer_progress на кімнату за progress_interval_ms
+        self.progress_interval_ms = progress_interval_ms
+        self._progress_flushers: Dict[str, asyncio.Task] = {}
+        # одна задача-актор на активну кімнату: зміни кімнати йдуть по черзі
+        self._actors: Dict[str, RoomActor] = {}
+        # скільки останніх подій кімнати зберігається для догону після реконекту
+        self.event_log_size = event_log_size
+        # локальний бекенд: номер події і публікація йдуть під одним локом,
+        # щоб порядок збігався (Redis-бекенд публікує в скрипті журналу)
+        self._seq_locks: Dict[str, asyncio.Lock] = {}
+
+    def start(self, redis_factory) -> None:
+        """Запускає фонові цикли процесу (планувальник дедлайнів)"""
+        self._redis_factory = redis_factory
+        self.scheduler.start(redis_factory)
+
+    async def stop(self) -> None:
+        for task in [*self._join_flushers.values(), *self._progress_flushers.values()]:
+            task.cancel()
+        for actor in list(self._actors.values()):
+            await actor.stop()
+        self._actors.clear()
+        await self.scheduler.stop()
+        await self.backend.close()
+
+    # --- актор кімнати ---
+
+    def actor(self, room: str) -> RoomActor:
+        """Повертає (за потреби запускає) актор кімнати"""
+        actor = self._actors.get(room)
+        if actor is None or not actor.running:
+            actor = RoomActor(
+                room,
+                flush_answers=lambda batch: self._submit_answers(room, batch),
+                on_idle=self._actor_idle,
+            )
+            self._actors[room] = actor
+            actor.start()
+        return actor
+
+    def _actor_idle(self, actor: RoomActor) -> None:
+        if self._actors.get(actor.room) is actor:
+            del self._actors[actor.room]
+
+    async def in_room(self, room: str, fn, *args):
+        """Виконує зміну кімнати в черзі її актора"""
+        return await self.actor(room).call(fn, *args)
 
     # --- Redis ключі ---
 
     def k_state(self, room: str) -> str:
         return f"{REDIS_PREFIX}{room}:state"
 
-    def k_questions(self, room: str) -> str:
-        return f"{REDIS_PREFIX}{room}:questions"
+    def k_state_version(self, room: str) -> str:
+        return f"{REDIS_PREFIX}{room}:state_version"
+
+    def k_quiz(self, room: str) -> str:
+        return room_quiz_key(room)
 
     def k_answers(self, room: str, qidx: int) -> str:
         return f"{REDIS_PREFIX}{room}:answers:q{qidx}"
 
+    def k_answer_counts(self, room: str, qidx: int) -> str:
+        return f"{REDIS_PREFIX}{room}:answer_counts:q{qidx}"
+
+    def k_answer_option(self, room: str, qidx: int, option: int) -> str:
+        return f"{REDIS_PREFIX}{room}:answers:q{qidx}:opt{option}"
+
     def k_players(self, room: str) -> str:
         return f"{REDIS_PREFIX}{room}:players"
 
+    def k_player_names(self, room: str) -> str:
+        return f"{REDIS_PREFIX}{room}:player_names"
+
     def k_score(self, room: str) -> str:
         return f"{REDIS_PREFIX}{room}:score"
 
+    def k_scoreboard(self, room: str) -> str:
+        return f"{REDIS_PREFIX}{room}:scoreboard"
+
+    def k_scoreboard_version(self, room: str) -> str:
+        return f"{REDIS_PREFIX}{room}:scoreboard_version"
+
     def k_host_presence(self, room: str) -> str:
         return f"{REDIS_PREFIX}{room}:host_presence"
 
+    def k_seq(self, room: str) -> str:
+        return f"{REDIS_PREFIX}{room}:seq"
+
+    def k_events(self, room: str) -> str:
+        return f"{REDIS_PREFIX}{room}:events"
+
+    def k_question_answers(self, room: str, qidx: int, options: int = MIN_OPTIONS) -> list[str]:
+        """Усі ключі відповідей одного питання (hash, лічильники, set-и варіантів)"""
+        keys = [self.k_answers(room, qidx), self.k_answer_counts(room, qidx)]
+        keys += [self.k_answer_option(room, qidx, i) for i in range(max(options, MIN_OPTIONS))]
+        return keys
+
+    def room_keys(self, room: str, questions: list[dict]) -> list[str]:
+        """Усі ключі, якими володіє кімната (крім балів)"""
+        keys = [
+            self.k_state(room),
+            self.k_state_version(room),
+            self.k_quiz(room),
+            self.k_players(room),
+            self.k_player_names(room),
+            self.k_scoreboard(room),
+            self.k_scoreboard_version(room),
+            self.k_host_presence(room),
+            self.k_seq(room),
+            self.k_events(room),
+        ]
+        for qidx, question in enumerate(questions):
+            keys += self.k_question_answers(room, qidx, len(question.get("answers") or []))
+        return keys
+
+    def _script(self, r: Redis, name: str) -> AsyncScript:
+        """Повертає зареєстрований Lua-скрипт (SHA рахується один раз)"""
+        script = self._scripts.get(name)
+        if script is None:
+            script = r.register_script(getattr(lua_scripts, name.upper()))
+            self._scripts[name] = script
+        return script
+
     # --- підключення ---
 
-    async def register(self, room: str, ws: WebSocket) -> None:
-        """Реєструє WebSocket з'єднання в кімнаті"""
+    async def register(
+        self,
+        room: str,
+        ws: WebSocket,
+        encoder=JSON,
+        role: str | None = None,
+        start: bool = True,
+    ) -> ClientConnection:
+        """
+        Реєструє WebSocket з'єднання в кімнаті і запускає його чергу відправки.
+        З start=False відправка чекає на conn.start(after_seq), а кадри розсилки
+        кімнати відкладаються, щоб пропущені події або знімок стану клієнт
+        отримав раніше за них (див. ClientConnection.hold).
+        """
         await ws.accept()
-        self.connections.setdefault(room, set()).add(ws)
+        conn = ClientConnection(
+            ws,
+            self.send_queue_size,
+            encoder,
+            role,
+            soft_limit=self.send_soft_limit,
+            slow_timeout=self.slow_consumer_timeout_ms / 1000,
+        )
+        if start:
+            conn.start()
+        else:
+            conn.hold()
+        self.clients[ws] = conn
+        is_new_room = room not in self.connections
+        self.connections.setdefault(room, set()).add(conn)
+        if is_new_room:
+            await self.backend.subscribe(room)
         print(
             f"Зареєстровано з'єднання в кімнаті {room}. "
             f"Всього: {len(self.connections[room])}"
         )
+        return conn
 
     async def unregister(self, room: str, ws: WebSocket) -> None:
         """Видаляє WebSocket з'єднання з кімнати"""
         try:
+            conn = self.clients.pop(ws, None)
+            if conn is None:
+                return
+            await conn.stop()
             if room in self.connections:
-                self.connections[room].discard(ws)
+                self.connections[room].discard(conn)
                 print(
                     f"Видалено з'єднання з кімнати {room}. "
                     f"Залишилось: {len(self.connections[room])}"
@@ -56,54 +295,223 @@ class RoomManager:
                 # Видаляємо кімнату якщо порожня
                 if not self.connections[room]:
                     del self.connections[room]
+                    self._seq_locks.pop(room, None)
                     print(f"Кімната {room} видалена (немає з'єднань)")
+                    # без підписки інвалідації не приходять — кеш більше не актуальний
+                    self.cache.drop(room)
+                    await self.backend.unsubscribe(room)
+                    # за час відписки в кімнату могло зайти нове з'єднання
+                    if room in self.connections:
+                        await self.backend.subscribe(room)
         except Exception as e:
             print(f" Помилка при видаленні з'єднання: {str(e)}")
 
+    async def send_personal(self, ws: WebSocket, message: Message) -> None:
+        """Надсилає повідомлення одному клієнту через його чергу відправки"""
+        frame = message if isinstance(message, Frame) else Frame(message)
+        conn = self.clients.get(ws)
+        if conn is None:
+            await ws.send_text(frame.encode(JSON))
+            return
+        conn.enqueue(frame.encode(conn.encoder), frame.type)
+
+    async def close_connection(self, ws: WebSocket, code: int = 1000) -> None:
+        """Закриває з'єднання після відправки вже поставлених у чергу повідомлень"""
+        conn = self.clients.get(ws)
+        if conn is None:
+            await ws.close(code=code)
+            return
+        await conn.close(code)
+
     async def broadcast(
         self,
         room: str,
-        message: dict,
+        message: Message,
         exclude: Optional[WebSocket] = None,
     ) -> None:
         """
-        Розсилає повідомлення всім підключеним до кімнати.
+        Розсилає повідомлення всім підключеним до кімнати (на всіх вузлах).
+
+        Повідомлення серіалізується не більше одного разу для кожного
+        протоколу, і ці ж байти отримують усі клієнти з цим протоколом.
+        Події кімнати отримують порядковий номер seq і записуються в журнал
+        (Redis Stream), з якого клієнт після реконекту догоняє пропущене.
 
         Args:
             room: Код кімнати
-            message: Повідомлення
+            message: Повідомлення (dict, pydantic-модель або готовий Frame)
             exclude: WebSocket який треба виключити з розсилки (опціонально)
         """
+        frame = message if isinstance(message, Frame) else Frame(message)
+        print(f"Broadcast до {room}: {frame.type}")
+
+        exclude_id = None
+        if exclude is not None and exclude in self.clients:
+            exclude_id = self.clients[exclude].id
+
+        if self._redis_factory is None or frame.type in UNSEQUENCED_EVENTS:
+            await self.backend.publish(room, frame, exclude_id)
+            return
+
+        if self.backend.shared:
+            # кілька вузлів: номер і публікація - один крок скрипта, інакше
+            # подія з меншим номером могла б дійти до клієнтів пізніше
+            try:
+                await self._append_event(room, frame, self.backend.channel(room), exclude_id)
+            except Exception as e:
+                print(f"[events] Не вдалося записати подію {frame.type} для {room}: {e}")
+                await self.backend.publish(room, frame, exclude_id)
+            return
+
+        lock = self._seq_locks.get(room)
+        if lock is None:
+            lock = self._seq_locks[room] = asyncio.Lock()
+        async with lock:
+            try:
+                frame = await self._append_event(room, frame)
+            except Exception as e:
+                print(f"[events] Не вдалося записати подію {frame.type} для {room}: {e}")
+            await self.backend.publish(room, frame, exclude_id)
+
+    async def _append_event(
+        self,
+        room: str,
+        frame: Frame,
+        channel: str = "",
+        exclude_id: Optional[str] = None,
+    ) -> Frame:
+        """
+        Записує подію в журнал кімнати і повертає кадр з її номером.
+        З channel скрипт також публікує кадр у pub/sub канал кімнати.
+        """
+        r = await self._redis_factory()
+        # номер задає скрипт; поле seq самого повідомлення (напр. seq=None
+        # у моделі) не потрапляє в кадр, щоб ключ не дублювався
+        _, data = await self._script(r, "append_event")(
+            keys=[self.k_seq(room), self.k_events(room)],
+            args=[self.event_log_size, ROOM_TTL, frame.type, frame.json_without("seq"), channel, exclude_id or ""],
+            client=r,
+        )
+        # той самий запис, що зробив скрипт
+        return Frame.from_json(data, frame.type)
+
+    async def current_seq(self, r: Redis, room: str) -> int:
+        """Номер останньої події кімнати"""
+        return int(await r.get(self.k_seq(room)) or 0)
+
+    async def replay(
+        self,
+        r: Redis,
+        room: str,
+        last_seq: int,
+        role: str | None = None,
+    ) -> tuple[int, list[Frame]] | None:
+        """
+        Пропущені клієнтом події після last_seq і номер останньої з них.
+        Повертає None, якщо журнал уже не містить усіх пропущених подій
+        (клієнт відстав надто сильно) - тоді потрібен повний state_sync.
+        """
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.get(self.k_seq(room))
+            pipe.xrange(self.k_events(room), min=f"{last_seq + 1}-0", max="+", count=self.event_log_size)
+            seq, entries = await pipe.execute()
+
+        current = int(seq or 0)
+        if last_seq < 0 or last_seq > current or current - last_seq > self.event_log_size:
+            return None
+        if current > last_seq and (not entries or entries[0][0] != f"{last_seq + 1}-0"):
+            # початок пропущеного вже обрізаний з журналу
+            return None
+
+        frames: list[Frame] = []
+        for _, fields in entries:
+            if fields["type"] in HOST_EVENTS and role != "host":
+                continue
+            frames.append(Frame.from_json(fields["data"], fields["type"]))
+        return current, frames
+
+    def announce_join(self, room: str, player_id: str, player_name: str) -> None:
+        """
+        Ставить підключення гравця в чергу на розсилку.
+
+        Підключення збираються протягом join_batch_ms і розсилаються одним
+        кадром players_joined, тож хвиля з N підключень дає обмежену
+        кількість кадрів замість N розсилок на всю кімнату.
+        """
+        self._pending_joins.setdefault(room, {})[player_id] = player_name
+        if room not in self._join_flushers:
+            self._join_flushers[room] = asyncio.create_task(self._flush_joins(room))
+
+    async def _flush_joins(self, room: str) -> None:
+        try:
+            await asyncio.sleep(self.join_batch_ms / 1000.0)
+        finally:
+            # нові підключення після цього моменту відкриють наступне вікно
+            self._join_flushers.pop(room, None)
+            pending = self._pending_joins.pop(room, None)
+        if not pending:
+            return
+        try:
+            await self.broadcast(
+                room,
+                {
+                    "type": "players_joined",
+                    "roomCode": room,
+                    "players": [
+                        {"playerId": pid, "name": name} for pid, name in pending.items()
+                    ],
+                },
+            )
+        except Exception as e:
+            print(f"[players_joined] Помилка розсилки для {room}: {e}")
+
+    async def _deliver_local(
+        self,
+        room: str,
+        frame: Frame,
+        exclude_id: Optional[str] = None,
+    ) -> None:
+        """
+        Ставить готовий кадр у черги всіх локальних з'єднань кімнати.
+        Фактична відправка відбувається в задачах-писачах, тому повільний
+        клієнт не затримує інших.
+        """
+        if frame.type == STATE_CHANGED:
+            self.cache.invalidate_state(room, frame.message["version"])
+            return
+
         if room not in self.connections:
             print(f"Кімната {room} не існує для broadcast")
             return
 
         connections = self.connections[room]
-        message_type = message.get("type", "unknown")
-        print(f"Broadcast до {room}: {message_type} ({len(connections)} з'єднань)")
-
-        data = json.dumps(message)
         disconnected: list[WebSocket] = []
-        sent_count = 0
+        queued_count = 0
 
-        for ws in list(connections):
-            # Пропускаємо виключений WebSocket
-            if exclude is not None and ws == exclude:
-                print("Пропускаємо excluded websocket")
+        host_only = frame.type in HOST_EVENTS
+        for conn in list(connections):
+            # Пропускаємо виключене з'єднання
+            if exclude_id is not None and conn.id == exclude_id:
                 continue
-            try:
-                await ws.send_text(data)
-                sent_count += 1
-            except Exception as e:
-                print(f" Помилка відправки: {str(e)}")
-                disconnected.append(ws)
+            if host_only and conn.role != "host":
+                continue
+            if conn.deliver(frame):
+                queued_count += 1
+            else:
+                disconnected.append(conn.ws)
 
-        print(f" Надіслано {sent_count} з {len(connections)} з'єднань")
+        print(f" Поставлено в чергу {queued_count} з {len(connections)} з'єднань")
 
         # Видаляємо відключені з'єднання
         for ws in disconnected:
             await self.unregister(room, ws)
 
+        if frame.type in RANKED_EVENTS:
+            # кожен вузол надсилає персональні місця своїм гравцям
+            task = asyncio.create_task(self._send_player_ranks(room))
+            self._rank_tasks.add(task)
+            task.add_done_callback(self._rank_tasks.discard)
+
     # --- стан сесії ---
 
     async def create_session(
@@ -113,12 +521,17 @@ class RoomManager:
         questions: list[dict],
         session_id: str,
         created_at_ms: int,
+        quiz: dict | None = None,
+        extra: dict[str, str] | None = None,
     ) -> None:
-        """Створює нову сесію вікторини"""
-        # зберігаємо список питань один раз
-        await r.set(self.k_questions(room), json.dumps(questions))
+        """
+        Створює нову сесію вікторини. Усі записи (запис квізу, стан, версія,
+        скидання балів, знімок таблиці лідерів і додаткові ключі з extra)
+        виконуються однією транзакцією за один round trip.
 
-        # початковий стан
+        Питання зберігаються лише в канонічному записі квізу кімнати;
+        quiz=None означає, що запис уже є і його треба лише продовжити.
+        """
         state = {
             "phase": "LOBBY",
             "questionIndex": -1,
@@ -126,15 +539,42 @@ class RoomManager:
             "durationMs": None,
             "sessionId": session_id,
             "createdAt": created_at_ms,
+            # питання, кадр якого клієнти вже отримали наперед
+            "stagedQuestion": -1,
         }
-        await r.set(self.k_state(room), json.dumps(state))
-
-        # скидаємо службові структури
-        await r.delete(self.k_score(room))
+        async with r.pipeline(transaction=True) as pipe:
+            # TTL на кімнату: 6 годин
+            if quiz is not None:
+                pipe.set(self.k_quiz(room), json.dumps(quiz), ex=ROOM_TTL)
+            else:
+                pipe.expire(self.k_quiz(room), ROOM_TTL)
+            pipe.unlink(self.k_state(room))
+            pipe.hset(self.k_state(room), mapping=encode_state(state))
+            pipe.expire(self.k_state(room), ROOM_TTL)
+            pipe.incr(self.k_state_version(room))
+            pipe.expire(self.k_state_version(room), ROOM_TTL)
+            # скидаємо бали і перебудовуємо таблицю лідерів
+            # (гравці, які вже в кімнаті, залишаються в ній з нульовим балом)
+            pipe.unlink(self.k_score(room))
+            await self._script(r, "rebuild_scoreboard")(
+                keys=[
+                    self.k_players(room),
+                    self.k_score(room),
+                    self.k_scoreboard(room),
+                    self.k_scoreboard_version(room),
+                ],
+                args=[ROOM_TTL],
+                client=pipe,
+            )
+            for key, value in (extra or {}).items():
+                pipe.set(key, value)
+            results = await pipe.execute()
+        version = int(results[4])
 
-        # TTL на кімнату: 6 годин
-        await r.expire(self.k_questions(room), 6 * 60 * 60)
-        await r.expire(self.k_state(room), 6 * 60 * 60)
+        if room in self.connections:
+            self.cache.put_questions(room, session_id, questions)
+            self.cache.put_question_frames(room, session_id, build_question_frames(questions))
+        await self._state_changed(room, version, state)
 
         print(
             f"Створено сесію для кімнати {room} з {len(questions)} питаннями "
@@ -142,37 +582,112 @@ class RoomManager:
         )
 
     async def load_questions(self, r: Redis, room: str) -> list[dict]:
-        """Завантажує питання сесії з Redis"""
-        raw = await r.get(self.k_questions(room))
-        return json.loads(raw) if raw else []
+        """
+        Завантажує питання сесії. Питання не змінюються протягом сесії,
+        тому після першого читання беруться з in-process кешу.
+        """
+        state = await self.get_state(r, room)
+        session_id = state.get("sessionId")
+        cached = self.cache.get_questions(room, session_id)
+        if cached is not None:
+            return cached
+
+        raw = await r.get(self.k_quiz(room))
+        questions = questions_to_runtime(json.loads(raw)) if raw else []
+        if raw and room in self.connections:
+            self.cache.put_questions(room, session_id, questions)
+        return questions
+
+    async def question_frames(self, r: Redis, room: str) -> list[Frame]:
+        """Готові кадри question_staged питань сесії (з in-process кешу)"""
+        state = await self.get_state(r, room)
+        session_id = state.get("sessionId")
+        frames = self.cache.get_question_frames(room, session_id)
+        if frames is not None:
+            return frames
+
+        frames = build_question_frames(await self.load_questions(r, room))
+        if room in self.connections:
+            self.cache.put_question_frames(room, session_id, frames)
+        return frames
+
+    async def stage_question(self, r: Redis, room: str, qidx: int) -> bool:
+        """
+        Наперед розсилає кадр питання qidx (поки триває лобі або показ
+        відповіді), щоб старт питання був лише коротким сигналом
+        """
+        frames = await self.question_frames(r, room)
+        if not 0 <= qidx < len(frames):
+            return False
+        await self.set_state(r, room, stagedQuestion=qidx)
+        await self.broadcast(room, frames[qidx])
+        return True
 
     async def get_state(self, r: Redis, room: str) -> dict:
-        """Отримує поточний стан сесії"""
-        raw = await r.get(self.k_state(room))
-        return json.loads(raw) if raw else {}
-
-    async def set_state(self, r: Redis, room: str, **patch: object) -> dict:
-        """Оновлює стан сесії"""
-        cur = await self.get_state(r, room)
-        cur.update(patch)
-        await r.set(self.k_state(room), json.dumps(cur))
-        return cur
-
-    async def _auto_reveal_after_timeout(
+        """Отримує поточний стан сесії (з in-process кешу, якщо він актуальний)"""
+        cached = self.cache.get_state(room)
+        if cached is not None:
+            return cached
+
+        # кешуємо лише кімнати з локальними з'єднаннями: тільки на них
+        # цей вузол отримує інвалідації
+        epoch = self.cache.epoch(room) if room in self.connections else None
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self.k_state(room))
+            pipe.get(self.k_state_version(room))
+            raw, version = await pipe.execute()
+
+        state = decode_state(raw)
+        if raw and epoch is not None:
+            self.cache.put_state(room, int(version or 0), state, epoch)
+        return state
+
+    async def set_state(self, r: Redis, room: str, **patch: object) -> int:
+        """
+        Оновлює стан сесії: записує лише змінені поля (один HSET) і піднімає
+        версію атомарно на сервері Redis. Повертає нову версію стану.
+        """
+        fields: list[str] = []
+        for field, value in encode_state(patch).items():
+            fields += [field, value]
+        version = await self._script(r, "set_state")(
+            keys=[self.k_state(room), self.k_state_version(room)],
+            args=[ROOM_TTL, *fields],
+            client=r,
+        )
+        version = int(version)
+        await self._state_changed(room, version, patch=patch)
+        return version
+
+    async def _state_changed(
         self,
-        r: Redis,
         room: str,
-        qidx: int,
-        duration_ms: int,
+        version: int,
+        state: dict | None = None,
+        epoch: int | None = None,
+        patch: dict | None = None,
     ) -> None:
         """
-        Внутрішній таймер: після закінчення часу питання
-        автоматично розкриває відповідь, якщо хост цього ще не зробив.
+        Оновлює локальний кеш (повним станом або патчем) і повідомляє
+        інші вузли про нову версію стану
         """
-        try:
-            # чекаємо тривалість питання
-            await asyncio.sleep(duration_ms / 1000.0)
+        if room in self.connections:
+            if state is not None:
+                self.cache.put_state(room, version, state, epoch)
+            elif patch is not None:
+                self.cache.patch_state(room, version, patch)
+        if self.backend.shared:
+            await self.backend.publish(room, Frame({"type": STATE_CHANGED, "version": version}))
+
+    async def _on_auto_reveal_deadline(self, r: Redis, room: str, arg: str) -> None:
+        """
+        Дедлайн питання: після закінчення часу автоматично
+        розкриває відповідь, якщо хост цього ще не зробив.
+        """
+        await self.in_room(room, self._auto_reveal, r, room, int(arg))
 
+    async def _auto_reveal(self, r: Redis, room: str, qidx: int) -> None:
+        try:
             state = await self.get_state(r, room)
             current_phase = state.get("phase")
             current_qidx = state.get("questionIndex")
@@ -198,10 +713,12 @@ class RoomManager:
             )
 
             msg = await self.reveal_answer(r, room, qidx)
-            sb = await self.scoreboard(r, room)
-            msg["scoreboard"] = sb
+            if msg is None:
+                return
+            msg.update(await self.leaderboard(r, room))
 
             await self.broadcast(room, msg)
+            await self.stage_question(r, room, qidx + 1)
 
         except Exception as e:
             print(f"[auto_reveal] Помилка: {e}")
@@ -216,9 +733,21 @@ class RoomManager:
         """
         Запускає питання, оновлює стан, очищає відповіді
         і планує авто-показ правильної відповіді після закінчення таймера.
+
+        Якщо кадр питання вже розіслано наперед (stage_question), подія
+        старту містить лише номер питання і час; інакше - і саме питання
+        (без правильної відповіді).
         """
         now_ms = int(time.time() * 1000)
 
+        state = await self.get_state(r, room)
+        frames = await self.question_frames(r, room)
+        question = frames[qidx].message["question"] if 0 <= qidx < len(frames) else None
+
+        # очистити відповіді й лічильники цього питання до його активації
+        options = len(question["answers"]) if question else 0
+        await r.unlink(*self.k_question_answers(room, qidx, options))
+
         await self.set_state(
             r,
             room,
@@ -226,29 +755,26 @@ class RoomManager:
             questionIndex=qidx,
             startedAt=now_ms,
             durationMs=duration_ms,
+            # межа для optionIndex: інакше клієнт міг би створювати ключі
+            # відповідей для довільних варіантів
+            optionCount=options,
         )
 
-        # очистити відповіді для цього питання
-        await r.delete(self.k_answers(room, qidx))
-
-        # подія клієнтам
-        questions = await self.load_questions(r, room)
-        question = questions[qidx] if 0 <= qidx < len(questions) else None
-
         print(f"Запущено питання {qidx} на {duration_ms}ms")
 
-        # плануємо авто-розкриття відповіді
-        asyncio.create_task(
-            self._auto_reveal_after_timeout(r, room, qidx, duration_ms)
-        )
+        # плануємо авто-розкриття відповіді (дедлайн зберігається в Redis)
+        await self.scheduler.schedule(r, AUTO_REVEAL, room, qidx, now_ms + duration_ms)
 
-        return {
+        # подія клієнтам
+        msg = {
             "type": "question_started",
             "questionIndex": qidx,
             "startedAt": now_ms,
             "durationMs": duration_ms,
-            "question": question,
         }
+        if state.get("stagedQuestion") != qidx:
+            msg["question"] = question
+        return msg
 
     async def submit_answer(
         self,
@@ -258,68 +784,124 @@ class RoomManager:
         player_id: str,
         option_index: int,
     ) -> bool:
-        """Зберігає відповідь гравця"""
-        state = await self.get_state(r, room)
-
-        # Перевірка фази
-        if state.get("phase") != "QUESTION_ACTIVE":
-            print(
-                f"Відповідь відхилена: питання неактивне "
-                f"(phase={state.get('phase')})"
-            )
-            return False
+        """
+        Зберігає відповідь гравця.
 
-        # Перевірка часу
-        started = state.get("startedAt")
-        dur = state.get("durationMs", 0)
+        Перевірка фази й дедлайну, відсікання повторних відповідей, запис
+        і оновлення лічильників варіантів виконуються одним Lua-скриптом
+        без гонки при подвійному натисканні. Відповіді проходять через
+        актор кімнати: ті, що надійшли одночасно, записуються одним пайплайном.
+        """
+        # час фіксуємо при отриманні, а не при записі пакета
         now_ms = int(time.time() * 1000)
+        return await self.actor(room).submit_answer(
+            (r, qidx, player_id, option_index, now_ms)
+        )
 
-        if started is None or now_ms > started + dur:
-            print("Відповідь відхилена: час вийшов")
-            return False
-
-        # зберігаємо першу відповідь гравця; повторні ігноруємо
-        key = self.k_answers(room, qidx)
-        exists = await r.hexists(key, player_id)
-        if exists:
-            print("Відповідь відхилена: гравець вже відповідав")
-            return False
-
-        await r.hset(key, mapping={player_id: str(option_index)})
-        await r.expire(key, 6 * 60 * 60)
-
-        print(f"Збережено відповідь: player={player_id[:8]}, option={option_index}")
+    async def _submit_answers(self, room: str, batch: list[tuple]) -> list[bool]:
+        """Записує пакет відповідей кімнати одним пайплайном"""
+        r = batch[0][0]
+        script = self._script(r, "submit_answer")
+        async with r.pipeline(transaction=False) as pipe:
+            for _, qidx, player_id, option_index, now_ms in batch:
+                await script(
+                    keys=[
+                        self.k_state(room),
+                        self.k_answers(room, qidx),
+                        self.k_answer_counts(room, qidx),
+                        self.k_answer_option(room, qidx, option_index),
+                    ],
+                    args=[qidx, player_id, option_index, now_ms, ROOM_TTL, MIN_OPTIONS],
+                    client=pipe,
+                )
+            results = await pipe.execute()
+
+        accepted: list[bool] = []
+        for (_, qidx, player_id, option_index, _), result in zip(batch, results):
+            result = int(result)
+            if result == 1:
+                print(f"Збережено відповідь: player={player_id[:8]}, option={option_index}")
+                self._schedule_progress(r, room, qidx)
+            else:
+                print(f"Відповідь відхилена: {SUBMIT_REJECT_REASONS.get(result, result)}")
+            accepted.append(result == 1)
+        if len(batch) > 1:
+            print(f"Записано пакет з {len(batch)} відповідей для {room}")
+        return accepted
+
+    def _schedule_progress(self, r: Redis, room: str, qidx: int) -> None:
+        """
+        Планує answer_progress для хоста. Відповіді, що прийшли протягом
+        progress_interval_ms, потрапляють в один кадр.
+        """
+        if room not in self._progress_flushers:
+            self._progress_flushers[room] = asyncio.create_task(
+                self._flush_progress(r, room, qidx)
+            )
 
-        return True
+    async def _flush_progress(self, r: Redis, room: str, qidx: int) -> None:
+        try:
+            await asyncio.sleep(self.progress_interval_ms / 1000.0)
+        finally:
+            self._progress_flushers.pop(room, None)
+        try:
+            counts = await r.hgetall(self.k_answer_counts(room, qidx))
+            distribution = {0: 0, 1: 0, 2: 0, 3: 0}
+            for option, n in counts.items():
+                distribution[int(option)] = int(n)
+            await self.broadcast(
+                room,
+                {
+                    "type": "answer_progress",
+                    "questionIndex": qidx,
+                    "answered": sum(distribution.values()),
+                    "distribution": distribution,
+                },
+            )
+        except Exception as e:
+            print(f"[answer_progress] Помилка для {room}: {e}")
 
-    async def reveal_answer(self, r: Redis, room: str, qidx: int) -> dict:
-        """Розкриває правильну відповідь та рахує бали"""
+    async def reveal_answer(self, r: Redis, room: str, qidx: int) -> dict | None:
+        """
+        Розкриває правильну відповідь та рахує бали.
+        Повертає None, якщо питання вже розкрите або неактивне.
+        """
         # рахуємо результати для питання
         questions = await self.load_questions(r, room)
         question = questions[qidx]
         correct_idx = int(question["correct_answer"])
 
-        answers = await r.hgetall(self.k_answers(room, qidx))
-
-        # оновлюємо скорборд
-        correct_count = 0
-        for player_id, opt in answers.items():
-            if int(opt) == correct_idx:
-                await r.zincrby(self.k_score(room), 100, player_id)
-                correct_count += 1
+        # розподіл уже підрахований при прийомі відповідей, а бали
+        # нараховуються на сервері Redis лише правильним відповідям;
+        # той самий скрипт атомарно переводить кімнату в REVEAL
+        result = await self._script(r, "reveal_answer")(
+            keys=[
+                self.k_answer_counts(room, qidx),
+                self.k_answer_option(room, qidx, correct_idx),
+                self.k_score(room),
+                self.k_state(room),
+                self.k_state_version(room),
+            ],
+            args=[CORRECT_ANSWER_POINTS, ROOM_TTL, qidx],
+            client=r,
+        )
+        if int(result[0]) < 0:
+            print(f"Питання {qidx} в кімнаті {room} вже розкрите або неактивне")
+            return None
+        correct_count, total = int(result[0]), int(result[1])
 
-        await r.expire(self.k_score(room), 6 * 60 * 60)
-        await self.set_state(r, room, phase="REVEAL")
+        # бали змінюються лише тут - перебудовуємо знімок таблиці лідерів
+        await self.rebuild_scoreboard(r, room)
+        await self._state_changed(room, int(result[2]), patch={"phase": "REVEAL"})
 
         # агрегат для фронта
         counts: dict[str, int] = {"0": 0, "1": 0, "2": 0, "3": 0}
-        for opt in answers.values():
-            key = str(opt)
-            counts[key] = counts.get(key, 0) + 1
+        for i in range(3, len(result), 2):
+            counts[str(result[i])] = int(result[i + 1])
 
         print(
             f"Розкрито відповідь {qidx}: правильна={correct_idx}, "
-            f"правильних відповідей={correct_count}/{len(answers)}"
+            f"правильних відповідей={correct_count}/{total}"
         )
 
         return {
@@ -329,45 +911,154 @@ class RoomManager:
             "distribution": {int(k): v for k, v in counts.items()},
         }
 
-    async def scoreboard(self, r: Redis, room: str) -> list[dict]:
-        """Повертає таблицю лідерів"""
-        # Отримуємо всіх гравців (навіть з 0 балами)
-        all_players = await r.hgetall(self.k_players(room))
-
-        # Отримуємо гравців з балами
-        players_with_scores = await r.zrevrange(
-            self.k_score(room),
-            0,
-            -1,
-            withscores=True,
+    async def save_player(self, r: Redis, room: str, player_id: str, player_name: str) -> None:
+        """
+        Зберігає гравця разом зі зворотним індексом ім'я -> playerId.
+        Новий гравець одразу додається в таблицю лідерів з нульовим балом.
+        """
+        entry = JSON.encode({"playerId": player_id, "name": player_name, "score": 0})
+        await self._script(r, "join_player")(
+            keys=[
+                self.k_players(room),
+                self.k_player_names(room),
+                self.k_score(room),
+                self.k_scoreboard(room),
+                self.k_scoreboard_version(room),
+            ],
+            args=[player_id, player_name, entry, ROOM_TTL],
+            client=r,
         )
 
-        # Створюємо словник балів
-        scores_dict = {pid: int(score) for pid, score in players_with_scores}
+    async def find_player_by_name(self, r: Redis, room: str, name: str) -> Optional[str]:
+        """Повертає playerId гравця з таким ім'ям (один HGET замість перебору)"""
+        return await r.hget(self.k_player_names(room), name)
+
+    async def rebuild_scoreboard(self, r: Redis, room: str) -> int:
+        """Перебудовує знімок таблиці лідерів в Redis і повертає його нову версію"""
+        version = await self._script(r, "rebuild_scoreboard")(
+            keys=[
+                self.k_players(room),
+                self.k_score(room),
+                self.k_scoreboard(room),
+                self.k_scoreboard_version(room),
+            ],
+            args=[ROOM_TTL],
+            client=r,
+        )
+        return int(version)
 
-        # Формуємо результат для всіх гравців
-        result: list[dict] = []
-        for player_id, player_name in all_players.items():
-            result.append(
-                {
-                    "playerId": player_id,
-                    "name": player_name,
-                    "score": scores_dict.get(player_id, 0),
-                }
-            )
+    async def scoreboard(self, r: Redis, room: str) -> list[dict]:
+        """
+        Повертає таблицю лідерів, відсортовану за балами.
+
+        Знімок підтримується в Redis (перебудовується при зміні балів,
+        доповнюється при підключенні), а тут лише звіряється версія:
+        якщо вона не змінилась, використовується вже розібраний список.
+        Список спільний для всіх викликачів - його не можна змінювати.
+        """
+        cached_version, cached = self.cache.get_scoreboard(room)
+        result = await self._script(r, "scoreboard_snapshot")(
+            keys=[self.k_scoreboard(room), self.k_scoreboard_version(room)],
+            args=[cached_version if cached is not None else -1],
+            client=r,
+        )
+        version = int(result[0])
+        if cached is not None and version == cached_version:
+            return cached
 
-        # Сортуємо за балами (від більшого до меншого)
-        result.sort(key=lambda x: x["score"], reverse=True)
+        scoreboard = [JSON.decode(raw) for raw in result[1:]]
+        if room in self.connections:
+            self.cache.put_scoreboard(room, version, scoreboard)
+        print(f"Scoreboard для {room}: {len(scoreboard)} гравців (версія {version})")
+        return scoreboard
 
-        print(f"Scoreboard для {room}: {len(result)} гравців")
-        for p in result:
-            print(f" - {p['name']}: {p['score']} балів")
+    async def leaderboard(self, r: Redis, room: str) -> dict:
+        """
+        Частина таблиці лідерів для розсилки всій кімнаті: лише перші
+        leaderboard_top_n записів і загальна кількість гравців. Своє місце
+        кожен гравець отримує окремим кадром player_rank.
+        """
+        scoreboard = await self.scoreboard(r, room)
+        return {
+            "scoreboard": scoreboard[: self.leaderboard_top_n],
+            "totalPlayers": len(scoreboard),
+        }
+
+    async def scoreboard_page(self, r: Redis, room: str, offset: int, limit: int) -> dict:
+        """Сторінка повної таблиці лідерів (для хоста)"""
+        scoreboard = await self.scoreboard(r, room)
+        return {
+            "type": "scoreboard_page",
+            "offset": offset,
+            "totalPlayers": len(scoreboard),
+            "scoreboard": scoreboard[offset : offset + limit],
+        }
 
-        return result
+    async def player_ranks(self, r: Redis, room: str, player_ids: list[str]) -> Dict[str, dict]:
+        """
+        Місце і бали кожного з гравців. Місце береться з ZREVRANK
+        (O(log n) на гравця), усі запити йдуть одним пайплайном.
+        """
+        if not player_ids:
+            return {}
+        async with r.pipeline(transaction=False) as pipe:
+            for player_id in player_ids:
+                pipe.zrevrank(self.k_score(room), player_id)
+                pipe.zscore(self.k_score(room), player_id)
+            pipe.zcard(self.k_score(room))
+            result = await pipe.execute()
+
+        total = int(result[-1])
+        ranks: Dict[str, dict] = {}
+        for i, player_id in enumerate(player_ids):
+            rank, score = result[2 * i], result[2 * i + 1]
+            if rank is None:
+                continue
+            ranks[player_id] = {
+                "type": "player_rank",
+                "rank": int(rank) + 1,
+                "score": int(score or 0),
+                "totalPlayers": total,
+            }
+        return ranks
+
+    async def _send_player_ranks(self, room: str) -> None:
+        """Надсилає місце в таблиці лідерів гравцям кімнати на цьому вузлі"""
+        if self._redis_factory is None:
+            return
+        players = [c for c in self.connections.get(room, ()) if c.player_id]
+        if not players:
+            return
+        try:
+            r = await self._redis_factory()
+            ranks = await self.player_ranks(r, room, [c.player_id for c in players])
+        except Exception as e:
+            print(f"[player_rank] Помилка для {room}: {e}")
+            return
+        for conn in players:
+            rank = ranks.get(conn.player_id)
+            if rank is not None:
+                conn.enqueue(conn.encoder.encode(rank), "player_rank")
 
-    async def cleanup_room_data(self, r: Redis, room: str) -> None:
-        """Очищує службові дані кімнати після завершення вікторини"""
-        await r.delete(self.k_state(room))
-        await r.delete(self.k_questions(room))
-        await r.delete(self.k_score(room))
-        await r.delete(self.k_players(room))
+    async def cleanup_room_data(self, r: Redis, room: str, extra_keys: list[str] | None = None) -> None:
+        """
+        Очищує всі дані кімнати після завершення вікторини (разом з ключами
+        відповідей кожного питання і дедлайнами авто-розкриття) одною
+        транзакцією з неблокуючим UNLINK
+        """
+        questions = await self.load_questions(r, room)
+        timers = [self.scheduler.member(AUTO_REVEAL, room, qidx) for qidx in range(len(questions))]
+        for member in timers:
+            self.scheduler.wheel.remove(member)
+
+        async with r.pipeline(transaction=True) as pipe:
+            pipe.unlink(*self.room_keys(room, questions), *(extra_keys or []))
+            # бали живуть ще хвилину: вузли, які отримали session_ended пізніше,
+            # ще мають звідки взяти місця гравців
+            pipe.expire(self.k_score(room), RANKS_GRACE_SECONDS)
+            if timers:
+                pipe.zrem(TIMERS_KEY, *timers)
+            await pipe.execute()
+        self.cache.drop(room)
+        if self.backend.shared:
+            await self.backend.publish(room, Frame({"type": STATE_CHANGED, "version": 0}))
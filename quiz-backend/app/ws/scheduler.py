@@ -0,0 +1,253 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from redis.asyncio import Redis
+
+TIMERS_KEY = "quiz:timers"
+
+# Захоплення дедлайну в оренду: коли поточний час запису настав, його
+# score переноситься на кінець оренди, а не видаляється. Якщо воркер впаде
+# або обробник завершиться помилкою, після оренди дедлайн підбере наступне
+# опитування. Якщо інший воркер переніс дедлайн пізніше (ZADD), локальне
+# колесо вже не актуальне - скрипт повертає новий час.
+# KEYS[1] - zset дедлайнів; ARGV: member, now_ms, lease_until_ms
+# Повертає: -1 - захоплено, nil - запису немає, інакше - поточний час дедлайну
+CLAIM_DEADLINE = """
+local due = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not due then
+  return nil
+end
+if tonumber(due) > tonumber(ARGV[2]) then
+  return tonumber(due)
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+return -1
+"""
+
+# Завершення дедлайну після успішного обробника: запис видаляється, лише
+# якщо його score досі дорівнює нашій оренді (дедлайн не перепланували
+# і оренду не перехопив інший воркер).
+# KEYS[1] - zset дедлайнів; ARGV: member, lease_until_ms
+# Повертає: 1 - видалено, 0 - запис уже інший
+RELEASE_DEADLINE = """
+local due = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if due and tonumber(due) == tonumber(ARGV[2]) then
+  redis.call('ZREM', KEYS[1], ARGV[1])
+  return 1
+end
+return 0
+"""
+
+# (r, room, arg) -> обробник дедлайну
+TimerHandler = Callable[[Redis, str, str], Awaitable[None]]
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class TimerWheel:
+    """
+    Ієрархічне колесо таймерів.
+
+    Рівень 0 має крок tick_ms, кожен наступний рівень — у slots разів
+    більший. Додавання і видалення — O(1); при оберті нижчого рівня
+    записи з відповідного слота вищого рівня переносяться нижче.
+    """
+
+    def __init__(self, tick_ms: int = 50, slots: int = 64, levels: int = 4) -> None:
+        self.tick_ms = tick_ms
+        self.slots = slots
+        self.levels = levels
+        self._wheels: list[list[Dict[str, int]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        # key -> (level, slot) для O(1) видалення
+        self._where: Dict[str, Tuple[int, int]] = {}
+        self._tick: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._where
+
+    def add(self, key: str, due_ms: int) -> None:
+        if self._tick is None or not self._where:
+            # порожнє колесо не просувається — вирівнюємо його на поточний час
+            self._tick = now_ms() // self.tick_ms
+        self.remove(key)
+        # округлення вгору: таймер ніколи не спрацьовує раніше дедлайну
+        self._place(key, max(-(-due_ms // self.tick_ms), self._tick))
+
+    def remove(self, key: str) -> None:
+        where = self._where.pop(key, None)
+        if where is not None:
+            level, slot = where
+            self._wheels[level][slot].pop(key, None)
+
+    def _place(self, key: str, due_tick: int) -> None:
+        delta = due_tick - self._tick
+        level = 0
+        span = self.slots
+        while delta >= span and level < self.levels - 1:
+            level += 1
+            span *= self.slots
+        slot = (due_tick // (self.slots ** level)) % self.slots
+        self._wheels[level][slot][key] = due_tick
+        self._where[key] = (level, slot)
+
+    def advance(self, at_ms: int) -> list[str]:
+        """Просуває колесо до at_ms і повертає ключі, чий час настав"""
+        target = at_ms // self.tick_ms
+        if self._tick is None or not self._where:
+            self._tick = target
+            return []
+
+        expired: list[str] = []
+        while self._tick < target and self._where:
+            self._tick += 1
+            self._cascade()
+            bucket = self._wheels[0][self._tick % self.slots]
+            for key, due_tick in list(bucket.items()):
+                if due_tick <= self._tick:
+                    del bucket[key]
+                    del self._where[key]
+                    expired.append(key)
+        self._tick = max(self._tick, target)
+        return expired
+
+    def _cascade(self) -> None:
+        span = 1
+        for level in range(1, self.levels):
+            span *= self.slots
+            if self._tick % span:
+                break
+            slot = (self._tick // span) % self.slots
+            bucket = self._wheels[level][slot]
+            self._wheels[level][slot] = {}
+            for key, due_tick in bucket.items():
+                self._place(key, max(due_tick, self._tick))
+
+
+class DeadlineScheduler:
+    """
+    Планувальник дедлайнів кімнат (авто-розкриття відповіді, відсутність хоста).
+
+    Дедлайни зберігаються в Redis sorted set (score = час спрацювання),
+    тож переживають рестарт і деплой. Кожен процес крутить один цикл:
+    власні дедлайни відстежує в колесі таймерів, а раз на poll_interval
+    підбирає з Redis прострочені дедлайни інших (або перезапущених) воркерів.
+    Спрацьовує той воркер, якому вдалося атомарно взяти запис в оренду
+    на lease_ms; запис видаляється лише після успішного обробника. Якщо
+    воркер впав чи обробник завершився помилкою, після оренди дедлайн
+    виконується знову - тобто щонайменше один раз, тож обробники мають
+    бути ідемпотентними (авто-розкриття і так оцінює питання один раз).
+    """
+
+    def __init__(self, tick_ms: int = 50, poll_interval: float = 1.0, lease_ms: int = 30_000) -> None:
+        self.wheel = TimerWheel(tick_ms=tick_ms)
+        self.poll_interval = poll_interval
+        self.lease_ms = lease_ms
+        self._handlers: Dict[str, TimerHandler] = {}
+        self._redis_factory: Callable[[], Awaitable[Redis]] | None = None
+        self._loop_task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        self._claim_script = None
+        self._release_script = None
+
+    def register(self, kind: str, handler: TimerHandler) -> None:
+        self._handlers[kind] = handler
+
+    @staticmethod
+    def member(kind: str, room: str, arg: object = "") -> str:
+        return f"{kind}|{room}|{arg}"
+
+    async def schedule(self, r: Redis, kind: str, room: str, arg: object, due_ms: int) -> None:
+        """Планує (або переносить) дедлайн"""
+        member = self.member(kind, room, arg)
+        await r.zadd(TIMERS_KEY, {member: due_ms})
+        self.wheel.add(member, due_ms)
+
+    async def cancel(self, r: Redis, kind: str, room: str, arg: object = "") -> None:
+        member = self.member(kind, room, arg)
+        self.wheel.remove(member)
+        await r.zrem(TIMERS_KEY, member)
+
+    def start(self, redis_factory: Callable[[], Awaitable[Redis]]) -> None:
+        self._redis_factory = redis_factory
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run())
+            print("[scheduler] Цикл таймерів запущено")
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._loop_task = None
+
+    async def _run(self) -> None:
+        tick = self.wheel.tick_ms / 1000.0
+        next_poll = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                r = await self._redis_factory()
+                for member in self.wheel.advance(now_ms()):
+                    await self._claim_and_fire(r, member)
+
+                if loop.time() >= next_poll:
+                    next_poll = loop.time() + self.poll_interval
+                    due = await r.zrangebyscore(TIMERS_KEY, "-inf", now_ms(), start=0, num=100)
+                    for member in due:
+                        self.wheel.remove(member)
+                        await self._claim_and_fire(r, member)
+
+                await asyncio.sleep(tick)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[scheduler] Помилка циклу таймерів: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _claim_and_fire(self, r: Redis, member: str) -> None:
+        # лише один воркер візьме запис в оренду — він і виконує дедлайн
+        if self._claim_script is None:
+            self._claim_script = r.register_script(CLAIM_DEADLINE)
+            self._release_script = r.register_script(RELEASE_DEADLINE)
+        now = now_ms()
+        lease_until = now + self.lease_ms
+        result = await self._claim_script(
+            keys=[TIMERS_KEY], args=[member, now, lease_until], client=r
+        )
+        if result is None:
+            return
+        if int(result) != -1:
+            # дедлайн перенесено - чекаємо на новий час
+            self.wheel.add(member, int(result))
+            return
+        kind = member.split("|", 1)[0]
+        handler: Optional[TimerHandler] = self._handlers.get(kind)
+        if handler is None:
+            print(f"[scheduler] Немає обробника для {kind}")
+            return
+        task = asyncio.create_task(self._fire(handler, r, member, lease_until))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _fire(self, handler: TimerHandler, r: Redis, member: str, lease_until: int) -> None:
+        kind, room, arg = member.split("|", 2)
+        try:
+            await handler(r, room, arg)
+        except Exception as e:
+            # запис лишається в оренді - після неї дедлайн виконається знову
+            print(f"[scheduler] Помилка обробника {kind} для {room}: {e}")
+            return
+        try:
+            await self._release_script(keys=[TIMERS_KEY], args=[member, lease_until], client=r)
+        except Exception as e:
+            print(f"[scheduler] Не вдалося завершити дедлайн {member}: {e}")
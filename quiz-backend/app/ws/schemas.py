@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Annotated, List, Literal, Optional
 
 
 class AnswerOption(BaseModel):
@@ -42,6 +42,12 @@ class HostEndSession(BaseModel):
     type: Literal["host:end_session"] = "host:end_session"
 
 
+class HostScoreboardPage(BaseModel):
+    type: Literal["host:scoreboard_page"] = "host:scoreboard_page"
+    offset: int = Field(0, ge=0)
+    limit: int = Field(50, ge=1, le=500)
+
+
 class PlayerJoin(BaseModel):
     type: Literal["player:join"] = "player:join"
     name: str
@@ -51,7 +57,7 @@ class PlayerJoin(BaseModel):
 class PlayerAnswer(BaseModel):
     type: Literal["player:answer"] = "player:answer"
     questionIndex: int
-    optionIndex: int
+    optionIndex: int = Field(ge=0)
 
 
 class ServerStateSync(BaseModel):
@@ -63,8 +69,18 @@ class ServerStateSync(BaseModel):
     durationMs: int | None = None
     question: dict | None = None
     scoreboard: list[dict] | None = None
+    totalPlayers: int | None = None
     reveal: dict | None = None
     playerId: str | None = None
+    # номер останньої події кімнати на момент знімка
+    seq: int | None = None
+
+
+class ServerResumed(BaseModel):
+    """Пропущені події вже надіслані - повний знімок не потрібен"""
+    type: Literal["resumed"] = "resumed"
+    seq: int
+    playerId: str | None = None
 
 
 class FinishedSessionSnapshot(BaseModel):
@@ -84,7 +100,11 @@ EventPayload = (
     | HostRevealAnswer
     | HostNextQuestion
     | HostEndSession
+    | HostScoreboardPage
     | PlayerJoin
     | PlayerAnswer
 )
 
+# union подій клієнта з дискримінатором type: валідатор будується один раз
+CLIENT_EVENT_ADAPTER = TypeAdapter(Annotated[EventPayload, Field(discriminator="type")])
+
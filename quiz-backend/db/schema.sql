@@ -56,3 +56,63 @@ create table public.quiz_sessions (
 
 create index quiz_sessions_quiz_id_idx on public.quiz_sessions (quiz_id);
 create index quiz_sessions_created_at_idx on public.quiz_sessions (created_at);
+
+-- Лічильник зіграних сесій квізу: сторінка квізу не рахує quiz_sessions
+-- при кожному запиті, тож її вартість не залежить від історії ігор
+alter table public.quizzes add column if not exists session_count integer not null default 0;
+
+update public.quizzes q
+set session_count = (select count(*) from public.quiz_sessions s where s.quiz_id = q.id);
+
+create or replace function public.bump_quiz_session_count()
+returns trigger as $$
+begin
+  if tg_op in ('DELETE', 'UPDATE') and old.quiz_id is not null then
+    update public.quizzes set session_count = session_count - 1 where id = old.quiz_id;
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') and new.quiz_id is not null then
+    update public.quizzes set session_count = session_count + 1 where id = new.quiz_id;
+  end if;
+  return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists quiz_sessions_count on public.quiz_sessions;
+create trigger quiz_sessions_count
+after insert or delete or update of quiz_id on public.quiz_sessions
+for each row execute function public.bump_quiz_session_count();
+
+-- Зміна лічильника не є редагуванням квізу: updated_at оновлюють лише
+-- зміни змісту
+drop trigger if exists set_quizzes_updated_at on public.quizzes;
+create trigger set_quizzes_updated_at
+before update of title, description on public.quizzes
+for each row execute function public.set_updated_at();
+
+-- Keyset-пагінація архіву: order by updated_at desc, id desc
+create index if not exists idx_quizzes_updated_at_id on public.quizzes (updated_at desc, id desc);
+
+-- Версія списку квізів для ETag архіву: один рядок, який тригер
+-- збільшує при кожній зміні набору чи полів списку. Перевірка ETag
+-- читає його за первинним ключем замість count(*) по quizzes
+create table if not exists public.quiz_list_version (
+  id boolean primary key default true check (id),
+  version bigint not null default 0
+);
+
+insert into public.quiz_list_version (id) values (true) on conflict (id) do nothing;
+
+alter table public.quiz_list_version enable row level security;
+
+create or replace function public.bump_quiz_list_version()
+returns trigger as $$
+begin
+  update public.quiz_list_version set version = version + 1 where id;
+  return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists quizzes_list_version on public.quizzes;
+create trigger quizzes_list_version
+after insert or delete or update of title, description, updated_at on public.quizzes
+for each statement execute function public.bump_quiz_list_version();
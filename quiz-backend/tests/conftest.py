@@ -0,0 +1,62 @@
+import asyncio
+import os
+
+import pytest
+import redis as redis_sync
+from redis.asyncio import Redis
+
+# окрема БД, щоб тести не чіпали робочі ключі в db 0
+REDIS_TEST_URL = os.getenv("REDIS_TEST_URL", "redis://localhost:6379/15")
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.sent: list[str] = []
+        self.closed_with: int | None = None
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_with = code
+
+
+def _live_redis() -> redis_sync.Redis | None:
+    client = redis_sync.Redis.from_url(REDIS_TEST_URL, socket_connect_timeout=0.5)
+    try:
+        client.ping()
+    except redis_sync.RedisError:
+        client.close()
+        return None
+    return client
+
+
+@pytest.fixture
+def make_ws():
+    return FakeWebSocket
+
+
+@pytest.fixture
+def redis():
+    """
+    Async-клієнт Redis: живий Redis з REDIS_TEST_URL (БД очищується до і
+    після тесту), а якщо його немає - fakeredis у пам'яті процесу.
+    Клієнт закриває сам тест (await r.aclose()) у своєму циклі подій.
+    """
+    live = _live_redis()
+    if live is None:
+        fakeredis = pytest.importorskip("fakeredis")
+        yield fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer(), decode_responses=True)
+        return
+
+    live.flushdb()
+    try:
+        yield Redis.from_url(REDIS_TEST_URL, decode_responses=True)
+    finally:
+        live.flushdb()
+        live.close()
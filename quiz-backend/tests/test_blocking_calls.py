@@ -0,0 +1,71 @@
+import ast
+from pathlib import Path
+
+APP = Path(__file__).resolve().parents[1] / "app"
+
+# модулі з синхронним клієнтом Supabase
+SYNC_DB_MODULES = [
+    APP / "services" / "quiz_service.py",
+    APP / "services" / "quiz_session_service.py",
+    APP / "repositories" / "quiz_repository.py",
+    APP / "repositories" / "quiz_session_repository.py",
+]
+# код, який виконується в циклі подій
+ASYNC_MODULES = [APP / "api", APP / "graphql", APP / "services", APP / "ws"]
+
+
+def _sync_db_methods() -> set[str]:
+    names = {"execute"}
+    for path in SYNC_DB_MODULES:
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.FunctionDef) and not node.name.startswith("_"):
+                names.add(node.name)
+    return names
+
+
+def _blocking_calls(tree: ast.AST, names: set[str]) -> list[tuple[int, str]]:
+    found = []
+
+    def visit(node: ast.AST, in_async: bool, awaited: bool) -> None:
+        if isinstance(node, (ast.FunctionDef, ast.Lambda)):
+            in_async = False
+        elif isinstance(node, ast.AsyncFunctionDef):
+            in_async = True
+        if (
+            in_async
+            and not awaited
+            and isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr in names
+        ):
+            found.append((node.lineno, node.func.attr))
+        for child in ast.iter_child_nodes(node):
+            # await pipe.execute() - асинхронний Redis, а не Supabase
+            visit(child, in_async, isinstance(node, ast.Await))
+
+    visit(tree, False, False)
+    return found
+
+
+def test_async_handlers_do_not_call_supabase_on_the_event_loop():
+    names = _sync_db_methods()
+    offenders = []
+    for root in ASYNC_MODULES:
+        for path in sorted(root.rglob("*.py")):
+            tree = ast.parse(path.read_text(encoding="utf-8"))
+            for lineno, name in _blocking_calls(tree, names):
+                offenders.append(f"{path.relative_to(APP.parent)}:{lineno} {name}()")
+    # синхронні виклики БД з async-коду мають іти через run_db
+    assert offenders == []
+
+
+def test_guard_flags_direct_calls_only():
+    tree = ast.parse(
+        "async def handler(svc, pipe):\n"
+        "    svc.get_quiz('q')\n"
+        "    await run_db(svc.get_quiz, 'q')\n"
+        "    await pipe.execute()\n"
+        "def sync_helper(svc):\n"
+        "    svc.get_quiz('q')\n"
+    )
+    assert _blocking_calls(tree, {"get_quiz", "execute"}) == [(2, "get_quiz")]
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from redis.asyncio import Redis
+
+from app.ws.broadcast import RedisBroadcast
+from app.ws.room_manager import RoomManager
+
+
+async def _wait_for(predicate, timeout: float = 2.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        if loop.time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def test_broadcast_reaches_sockets_on_every_worker(redis, make_ws):
+    async def scenario():
+        r = redis
+
+        async def factory() -> Redis:
+            return r
+
+        # два менеджери імітують два воркери з одним Redis
+        worker_a = RoomManager(backend=RedisBroadcast(factory))
+        worker_b = RoomManager(backend=RedisBroadcast(factory))
+        host, player, joiner = make_ws(), make_ws(), make_ws()
+        try:
+            await worker_a.register("TEST1", host)
+            await worker_b.register("TEST1", player)
+            await worker_b.register("TEST1", joiner)
+            # дати підпискам встановитись
+            await asyncio.sleep(0.1)
+
+            await worker_b.broadcast("TEST1", {"type": "player_joined"}, exclude=joiner)
+            await _wait_for(lambda: host.sent and player.sent)
+
+            assert json.loads(host.sent[0])["type"] == "player_joined"
+            assert json.loads(player.sent[0])["type"] == "player_joined"
+            assert joiner.sent == []
+        finally:
+            for mgr, ws in ((worker_a, host), (worker_b, player), (worker_b, joiner)):
+                await mgr.unregister("TEST1", ws)
+            await worker_a.backend.close()
+            await worker_b.backend.close()
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_sequenced_events_arrive_in_seq_order_across_workers(redis, make_ws):
+    async def scenario():
+        r = redis
+
+        async def factory() -> Redis:
+            return r
+
+        worker_a = RoomManager(backend=RedisBroadcast(factory))
+        worker_b = RoomManager(backend=RedisBroadcast(factory))
+        worker_a.start(factory)
+        worker_b.start(factory)
+        room = "TEST_ORDER"
+        client = make_ws()
+        try:
+            await worker_a.register(room, client)
+            await worker_b.register(room, make_ws())
+            await asyncio.sleep(0.1)
+
+            # обидва воркери розсилають події кімнати одночасно
+            await asyncio.gather(
+                *(
+                    (worker_a if i % 2 else worker_b).broadcast(room, {"type": "tick", "n": i})
+                    for i in range(40)
+                )
+            )
+            await _wait_for(lambda: len(client.sent) == 40)
+            assert [json.loads(raw)["seq"] for raw in client.sent] == list(range(1, 41))
+        finally:
+            await worker_a.cleanup_room_data(r, room)
+            await worker_a.stop()
+            await worker_b.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,114 @@
+import asyncio
+
+from app.ws.connection import ClientConnection, stats
+
+
+def test_enqueue_does_not_wait_for_slow_client(make_ws):
+    async def scenario():
+        slow = ClientConnection(make_ws(delay=0.5), max_queue=8)
+        slow.start()
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        for i in range(5):
+            assert slow.enqueue(f"frame-{i}")
+        assert loop.time() - t0 < 0.05
+        await slow.stop()
+
+    asyncio.run(scenario())
+
+
+def test_close_flushes_queued_frames(make_ws):
+    async def scenario():
+        ws = make_ws()
+        conn = ClientConnection(ws, max_queue=8)
+        conn.start()
+        conn.enqueue("a")
+        conn.enqueue("b")
+        await conn.close()
+        assert ws.sent == ["a", "b"]
+        assert ws.closed_with == 1000
+
+    asyncio.run(scenario())
+
+
+def test_overflow_drops_slow_consumer(make_ws):
+    async def scenario():
+        ws = make_ws(delay=10)
+        conn = ClientConnection(ws, max_queue=2)
+        conn.start()
+        results = [conn.enqueue(str(i)) for i in range(5)]
+        await asyncio.sleep(0)
+        assert results[-1] is False
+        assert conn.closed
+        await asyncio.sleep(0)
+        assert ws.closed_with == 1013
+
+    asyncio.run(scenario())
+
+
+def test_superseded_frames_are_collapsed(make_ws):
+    async def scenario():
+        ws = make_ws()
+        conn = ClientConnection(ws, max_queue=8)
+        before = stats.collapsed
+        conn.enqueue("sync-1", "state_sync")
+        conn.enqueue("question", "question_started")
+        conn.enqueue("sync-2", "state_sync")
+        assert conn.pending == 2
+        conn.start()
+        await conn.close()
+        # новіший state_sync замінює старий і йде після question_started
+        assert ws.sent == ["question", "sync-2"]
+        assert stats.collapsed == before + 1
+
+    asyncio.run(scenario())
+
+
+def test_non_critical_frames_are_dropped_over_soft_limit(make_ws):
+    async def scenario():
+        ws = make_ws()
+        conn = ClientConnection(ws, max_queue=8, soft_limit=2)
+        before = stats.dropped
+        conn.enqueue("a")
+        conn.enqueue("b")
+        assert conn.enqueue("progress", "answer_progress")
+        assert conn.enqueue("c", "answer_revealed")
+        assert conn.pending == 3
+        assert stats.dropped == before + 1
+        conn.start()
+        await conn.close()
+        assert ws.sent == ["a", "b", "c"]
+
+
+def test_join_batches_are_never_dropped(make_ws):
+    async def scenario():
+        ws = make_ws()
+        conn = ClientConnection(ws, max_queue=8, soft_limit=1)
+        before = stats.dropped
+        conn.enqueue("a")
+        # кожен пакет несе лише нові підключення - втрата пакета не відновлюється
+        assert conn.enqueue("joined-1", "players_joined")
+        assert conn.enqueue("joined-2", "players_joined")
+        assert stats.dropped == before
+        conn.start()
+        await conn.close()
+        assert ws.sent == ["a", "joined-1", "joined-2"]
+
+    asyncio.run(scenario())
+
+
+def test_consumer_staying_over_soft_limit_is_evicted(make_ws):
+    async def scenario():
+        ws = make_ws(delay=10)
+        conn = ClientConnection(ws, max_queue=100, soft_limit=1, slow_timeout=0.05)
+        before = stats.evicted
+        assert conn.enqueue("a")
+        assert conn.enqueue("b")
+        await asyncio.sleep(0.1)
+        assert not conn.enqueue("c")
+        assert conn.closed
+        assert stats.evicted == before + 1
+        await asyncio.sleep(0)
+        assert ws.closed_with == 1013
+
+    asyncio.run(scenario())
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from app.ws.dispatcher import EventContext, EventDispatcher, ForbiddenEvent, UnknownEvent
+from app.ws.encoding import JSON
+from app.ws.schemas import PlayerAnswer
+
+
+def test_events_are_validated_from_raw_text_and_routed_by_type():
+    async def scenario():
+        dispatcher = EventDispatcher()
+        handled = []
+
+        @dispatcher.on("player:answer")
+        async def on_answer(ctx, evt):
+            handled.append((ctx.player_id, evt))
+
+        ctx = EventContext(None, None, "R1", "player", "session:R1", player_id="p1")
+        evt = dispatcher.parse('{"type": "player:answer", "questionIndex": 0, "optionIndex": 2}', JSON)
+        assert isinstance(evt, PlayerAnswer)
+        await dispatcher.dispatch(ctx, evt)
+        assert handled == [("p1", evt)]
+
+        with pytest.raises(UnknownEvent):
+            dispatcher.parse('{"type": "player:dance"}', JSON)
+        with pytest.raises(ValidationError):
+            dispatcher.parse('{"type": "player:answer", "questionIndex": "x"}', JSON)
+        # зареєстрованого обробника немає
+        with pytest.raises(UnknownEvent):
+            await dispatcher.dispatch(ctx, dispatcher.parse('{"type": "host:end_session"}', JSON))
+
+    asyncio.run(scenario())
+
+
+def test_host_commands_are_rejected_for_players():
+    async def scenario():
+        dispatcher = EventDispatcher()
+        pages = []
+
+        @dispatcher.on("host:scoreboard_page", role="host")
+        async def on_page(ctx, evt):
+            pages.append(ctx.role)
+
+        evt = dispatcher.parse('{"type": "host:scoreboard_page", "offset": 0, "limit": 50}', JSON)
+        player = EventContext(None, None, "R1", "player", "session:R1", player_id="p1")
+        with pytest.raises(ForbiddenEvent):
+            await dispatcher.dispatch(player, evt)
+        assert pages == []
+
+        await dispatcher.dispatch(EventContext(None, None, "R1", "host", "session:R1"), evt)
+        assert pages == ["host"]
+
+    asyncio.run(scenario())
+
+
+def test_router_registers_every_host_command_as_host_only(monkeypatch):
+    # налаштування читаються при імпорті app.core.config
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "test")
+    from app.api.v1.routers.ws_router import dispatcher
+
+    async def scenario():
+        player = EventContext(None, None, "R1", "player", "session:R1", player_id="p1")
+        evt = dispatcher.parse('{"type": "host:scoreboard_page"}', JSON)
+        with pytest.raises(ForbiddenEvent):
+            await dispatcher.dispatch(player, evt)
+
+    asyncio.run(scenario())
+    host_events = [t for t in dispatcher._handlers if t.startswith("host:")]
+    assert host_events and all(dispatcher._roles.get(t) == "host" for t in host_events)
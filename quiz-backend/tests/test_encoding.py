@@ -0,0 +1,28 @@
+import pytest
+
+from app.ws.encoding import JSON, Frame, get_encoder
+from app.ws.schemas import ServerStateSync
+
+
+def test_frame_is_encoded_once_per_protocol():
+    frame = Frame({"type": "answer_revealed", "distribution": {0: 1, 1: 0}})
+    first = frame.encode(JSON)
+    assert frame.encode(JSON) is first
+    assert JSON.decode(first) == {"type": "answer_revealed", "distribution": {"0": 1, "1": 0}}
+
+
+def test_model_is_serialized_without_dict_round_trip():
+    ss = ServerStateSync(roomCode="ABCDE", phase="LOBBY", questionIndex=-1)
+    frame = Frame(ss)
+    assert frame.type == "state_sync"
+    assert JSON.decode(frame.encode(JSON))["roomCode"] == "ABCDE"
+
+
+def test_msgpack_round_trip_from_json_frame():
+    encoder = get_encoder("msgpack")
+    if encoder is None:
+        pytest.skip("msgpack is not installed")
+    frame = Frame.from_json('{"type":"question_started","questionIndex":2}', "question_started")
+    packed = frame.encode(encoder)
+    assert isinstance(packed, bytes)
+    assert encoder.decode(packed) == {"type": "question_started", "questionIndex": 2}
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+from app.services.quiz_cache import QuizCache, quiz_cache_key
+
+
+def test_concurrent_misses_load_once_and_invalidation_reloads(redis):
+    async def scenario():
+        r = redis
+
+        async def redis_factory():
+            return r
+
+        loads: list[str] = []
+        version = {"updatedAt": "v1"}
+
+        async def load(quiz_id):
+            loads.append(quiz_id)
+            await asyncio.sleep(0.05)
+            return {"id": quiz_id, "title": "Quiz", "updatedAt": version["updatedAt"]}
+
+        # два воркери з власним L1 і спільним Redis
+        workers = [QuizCache(redis_factory, local_ttl_ms=60_000, lock_poll_ms=10) for _ in range(2)]
+        quiz_id = "TEST_QUIZ_CACHE"
+        await r.delete(quiz_cache_key(quiz_id), QuizCache.k_invalidated(quiz_id), QuizCache.k_lock(quiz_id))
+        try:
+            results = await asyncio.gather(
+                *(workers[i % 2].get(quiz_id, load) for i in range(50))
+            )
+            assert loads == [quiz_id]
+            assert all(res["updatedAt"] == "v1" for res in results)
+
+            # повторне читання - з пам'яті процесу
+            await workers[1].get(quiz_id, load)
+            assert len(loads) == 1
+
+            version["updatedAt"] = "v2"
+            await workers[0].invalidate(quiz_id)
+            assert (await workers[0].get(quiz_id, load))["updatedAt"] == "v2"
+            assert len(loads) == 2
+            assert await r.hget(quiz_cache_key(quiz_id), "updatedAt") == "v2"
+        finally:
+            await r.delete(quiz_cache_key(quiz_id), QuizCache.k_invalidated(quiz_id), QuizCache.k_lock(quiz_id))
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_missing_quiz_and_loader_error_do_not_stall_waiters(redis):
+    async def scenario():
+        r = redis
+
+        async def redis_factory():
+            return r
+
+        workers = [QuizCache(redis_factory, lock_poll_ms=10) for _ in range(2)]
+        missing_id, broken_id = "TEST_QUIZ_MISSING", "TEST_QUIZ_BROKEN"
+        loads: list[str] = []
+
+        async def load_missing(quiz_id):
+            loads.append(quiz_id)
+            await asyncio.sleep(0.05)
+            return None
+
+        failed: list[str] = []
+
+        async def load_flaky(quiz_id):
+            loads.append(quiz_id)
+            await asyncio.sleep(0.05)
+            if not failed:
+                failed.append(quiz_id)
+                raise RuntimeError("db down")
+            return {"id": quiz_id, "updatedAt": "v1"}
+
+        try:
+            started = time.monotonic()
+            results = await asyncio.gather(*(workers[i % 2].get(missing_id, load_missing) for i in range(10)))
+            assert results == [None] * 10
+            assert loads == [missing_id]
+            # відсутність закешована - повторний запит не йде в БД
+            assert await QuizCache(redis_factory).get(missing_id, load_missing) is None
+            assert loads == [missing_id]
+
+            loads.clear()
+            results = await asyncio.gather(
+                workers[0].get(broken_id, load_flaky),
+                workers[1].get(broken_id, load_flaky),
+                return_exceptions=True,
+            )
+            # помилка доходить до власника замка, а інший воркер одразу читає БД сам
+            assert sum(isinstance(res, RuntimeError) for res in results) == 1
+            assert {"id": broken_id, "updatedAt": "v1"} in results
+            assert loads == [broken_id, broken_id]
+            assert time.monotonic() - started < 2
+        finally:
+            for quiz_id in (missing_id, broken_id):
+                await r.delete(quiz_cache_key(quiz_id), QuizCache.k_invalidated(quiz_id), QuizCache.k_lock(quiz_id))
+            await r.aclose()
+
+    asyncio.run(scenario())
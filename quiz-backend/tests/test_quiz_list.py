@@ -0,0 +1,65 @@
+import base64
+import os
+
+import pytest
+
+# налаштування читаються при імпорті app.core.config
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.routers import quizzes
+from app.services.quiz_service import QuizService, decode_list_cursor, encode_list_cursor
+
+QUIZ_ID = "2b1f0c4e-8d57-4c6a-9e0b-3f1a2d5c7e90"
+UPDATED_AT = "2025-01-02T03:04:05+00:00"
+
+
+class FakeRepo:
+    def __init__(self) -> None:
+        self.version = 1
+        self.list_calls = 0
+
+    def list_version(self) -> int:
+        return self.version
+
+    def list_quizzes(self, limit, after=None):
+        self.list_calls += 1
+        return [{"id": QUIZ_ID, "title": "Quiz", "description": "", "updated_at": UPDATED_AT}]
+
+
+def test_list_cursor_round_trip_and_rejects_garbage():
+    cursor = encode_list_cursor(UPDATED_AT, QUIZ_ID)
+    assert decode_list_cursor(cursor) == (UPDATED_AT, QUIZ_ID)
+
+    bad_id = base64.urlsafe_b64encode(b'["2025-01-02T03:04:05","1 or 1=1"]').decode()
+    for cursor in ("not-a-cursor", "", bad_id):
+        with pytest.raises(ValueError):
+            decode_list_cursor(cursor)
+
+
+def test_list_etag_and_invalid_cursor():
+    repo = FakeRepo()
+    app = FastAPI()
+    app.include_router(quizzes.router)
+    app.dependency_overrides[quizzes.get_service] = lambda: QuizService(repo)
+    client = TestClient(app)
+
+    res = client.get("/quizzes/")
+    assert res.status_code == 200
+    assert res.json()["items"][0]["id"] == QUIZ_ID
+    etag = res.headers["ETag"]
+
+    # список не змінився - 304 без вибірки квізів
+    res = client.get("/quizzes/", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert repo.list_calls == 1
+
+    repo.version += 1
+    res = client.get("/quizzes/", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+    assert client.get("/quizzes/", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,79 @@
+import asyncio
+import os
+
+# налаштування читаються при імпорті app.core.config
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test")
+
+from app.repositories.quiz_repository import QuizRepository
+from app.services.quiz_service import QuizService
+
+QUIZ_ID = "2b1f0c4e-8d57-4c6a-9e0b-3f1a2d5c7e90"
+
+
+class FakeResponse:
+    def __init__(self, data) -> None:
+        self.data = data
+
+
+class FakeQuery:
+    """Ланцюжок запиту PostgREST: записує виклики, execute - один HTTP-запит"""
+
+    def __init__(self, client: "FakeSupabase", table: str) -> None:
+        self.client = client
+        self.calls: list[tuple] = [("table", table)]
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, *args))
+            return self
+
+        return call
+
+    def execute(self) -> FakeResponse:
+        self.client.requests.append(self.calls)
+        return FakeResponse(self.client.rows)
+
+
+class FakeSupabase:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+        self.requests: list[list[tuple]] = []
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+
+def quiz_row(sessions: int) -> dict:
+    return {
+        "id": QUIZ_ID,
+        "title": "Quiz",
+        "description": "",
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "updated_at": "2025-01-02T00:00:00+00:00",
+        "session_count": sessions,
+        "questions": [
+            {"id": f"q{pos}", "question_text": f"Q{pos}", "answers": ["a", "b"], "correct_answer": 0, "position": pos}
+            for pos in (2, 0, 1)
+        ],
+    }
+
+
+def test_quiz_page_is_one_request_whatever_the_play_history():
+    for sessions in (0, 10_000):
+        client = FakeSupabase(quiz_row(sessions))
+        quiz = asyncio.run(QuizService(QuizRepository(client)).get_quiz(QUIZ_ID))
+
+        # квіз, питання і лічильник сесій - один запит до quizzes
+        assert client.requests == [
+            [("table", "quizzes"), ("select", "*,questions(*)"), ("eq", "id", QUIZ_ID), ("single",)]
+        ]
+        assert quiz["rating"] == sessions
+        assert quiz["questionCount"] == 3
+        assert [q["position"] for q in quiz["questions"]] == [0, 1, 2]
+
+
+def test_missing_quiz_is_none():
+    client = FakeSupabase(None)
+    assert asyncio.run(QuizService(QuizRepository(client)).get_quiz(QUIZ_ID)) is None
+    assert len(client.requests) == 1
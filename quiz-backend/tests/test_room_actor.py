@@ -0,0 +1,50 @@
+import asyncio
+
+from app.ws.room_actor import RoomActor
+
+
+def test_answers_are_batched_and_commands_keep_order():
+    async def scenario():
+        batches: list[list] = []
+        log: list[str] = []
+
+        async def flush(batch):
+            batches.append(batch)
+            log.extend(f"answer:{a}" for a in batch)
+            return [a % 2 == 0 for a in batch]
+
+        async def command(name):
+            log.append(name)
+            return name
+
+        actor = RoomActor("R1", flush_answers=flush)
+        actor.start()
+        first = [actor.submit_answer(i) for i in range(5)]
+        cmd = actor.call(command, "reveal")
+        late = actor.submit_answer(5)
+        results = await asyncio.gather(*first, cmd, late)
+
+        assert results == [True, False, True, False, True, "reveal", False]
+        # відповіді до команди записані одним пакетом і раніше за неї
+        assert batches == [[0, 1, 2, 3, 4], [5]]
+        assert log.index("reveal") == 5
+        await actor.stop()
+
+    asyncio.run(scenario())
+
+
+def test_idle_actor_unregisters_itself():
+    async def scenario():
+        idle: list[RoomActor] = []
+
+        async def flush(batch):
+            return batch
+
+        actor = RoomActor("R1", flush_answers=flush, on_idle=idle.append, idle_timeout=0.05)
+        actor.start()
+        assert await actor.submit_answer(1) == 1
+        await asyncio.sleep(0.15)
+        assert idle == [actor]
+        assert not actor.running
+
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+import asyncio
+
+from app.ws.room_cache import RoomStateCache
+from app.ws.room_manager import RoomManager
+
+
+class SlowStateReads:
+    """Redis, у якого прочитаний стан повертається лише після відкриття gate"""
+
+    def __init__(self, r, gate: asyncio.Event) -> None:
+        self._r = r
+        self._gate = gate
+
+    def pipeline(self, **kwargs):
+        return _SlowPipeline(self._r.pipeline(**kwargs), self._gate)
+
+    def __getattr__(self, name):
+        return getattr(self._r, name)
+
+
+class _SlowPipeline:
+    def __init__(self, pipe, gate: asyncio.Event) -> None:
+        self._pipe = pipe
+        self._gate = gate
+
+    async def __aenter__(self):
+        await self._pipe.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        return await self._pipe.__aexit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+    async def execute(self):
+        result = await self._pipe.execute()
+        await self._gate.wait()
+        return result
+
+
+def test_stale_read_is_not_cached_over_a_newer_write():
+    cache = RoomStateCache()
+    epoch = cache.epoch("R1")
+    # стан змінився, поки читання було в дорозі, а кеш не мав стану для патча
+    cache.patch_state("R1", 2, {"phase": "QUESTION_ACTIVE"})
+    cache.put_state("R1", 1, {"phase": "LOBBY"}, epoch)
+    assert cache.get_state("R1") is None
+
+    cache.put_state("R1", 2, {"phase": "QUESTION_ACTIVE"}, cache.epoch("R1"))
+    assert cache.get_state("R1") == {"phase": "QUESTION_ACTIVE"}
+
+
+def test_get_state_in_flight_during_set_state_does_not_cache_old_state(redis, make_ws):
+    async def scenario():
+        r = redis
+        manager = RoomManager()
+        room = "TEST_STATE_RACE"
+        ws = make_ws()
+        await manager.register(room, ws)
+        try:
+            await manager.set_state(r, room, phase="LOBBY", questionIndex=-1)
+            manager.cache.drop(room)
+
+            gate = asyncio.Event()
+            reader = asyncio.create_task(manager.get_state(SlowStateReads(r, gate), room))
+            await asyncio.sleep(0.05)
+            await manager.set_state(r, room, phase="QUESTION_ACTIVE", questionIndex=0)
+            gate.set()
+            assert (await reader)["phase"] == "LOBBY"
+
+            assert (await manager.get_state(r, room))["phase"] == "QUESTION_ACTIVE"
+        finally:
+            await manager.unregister(room, ws)
+            await manager.cleanup_room_data(r, room)
+            await r.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,456 @@
+import asyncio
+import json
+import time
+
+from app.services.room_quiz_cache import quiz_from_runtime
+from app.ws.room_manager import RoomManager
+from app.ws.schemas import ServerStateSync
+
+
+def test_join_storm_is_coalesced(make_ws):
+    async def scenario():
+        manager = RoomManager(join_batch_ms=20)
+        host = make_ws()
+        await manager.register("R1", host)
+
+        for i in range(50):
+            manager.announce_join("R1", f"p{i}", f"Player {i}")
+        # повторне підключення того ж гравця не дублюється
+        manager.announce_join("R1", "p0", "Player 0")
+        await asyncio.sleep(0.1)
+
+        frames = [json.loads(raw) for raw in host.sent]
+        assert [f["type"] for f in frames] == ["players_joined"]
+        assert len(frames[0]["players"]) == 50
+
+        await manager.unregister("R1", host)
+        await manager.stop()
+
+    asyncio.run(scenario())
+
+
+def test_scoreboard_snapshot_is_maintained_incrementally(redis):
+    async def scenario():
+        r = redis
+        manager = RoomManager()
+        room = "TEST_SCOREBOARD"
+        await manager.cleanup_room_data(r, room)
+        await r.delete(manager.k_score(room))
+        try:
+            await manager.save_player(r, room, "p1", "Ann")
+            await manager.save_player(r, room, "p2", "Bob")
+            # повторне підключення не дублює запис
+            await manager.save_player(r, room, "p1", "Ann")
+            assert [p["playerId"] for p in await manager.scoreboard(r, room)] == ["p1", "p2"]
+
+            await r.zincrby(manager.k_score(room), 100, "p2")
+            await manager.rebuild_scoreboard(r, room)
+            sb = await manager.scoreboard(r, room)
+            assert sb == [
+                {"playerId": "p2", "name": "Bob", "score": 100},
+                {"playerId": "p1", "name": "Ann", "score": 0},
+            ]
+        finally:
+            await manager.cleanup_room_data(r, room)
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_answer_progress_is_throttled_and_sent_to_host_only(redis, make_ws):
+    async def scenario():
+        r = redis
+        manager = RoomManager(progress_interval_ms=50)
+        room = "TEST_PROGRESS"
+        host, player = make_ws(), make_ws()
+        await manager.register(room, host, role="host")
+        await manager.register(room, player, role="player")
+        try:
+            await manager.set_state(
+                r,
+                room,
+                phase="QUESTION_ACTIVE",
+                questionIndex=0,
+                startedAt=int(time.time() * 1000),
+                durationMs=10_000,
+            )
+            for i in range(5):
+                assert await manager.submit_answer(r, room, 0, f"p{i}", i % 2)
+            assert not await manager.submit_answer(r, room, 0, "p0", 1)
+            # неіснуючі варіанти не враховуються і не створюють ключів
+            assert not await manager.submit_answer(r, room, 0, "p98", 99)
+            assert not await manager.submit_answer(r, room, 0, "p99", -5)
+            assert not await r.exists(manager.k_answer_option(room, 0, 99))
+            await asyncio.sleep(0.2)
+
+            frames = [json.loads(raw) for raw in host.sent]
+            assert [f["type"] for f in frames] == ["answer_progress"]
+            assert frames[0]["answered"] == 5
+            assert frames[0]["distribution"] == {"0": 3, "1": 2, "2": 0, "3": 0}
+            assert player.sent == []
+        finally:
+            await manager.unregister(room, host)
+            await manager.unregister(room, player)
+            await manager.cleanup_room_data(r, room)
+            for key in (
+                manager.k_answers(room, 0),
+                manager.k_answer_counts(room, 0),
+                manager.k_answer_option(room, 0, 0),
+                manager.k_answer_option(room, 0, 1),
+            ):
+                await r.delete(key)
+            await manager.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_answers_and_double_reveal_score_once(redis):
+    async def scenario():
+        r = redis
+        manager = RoomManager()
+        room = "TEST_REVEAL"
+        questions = [
+            {"id": "1", "question_text": "Q", "answers": ["a", "b"], "correct_answer": 1, "position": 0}
+        ]
+        try:
+            await manager.create_session(
+                r, room, questions, "s1", int(time.time() * 1000), quiz=quiz_from_runtime(questions)
+            )
+            for i in range(20):
+                await manager.save_player(r, room, f"p{i}", f"Player {i}")
+            await manager.start_question(r, room, 0, 10_000)
+
+            accepted = await asyncio.gather(
+                *(manager.submit_answer(r, room, 0, f"p{i}", i % 2) for i in range(20))
+            )
+            assert all(accepted)
+            # відповіді з неіснуючими варіантами не лишають ключів після завершення
+            assert not await manager.submit_answer(r, room, 0, "px", 99)
+            assert not await manager.submit_answer(r, room, 0, "py", -5)
+
+            first, second = await asyncio.gather(
+                manager.reveal_answer(r, room, 0),
+                manager.reveal_answer(r, room, 0),
+            )
+            revealed = [m for m in (first, second) if m is not None]
+            assert len(revealed) == 1
+            assert revealed[0]["distribution"] == {0: 10, 1: 10, 2: 0, 3: 0}
+            assert await r.zscore(manager.k_score(room), "p1") == 100
+            assert (await manager.get_state(r, room))["phase"] == "REVEAL"
+
+            # після завершення від кімнати лишаються тільки бали (до кінця grace-періоду)
+            await manager.cleanup_room_data(r, room)
+            assert await r.keys(f"quiz:room:{room}:*") == [manager.k_score(room)]
+            assert await r.zscore("quiz:timers", f"auto_reveal|{room}|0") is None
+        finally:
+            await manager.cleanup_room_data(r, room)
+            await r.delete(manager.k_score(room))
+            await manager.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_question_is_staged_without_answer_key(redis, make_ws):
+    async def scenario():
+        r = redis
+        manager = RoomManager()
+        room = "TEST_STAGED"
+        player = make_ws()
+        await manager.register(room, player, role="player")
+        questions = [
+            {"id": str(i), "question_text": f"Q{i}", "answers": ["a", "b"], "correct_answer": 1, "position": i}
+            for i in range(2)
+        ]
+        try:
+            await manager.create_session(
+                r, room, questions, "s1", int(time.time() * 1000), quiz=quiz_from_runtime(questions)
+            )
+            assert await manager.stage_question(r, room, 0)
+            assert not await manager.stage_question(r, room, 5)
+            await asyncio.sleep(0.05)
+
+            staged = [json.loads(raw) for raw in player.sent]
+            assert [f["type"] for f in staged] == ["question_staged"]
+            assert "correct_answer" not in staged[0]["question"]
+
+            # питання вже в клієнтів - старт містить лише номер і час
+            started = await manager.start_question(r, room, 0, 10_000)
+            assert "question" not in started
+            # питання, яке не розсилалось наперед, передається разом зі стартом
+            started = await manager.start_question(r, room, 1, 10_000)
+            assert started["question"] == {"id": "1", "question_text": "Q1", "answers": ["a", "b"], "position": 1}
+        finally:
+            await manager.unregister(room, player)
+            await manager.cleanup_room_data(r, room)
+            await r.delete(manager.k_score(room))
+            await manager.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_events_are_sequenced_and_replayed(redis, make_ws):
+    async def scenario():
+        r = redis
+
+        async def redis_factory():
+            return r
+
+        manager = RoomManager(event_log_size=3)
+        manager.start(redis_factory)
+        room = "TEST_EVENTS"
+        player = make_ws()
+        await manager.register(room, player, role="player")
+        try:
+            for i in range(4):
+                await manager.broadcast(room, {"type": "tick", "n": i})
+            # події лише для хоста в журнал не потрапляють
+            await manager.broadcast(room, {"type": "answer_progress"})
+            await asyncio.sleep(0.05)
+            assert [json.loads(raw)["seq"] for raw in player.sent] == [1, 2, 3, 4]
+
+            seq, frames = await manager.replay(r, room, 2, "player")
+            assert seq == 4
+            assert [f.message["n"] for f in frames] == [2, 3]
+            assert await manager.replay(r, room, 4, "player") == (4, [])
+            # відстав більше, ніж зберігає журнал - потрібен повний знімок
+            assert await manager.replay(r, room, 0, "player") is None
+        finally:
+            await manager.unregister(room, player)
+            await manager.cleanup_room_data(r, room)
+            await manager.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_live_events_during_resume_follow_the_replay(redis, make_ws):
+    async def scenario():
+        r = redis
+
+        async def redis_factory():
+            return r
+
+        manager = RoomManager()
+        manager.start(redis_factory)
+        room = "TEST_RESUME"
+        online = make_ws()
+        await manager.register(room, online, role="player")
+        try:
+            for i in range(3):
+                await manager.broadcast(room, {"type": "tick", "n": i})
+
+            # клієнт бачив подію 1 і перепідключається, поки кімната живе далі
+            ws = make_ws()
+            conn = await manager.register(room, ws, role="player", start=False)
+            await manager.broadcast(room, {"type": "tick", "n": 3})
+            seq, frames = await manager.replay(r, room, 1, "player")
+            await manager.broadcast(room, {"type": "tick", "n": 4})
+            for frame in frames:
+                await manager.send_personal(ws, frame)
+            await manager.send_personal(ws, {"type": "resumed", "seq": seq})
+            conn.start(after_seq=seq)
+            await asyncio.sleep(0.05)
+
+            received = [json.loads(raw) for raw in ws.sent]
+            assert [(m["type"], m["seq"]) for m in received] == [
+                ("tick", 2), ("tick", 3), ("tick", 4), ("resumed", 4), ("tick", 5)
+            ]
+        finally:
+            await manager.unregister(room, online)
+            await manager.unregister(room, ws)
+            await manager.cleanup_room_data(r, room)
+            await manager.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_sequenced_frame_has_a_single_seq_key(redis, make_ws):
+    async def scenario():
+        r = redis
+
+        async def redis_factory():
+            return r
+
+        manager = RoomManager()
+        manager.start(redis_factory)
+        room = "TEST_SEQ_KEY"
+        player = make_ws()
+        await manager.register(room, player, role="player")
+        try:
+            await manager.broadcast(room, {"type": "tick"})
+            # модель серіалізує seq=None - номер має замінити його, а не додатись
+            await manager.broadcast(room, ServerStateSync(roomCode=room, phase="LOBBY", questionIndex=-1))
+            await asyncio.sleep(0.05)
+            _, frames = await manager.replay(r, room, 0, "player")
+
+            for raw in [*player.sent, *(f.encode() for f in frames)]:
+                keys = json.loads(raw, object_pairs_hook=lambda pairs: [k for k, _ in pairs])
+                assert keys.count("seq") == 1
+            assert [json.loads(raw)["seq"] for raw in player.sent] == [1, 2]
+        finally:
+            await manager.unregister(room, player)
+            await manager.cleanup_room_data(r, room)
+            await manager.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_submit_script_rejects_repeats_bad_options_and_late_answers(redis):
+    async def scenario():
+        r = redis
+        manager = RoomManager()
+        room = "TEST_SUBMIT"
+        questions = [
+            {"id": "1", "question_text": "Q", "answers": ["a", "b", "c", "d"], "correct_answer": 0, "position": 0}
+        ]
+        try:
+            await manager.create_session(
+                r, room, questions, "s1", int(time.time() * 1000), quiz=quiz_from_runtime(questions)
+            )
+            # до старту питання відповіді не приймаються
+            assert not await manager.submit_answer(r, room, 0, "p1", 0)
+            await manager.start_question(r, room, 0, 10_000)
+
+            assert await manager.submit_answer(r, room, 0, "p1", 2)
+            # подвійне натискання: друга відповідь не перезаписує першу
+            assert not await manager.submit_answer(r, room, 0, "p1", 3)
+            # варіанти поза межами питання і відповідь на інше питання
+            assert not await manager.submit_answer(r, room, 0, "p2", 7)
+            assert not await manager.submit_answer(r, room, 0, "p2", -1)
+            assert not await manager.submit_answer(r, room, 1, "p2", 0)
+
+            assert await r.hgetall(manager.k_answers(room, 0)) == {"p1": "2"}
+            assert await r.hgetall(manager.k_answer_counts(room, 0)) == {"2": "1"}
+            assert not await r.exists(manager.k_answer_option(room, 0, 7))
+
+            # після дедлайну відповідь відхиляється
+            await manager.set_state(r, room, startedAt=int(time.time() * 1000) - 20_000)
+            assert not await manager.submit_answer(r, room, 0, "p2", 0)
+            assert await r.hlen(manager.k_answers(room, 0)) == 1
+        finally:
+            await manager.cleanup_room_data(r, room)
+            await r.delete(manager.k_score(room))
+            await manager.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_reveal_script_scores_only_correct_answers(redis):
+    async def scenario():
+        r = redis
+        manager = RoomManager()
+        room = "TEST_REVEAL_SCORE"
+        questions = [
+            {"id": "1", "question_text": "Q1", "answers": ["a", "b", "c"], "correct_answer": 2, "position": 0},
+            {"id": "2", "question_text": "Q2", "answers": ["a", "b"], "correct_answer": 0, "position": 1},
+        ]
+        try:
+            await manager.create_session(
+                r, room, questions, "s1", int(time.time() * 1000), quiz=quiz_from_runtime(questions)
+            )
+            for pid, name in (("p1", "Ann"), ("p2", "Bob"), ("p3", "Cid")):
+                await manager.save_player(r, room, pid, name)
+
+            # розкрити неактивне питання не можна
+            assert await manager.reveal_answer(r, room, 0) is None
+
+            await manager.start_question(r, room, 0, 10_000)
+            for pid, option in (("p1", 2), ("p2", 2), ("p3", 0)):
+                assert await manager.submit_answer(r, room, 0, pid, option)
+            msg = await manager.reveal_answer(r, room, 0)
+            assert msg == {
+                "type": "answer_revealed",
+                "questionIndex": 0,
+                "correctIndex": 2,
+                "distribution": {0: 1, 1: 0, 2: 2, 3: 0},
+            }
+            assert (await manager.get_state(r, room))["phase"] == "REVEAL"
+
+            await manager.start_question(r, room, 1, 10_000)
+            assert await manager.submit_answer(r, room, 1, "p3", 0)
+            assert await manager.submit_answer(r, room, 1, "p2", 0)
+            assert await manager.submit_answer(r, room, 1, "p1", 1)
+            assert (await manager.reveal_answer(r, room, 1))["distribution"] == {0: 2, 1: 1, 2: 0, 3: 0}
+            # повторне розкриття вже оціненого питання нічого не нараховує
+            assert await manager.reveal_answer(r, room, 1) is None
+
+            scores = {p["playerId"]: p["score"] for p in await manager.scoreboard(r, room)}
+            assert scores == {"p1": 100, "p2": 200, "p3": 100}
+        finally:
+            await manager.cleanup_room_data(r, room)
+            await r.delete(manager.k_score(room))
+            await manager.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_reconnecting_player_is_found_by_name(redis):
+    async def scenario():
+        r = redis
+        manager = RoomManager()
+        room = "TEST_NAMES"
+        await manager.cleanup_room_data(r, room)
+        try:
+            await manager.save_player(r, room, "p1", "Ann")
+            await manager.save_player(r, room, "p2", "Bob")
+            assert await manager.find_player_by_name(r, room, "Ann") == "p1"
+            assert await manager.find_player_by_name(r, room, "Bob") == "p2"
+            assert await manager.find_player_by_name(r, room, "Cid") is None
+            # індекс живе стільки ж, скільки й гравці кімнати
+            assert await r.ttl(manager.k_player_names(room)) > 0
+
+            await manager.cleanup_room_data(r, room)
+            assert await manager.find_player_by_name(r, room, "Ann") is None
+        finally:
+            await manager.cleanup_room_data(r, room)
+            await r.delete(manager.k_score(room))
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_state_round_trips_through_the_hash(redis):
+    async def scenario():
+        r = redis
+        manager = RoomManager()
+        room = "TEST_STATE_HASH"
+        try:
+            await manager.create_session(r, room, [], "s1", 1_700_000_000_000, quiz=quiz_from_runtime([]))
+            version = int(await r.get(manager.k_state_version(room)))
+
+            assert await manager.set_state(r, room, phase="QUESTION_ACTIVE", questionIndex=0) == version + 1
+            assert await manager.set_state(r, room, startedAt=123, extra={"a": [1, None]}) == version + 2
+
+            # кожне поле - окреме JSON-значення hash, патч не чіпає інші поля
+            raw = await r.hgetall(manager.k_state(room))
+            assert raw["phase"] == '"QUESTION_ACTIVE"'
+            assert raw["durationMs"] == "null"
+            assert raw["sessionId"] == '"s1"'
+
+            # інший вузол без кешу читає той самий стан
+            state = await RoomManager().get_state(r, room)
+            assert state == {
+                "phase": "QUESTION_ACTIVE",
+                "questionIndex": 0,
+                "startedAt": 123,
+                "durationMs": None,
+                "sessionId": "s1",
+                "createdAt": 1_700_000_000_000,
+                "stagedQuestion": -1,
+                "extra": {"a": [1, None]},
+            }
+            assert await manager.get_state(r, "TEST_STATE_MISSING") == {}
+        finally:
+            await manager.cleanup_room_data(r, room)
+            await r.delete(manager.k_score(room))
+            await manager.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,122 @@
+import asyncio
+
+from app.ws.scheduler import DeadlineScheduler, TimerWheel, now_ms
+
+
+def _drain(wheel: TimerWheel, start_ms: int, end_ms: int, step_ms: int) -> dict[str, int]:
+    fired: dict[str, int] = {}
+    t = start_ms
+    while t <= end_ms:
+        for key in wheel.advance(t):
+            fired[key] = t
+        t += step_ms
+    return fired
+
+
+def test_wheel_fires_each_timer_once_at_its_deadline():
+    wheel = TimerWheel(tick_ms=50, slots=8, levels=3)
+    base = now_ms()
+    deadlines = {"short": base + 120, "mid": base + 2_000, "long": base + 30_000}
+    for key, due in deadlines.items():
+        wheel.add(key, due)
+
+    fired = _drain(wheel, base, base + 40_000, 50)
+
+    assert set(fired) == set(deadlines)
+    for key, due in deadlines.items():
+        assert due <= fired[key] < due + 100
+    assert len(wheel) == 0
+
+
+def test_removed_timer_does_not_fire():
+    wheel = TimerWheel(tick_ms=50)
+    base = now_ms()
+    wheel.add("auto_reveal|ROOM|0", base + 500)
+    wheel.add("host_disconnect|ROOM|", base + 600)
+    wheel.remove("auto_reveal|ROOM|0")
+
+    fired = _drain(wheel, base, base + 1_000, 50)
+
+    assert list(fired) == ["host_disconnect|ROOM|"]
+
+
+def test_rescheduling_replaces_previous_deadline():
+    wheel = TimerWheel(tick_ms=50)
+    base = now_ms()
+    wheel.add("t", base + 300)
+    wheel.add("t", base + 900)
+
+    assert _drain(wheel, base, base + 600, 50) == {}
+    assert "t" in _drain(wheel, base + 650, base + 1_000, 50)
+
+
+def test_deadline_moved_by_another_worker_does_not_fire_early(redis):
+    async def scenario():
+        r = redis
+
+        async def redis_factory():
+            return r
+
+        fired: list[int] = []
+
+        async def handler(_r, room, arg):
+            fired.append(now_ms())
+
+        workers = [DeadlineScheduler(tick_ms=10, poll_interval=0.1) for _ in range(2)]
+        for scheduler in workers:
+            scheduler.register("auto_reveal", handler)
+            scheduler.start(redis_factory)
+        try:
+            base = now_ms()
+            await workers[0].schedule(r, "auto_reveal", "ROOM", 0, base + 200)
+            # питання перезапущене на іншому воркері
+            await workers[1].schedule(r, "auto_reveal", "ROOM", 0, base + 700)
+            await asyncio.sleep(1.0)
+
+            assert len(fired) == 1
+            assert fired[0] >= base + 700
+        finally:
+            for scheduler in workers:
+                await scheduler.stop()
+            await r.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_failed_deadline_fires_again_after_its_lease(redis):
+    async def scenario():
+        r = redis
+
+        async def redis_factory():
+            return r
+
+        fired: list[int] = []
+
+        async def handler(_r, room, arg):
+            fired.append(now_ms())
+            if len(fired) == 1:
+                # перша спроба обробника завершується помилкою
+                raise RuntimeError("crash")
+
+        scheduler = DeadlineScheduler(tick_ms=10, poll_interval=0.05, lease_ms=300)
+        scheduler.register("auto_reveal", handler)
+        scheduler.start(redis_factory)
+        try:
+            base = now_ms()
+            await scheduler.schedule(r, "auto_reveal", "ROOM", 0, base + 50)
+            await asyncio.sleep(0.2)
+            # поки триває оренда, запис лишається в Redis і не виконується вдруге
+            assert len(fired) == 1
+            assert await r.zscore("quiz:timers", "auto_reveal|ROOM|0") is not None
+
+            await asyncio.sleep(0.5)
+            assert len(fired) == 2
+            assert fired[1] >= fired[0] + 250
+            # успішний обробник завершує дедлайн
+            assert await r.zscore("quiz:timers", "auto_reveal|ROOM|0") is None
+        finally:
+            await scheduler.stop()
+            await r.zrem("quiz:timers", "auto_reveal|ROOM|0")
+            await r.aclose()
+
+    asyncio.run(scenario())
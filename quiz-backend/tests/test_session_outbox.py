@@ -0,0 +1,62 @@
+import asyncio
+import json
+import time
+
+from app.services.session_outbox import (
+    DEAD_LETTER_KEY,
+    OUTBOX_KEY,
+    WORKERS_KEY,
+    SessionOutbox,
+    processing_key,
+)
+
+
+def test_sessions_are_persisted_in_batches_and_failures_dead_lettered(redis):
+    async def scenario():
+        r = redis
+
+        async def redis_factory():
+            return r
+
+        batches: list[list[str]] = []
+
+        async def persist(snapshots):
+            if any(s["sessionId"] == "bad" for s in snapshots):
+                raise RuntimeError("db rejected row")
+            batches.append([s["sessionId"] for s in snapshots])
+
+        outbox = SessionOutbox(batch_size=10, max_attempts=2, retry_base_ms=1, poll_timeout=0.05)
+        keys = [OUTBOX_KEY, DEAD_LETTER_KEY, WORKERS_KEY, outbox.processing_key]
+        keys += [processing_key("dead"), processing_key("alive")]
+        await r.delete(*keys)
+        try:
+            # запис воркера, що впав (оренда сплила), і запис живого воркера,
+            # який той ще зберігає - його чіпати не можна
+            now_ms = int(time.time() * 1000)
+            await r.zadd(WORKERS_KEY, {"dead": now_ms - 1, "alive": now_ms + 60_000})
+            await r.lpush(processing_key("dead"), '{"attempts":0,"snapshot":{"sessionId":"orphan"}}')
+            await r.lpush(processing_key("alive"), '{"attempts":0,"snapshot":{"sessionId":"busy"}}')
+            for session_id in ("s1", "bad", "s2"):
+                pipe = r.pipeline(transaction=True)
+                outbox.enqueue(pipe, json.dumps({"sessionId": session_id}))
+                await pipe.execute()
+
+            outbox.start(redis_factory, persist)
+            await asyncio.sleep(0.5)
+
+            # пачка з битим записом розбирається поштучно
+            saved = [session_id for batch in batches for session_id in batch]
+            assert sorted(saved) == ["orphan", "s1", "s2"]
+            assert await outbox.depth(r) == {"pending": 0, "processing": 1, "dead": 1}
+            assert await r.llen(processing_key("alive")) == 1
+            assert await r.zscore(WORKERS_KEY, "dead") is None
+            dead = json.loads(await r.lindex(DEAD_LETTER_KEY, 0))
+            assert dead["snapshot"] == {"sessionId": "bad"}
+            assert dead["attempts"] == 2
+            assert dead["error"] == "db rejected row"
+        finally:
+            await outbox.stop()
+            await r.delete(*keys)
+            await r.aclose()
+
+    asyncio.run(scenario())
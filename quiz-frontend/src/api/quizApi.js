@@ -1,8 +1,14 @@
 import { httpClient } from "./httpClient";
 
 export const quizApi = {
-  // Список для «Архів вікторин» (id, title, updatedAt)
-  list: () => httpClient.get("/quizzes/"),
+  // Сторінка «Архіву вікторин»: { items: [{ id, title, updatedAt }], nextCursor }
+  list: ({ cursor, limit } = {}) => {
+    const params = new URLSearchParams();
+    if (cursor) params.append("cursor", cursor);
+    if (limit) params.append("limit", String(limit));
+    const query = params.toString();
+    return httpClient.get(query ? `/quizzes/?${query}` : "/quizzes/");
+  },
 
   // Повна вікторина з питаннями
   getById: (id) => httpClient.get(`/quizzes/${id}`),
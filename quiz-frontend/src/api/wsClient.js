@@ -1,17 +1,30 @@
 export const WS_BASE_URL =
   import.meta.env.VITE_WS_BASE_URL || "ws://localhost:8000/ws";
 
+// Перепідключення сторінок гри після обриву мережі (затримка росте з кожною спробою)
+export const RECONNECT_DELAY_MS = 1000;
+export const MAX_RECONNECT_ATTEMPTS = 5;
+
 let quizSocket = null;
 let quizSocketParams = null;
 let currentOnMessage = null;
 
-function buildUrl({ role, roomCode, name }) {
+// Номер останньої обробленої події кімнати: при перепідключенні з resume
+// сервер досилає лише пропущені події замість повного state_sync
+let lastSeq = null;
+let lastSeqRoom = null;
+
+function buildUrl({ role, roomCode, name, resume }) {
   const params = new URLSearchParams({ role: role, roomCode: roomCode });
 
   if (name) {
     params.append("name", name);
   }
 
+  if (resume && lastSeqRoom === roomCode && lastSeq !== null) {
+    params.append("lastSeq", String(lastSeq));
+  }
+
   // якщо це гравець — додаємо playerId з localStorage
   if (role === "player") {
     try {
@@ -27,10 +40,14 @@ function buildUrl({ role, roomCode, name }) {
   return `${WS_BASE_URL}?${params.toString()}`;
 }
 
-export function createQuizSocket({ role, roomCode, name, onMessage }) {
+export function createQuizSocket({ role, roomCode, name, onMessage, resume = false }) {
   currentOnMessage = onMessage || null;
 
-  const url = buildUrl({ role, roomCode, name });
+  const url = buildUrl({ role, roomCode, name, resume });
+  if (lastSeqRoom !== roomCode) {
+    lastSeq = null;
+    lastSeqRoom = roomCode;
+  }
 
   if (
     quizSocket &&
@@ -92,6 +109,18 @@ export function createQuizSocket({ role, roomCode, name, onMessage }) {
       const data = JSON.parse(event.data);
       console.log("Отримано повідомлення:", data);
 
+      if (typeof data.seq === "number") {
+        if (data.type === "state_sync" || data.type === "resumed") {
+          // знімок або кінець догону задають нову точку відліку
+          lastSeq = data.seq;
+        } else if (lastSeq !== null && data.seq <= lastSeq) {
+          // подія вже оброблена (повтор під час догону)
+          return;
+        } else {
+          lastSeq = data.seq;
+        }
+      }
+
       // при state_sync для гравця зберігаємо playerId/roomCode у localStorage
       if (
         data.type === "state_sync" &&
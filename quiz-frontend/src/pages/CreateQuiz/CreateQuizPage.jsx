@@ -19,6 +19,7 @@ function CreateQuizPage() {
   const [editingQuizId, setEditingQuizId] = useState(null);
 
   const [archive, setArchive] = useState([]);
+  const [archiveCursor, setArchiveCursor] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
 
@@ -74,7 +75,23 @@ function CreateQuizPage() {
   const fetchArchive = async () => {
     setLoading(true);
     try {
-      setArchive(await quizApi.list());
+      const page = await quizApi.list();
+      setArchive(page.items);
+      setArchiveCursor(page.nextCursor);
+    } catch (e) {
+      setError(e.message);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const fetchMoreArchive = async () => {
+    if (!archiveCursor) return;
+    setLoading(true);
+    try {
+      const page = await quizApi.list({ cursor: archiveCursor });
+      setArchive(prev => [...prev, ...page.items]);
+      setArchiveCursor(page.nextCursor);
     } catch (e) {
       setError(e.message);
     } finally {
@@ -319,6 +336,12 @@ function CreateQuizPage() {
             ))}
           </ul>
         )}
+
+        {archiveCursor && (
+          <button className="archive-more-btn" onClick={fetchMoreArchive} disabled={loading}>
+            Показати ще
+          </button>
+        )}
       </div>
 
       {/* ================= МОДАЛЬНЕ ВІКНО GRAPHQL ================= */}
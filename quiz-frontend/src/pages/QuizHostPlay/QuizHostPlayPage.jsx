@@ -1,9 +1,16 @@
 import React, { useEffect, useState, useRef } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import { quizApi } from "../../api/quizApi";
-import { createQuizSocket } from "../../api/wsClient";
+import {
+  createQuizSocket,
+  MAX_RECONNECT_ATTEMPTS,
+  RECONNECT_DELAY_MS,
+} from "../../api/wsClient";
 import "./QuizHostPlayPage.css";
 
+// Скільки гравців підвантажувати за один запит повної таблиці лідерів
+const SCOREBOARD_PAGE_SIZE = 50;
+
 function QuizHostPlayPage() {
   const navigate = useNavigate();
   const { id } = useParams();
@@ -13,6 +20,12 @@ function QuizHostPlayPage() {
   const [currentQuestion, setCurrentQuestion] = useState(null);
   const [questionIndex, setQuestionIndex] = useState(0);
   const [scoreboard, setScoreboard] = useState([]);
+  // Загальна кількість гравців: у розсилках приходить лише топ таблиці
+  const [totalPlayers, setTotalPlayers] = useState(0);
+  // Живий прогрес відповідей на поточне питання
+  const [answerProgress, setAnswerProgress] = useState(null);
+  // Правильна відповідь приходить разом з answer_revealed
+  const [revealedIndex, setRevealedIndex] = useState(null);
   const [phase, setPhase] = useState("LOBBY");
   const [remainingTime, setRemainingTime] = useState(0);
   const [loading, setLoading] = useState(true);
@@ -22,6 +35,8 @@ function QuizHostPlayPage() {
   const wsInitialized = useRef(false);
   const timerRef = useRef(null);
   const questionEndTimeRef = useRef(null);
+  // Питання, надіслане сервером наперед (question_staged)
+  const stagedQuestionRef = useRef(null);
 
   const stopTimer = () => {
     questionEndTimeRef.current = null;
@@ -93,100 +108,152 @@ function QuizHostPlayPage() {
     wsInitialized.current = true;
     console.log("Підключення ведучого до гри, roomCode:", id);
 
-    const socket = createQuizSocket({
-      role: "host",
-      roomCode: id,
-      onMessage: (msg) => {
-        console.log("Host (play) отримав:", msg);
-
-        if (msg.type === "state_sync") {
-          console.log("State sync:", msg);
-          setPhase(msg.phase || "LOBBY");
-
-          if (msg.scoreboard && Array.isArray(msg.scoreboard)) {
-            console.log("Оновлення scoreboard з state_sync:", msg.scoreboard);
-            setScoreboard(msg.scoreboard);
-          }
+    // Обрив мережі (закриття без close-фрейму) - перепідключаємось з resume:
+    // сервер досилає лише пропущені події замість повного state_sync
+    let disposed = false;
+    let current = null;
+    let reconnectTimer = null;
+    let reconnectAttempts = 0;
+
+    const connect = (resume) => {
+      const socket = createQuizSocket({
+        resume,
+        role: "host",
+        roomCode: id,
+        onMessage: (msg) => {
+          console.log("Host (play) отримав:", msg);
+
+          if (msg.type === "state_sync") {
+            console.log("State sync:", msg);
+            setPhase(msg.phase || "LOBBY");
+
+            if (msg.scoreboard && Array.isArray(msg.scoreboard)) {
+              console.log("Оновлення scoreboard з state_sync:", msg.scoreboard);
+              setScoreboard(msg.scoreboard);
+              setTotalPlayers(msg.totalPlayers ?? msg.scoreboard.length);
+            }
 
-          if (msg.question) {
-            setCurrentQuestion(msg.question);
-            setQuestionIndex(msg.questionIndex || 0);
-          }
+            if (msg.question) {
+              setCurrentQuestion(msg.question);
+              setQuestionIndex(msg.questionIndex || 0);
+            }
 
-          if (msg.phase === "QUESTION_ACTIVE" && msg.startedAt && msg.durationMs) {
+            if (msg.phase === "QUESTION_ACTIVE" && msg.startedAt && msg.durationMs) {
+              startSyncedTimer(msg.startedAt, msg.durationMs);
+            } else {
+              stopTimer();
+            }
+          } else if (msg.type === "question_staged") {
+            stagedQuestionRef.current = msg;
+          } else if (msg.type === "question_started") {
+            // Якщо питання вже надіслане наперед, старт містить лише номер і час
+            const staged = stagedQuestionRef.current;
+            const question =
+              msg.question ??
+              (staged?.questionIndex === msg.questionIndex ? staged.question : null);
+            console.log("Питання почалось:", question);
+            setCurrentQuestion(question);
+            setQuestionIndex(msg.questionIndex);
+            setRevealedIndex(null);
+            setPhase("QUESTION_ACTIVE");
+            setIsSettingTime(false);
+            setAnswerProgress(null);
             startSyncedTimer(msg.startedAt, msg.durationMs);
-          } else {
+          } else if (msg.type === "answer_progress") {
+            setAnswerProgress(msg);
+          } else if (msg.type === "answer_revealed") {
+            console.log("Відповідь розкрито");
             stopTimer();
-          }
-        } else if (msg.type === "question_started") {
-          console.log("Питання почалось:", msg.question);
-          setCurrentQuestion(msg.question);
-          setQuestionIndex(msg.questionIndex);
-          setPhase("QUESTION_ACTIVE");
-          setIsSettingTime(false);
-          startSyncedTimer(msg.startedAt, msg.durationMs);
-        } else if (msg.type === "answer_revealed") {
-          console.log("Відповідь розкрито");
-          stopTimer();
-          setPhase("REVEAL");
-
-          if (msg.scoreboard && Array.isArray(msg.scoreboard)) {
-            console.log("Оновлення scoreboard після reveal:", msg.scoreboard);
+            setPhase("REVEAL");
+            setRevealedIndex(msg.correctIndex);
+
+            if (msg.scoreboard && Array.isArray(msg.scoreboard)) {
+              console.log("Оновлення scoreboard після reveal:", msg.scoreboard);
+              setScoreboard(msg.scoreboard);
+              setTotalPlayers(msg.totalPlayers ?? msg.scoreboard.length);
+            }
+          } else if (msg.type === "scoreboard_page") {
+            // Наступна сторінка повної таблиці (на запит хоста)
+            setTotalPlayers(msg.totalPlayers);
+            setScoreboard((prev) => {
+              const base = msg.offset === 0 ? [] : prev;
+              const known = new Set(base.map((p) => p.playerId));
+              return [
+                ...base,
+                ...(msg.scoreboard || []).filter((p) => !known.has(p.playerId)),
+              ];
+            });
+          } else if (msg.type === "scoreboard_updated") {
+            console.log("Оновлення scoreboard:", msg.scoreboard);
             setScoreboard(msg.scoreboard);
-          }
-        } else if (msg.type === "scoreboard_updated") {
-          console.log("Оновлення scoreboard:", msg.scoreboard);
-          setScoreboard(msg.scoreboard);
-        } else if (msg.type === "player_joined") {
-          console.log("Новий учасник:", msg.playerName);
-          setScoreboard((prev) => {
-            const exists = prev.find(
-              (p) => p.name === msg.playerName || p.playerId === msg.playerId
+          } else if (msg.type === "players_joined") {
+            console.log("Нові учасники:", msg.players);
+            setScoreboard((prev) => {
+              const next = [...prev];
+              for (const player of msg.players || []) {
+                const exists = next.find(
+                  (p) => p.name === player.name || p.playerId === player.playerId
+                );
+                if (!exists) {
+                  next.push({ name: player.name, playerId: player.playerId, score: 0 });
+                }
+              }
+              return next.length === prev.length ? prev : next;
+            });
+          } else if (msg.type === "player_left") {
+            console.log("Учасник вийшов:", msg.playerName);
+            setScoreboard((prev) =>
+              prev.filter(
+                (p) =>
+                  p.name !== msg.playerName &&
+                  p.playerId !== msg.playerId
+              )
             );
-            if (exists) {
-              console.log("Учасник вже існує:", msg.playerName);
-              return prev;
-            }
-            console.log("Додаємо учасника:", msg.playerName);
-            return [
-              ...prev,
-              { name: msg.playerName, playerId: msg.playerId, score: 0 },
-            ];
-          });
-        } else if (msg.type === "player_left") {
-          console.log("Учасник вийшов:", msg.playerName);
-          setScoreboard((prev) =>
-            prev.filter(
-              (p) =>
-                p.name !== msg.playerName &&
-                p.playerId !== msg.playerId
-            )
+          }
+        },
+      });
+
+      socket.onopen = () => {
+        console.log("WebSocket host (play) підключено");
+        reconnectAttempts = 0;
+      };
+
+      socket.onerror = (err) => {
+        console.error("WebSocket помилка:", err);
+      };
+
+      socket.onclose = (event) => {
+        console.log("WebSocket закрито");
+        wsInitialized.current = false;
+        if (
+          !disposed &&
+          !event.wasClean &&
+          reconnectAttempts < MAX_RECONNECT_ATTEMPTS
+        ) {
+          // таймер питання продовжує йти, поки сервер досилає пропущене
+          reconnectAttempts += 1;
+          reconnectTimer = setTimeout(
+            () => connect(true),
+            RECONNECT_DELAY_MS * reconnectAttempts
           );
+          return;
         }
-      },
-    });
+        stopTimer();
+      };
 
-    socket.onopen = () => {
-      console.log("WebSocket host (play) підключено");
+      setWs(socket);
+      current = socket;
     };
 
-    socket.onerror = (err) => {
-      console.error("WebSocket помилка:", err);
-    };
-
-    socket.onclose = () => {
-      console.log("WebSocket закрито");
-      wsInitialized.current = false;
-      stopTimer();
-    };
-
-    setWs(socket);
+    connect(false);
 
     return () => {
       console.log("Закриваємо WebSocket (play cleanup)");
+      disposed = true;
+      clearTimeout(reconnectTimer);
       stopTimer();
-      if (socket.readyState === WebSocket.OPEN) {
-        socket.close();
+      if (current && current.readyState === WebSocket.OPEN) {
+        current.close();
       }
       wsInitialized.current = false;
     };
@@ -221,6 +288,15 @@ function QuizHostPlayPage() {
     });
   };
 
+  const handleLoadMorePlayers = () => {
+    if (!ws || ws.readyState !== WebSocket.OPEN) return;
+    ws.sendJson({
+      type: "host:scoreboard_page",
+      offset: scoreboard.length,
+      limit: SCOREBOARD_PAGE_SIZE,
+    });
+  };
+
   const handleNextQuestion = () => {
     if (!quiz || !quiz.questions) {
       handleEndQuiz();
@@ -275,6 +351,7 @@ function QuizHostPlayPage() {
   const totalQuestions = quiz.questions?.length || 0;
   const currentPreview = quiz.questions?.[questionIndex];
   const isTimeCritical = remainingTime <= 5 && remainingTime > 0;
+  const playerCount = Math.max(totalPlayers, scoreboard.length);
 
   return (
     <div className="quiz-play-container">
@@ -284,7 +361,7 @@ function QuizHostPlayPage() {
           <span>
             Питання {questionIndex + 1} / {totalQuestions}
           </span>
-          <span>Учасників: {scoreboard.length}</span>
+          <span>Учасників: {playerCount}</span>
         </div>
         <button className="end-quiz-btn" onClick={handleEndQuiz}>
           Завершити
@@ -338,9 +415,17 @@ function QuizHostPlayPage() {
                 <li key={idx} className="answer-option">
                   <span className="option-number">{idx + 1}</span>
                   <span className="option-text">{answer}</span>
+                  {answerProgress && (
+                    <span className="option-count">
+                      {answerProgress.distribution?.[idx] ?? 0}
+                    </span>
+                  )}
                 </li>
               ))}
             </ul>
+            <p className="answer-progress">
+              Відповіли: {answerProgress?.answered ?? 0} / {playerCount}
+            </p>
             <button className="reveal-btn" onClick={handleRevealAnswer}>
               Показати відповідь
             </button>
@@ -357,12 +442,14 @@ function QuizHostPlayPage() {
                   key={idx}
                   className={
                     "answer-option" +
-                    (idx === currentQuestion.correct_answer ? " correct" : "")
+                    (idx === (revealedIndex ?? currentQuestion.correct_answer)
+                      ? " correct"
+                      : "")
                   }
                 >
                   <span className="option-number">{idx + 1}</span>
                   <span className="option-text">{answer}</span>
-                  {idx === currentQuestion.correct_answer && (
+                  {idx === (revealedIndex ?? currentQuestion.correct_answer) && (
                     <span className="checkmark">✓</span>
                   )}
                 </li>
@@ -390,7 +477,7 @@ function QuizHostPlayPage() {
         )}
 
         <section className="scoreboard-section">
-          <h3>Таблиця лідерів ({scoreboard.length})</h3>
+          <h3>Таблиця лідерів ({playerCount})</h3>
           {scoreboard.length > 0 ? (
             <ul className="scoreboard-list">
               {scoreboard
@@ -414,6 +501,11 @@ function QuizHostPlayPage() {
               Немає учасників. Очікуємо підключення...
             </p>
           )}
+          {scoreboard.length < totalPlayers && (
+            <button className="scoreboard-more-btn" onClick={handleLoadMorePlayers}>
+              Показати ще
+            </button>
+          )}
         </section>
       </div>
     </div>
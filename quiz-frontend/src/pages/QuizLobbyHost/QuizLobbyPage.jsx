@@ -56,23 +56,25 @@ function QuizLobbyPage() {
               setParticipants([]);
             }
           }
-        } else if (msg.type === "player_joined") {
+        } else if (msg.type === "players_joined") {
+          // Сервер збирає підключення в пакети
           setParticipants(prev => {
-            // Перевіряємо, чи гравець вже є в списку (за playerId або name)
-            const exists = prev.find(
-              p => (p.playerId && p.playerId === msg.playerId) || 
-                   (p.name === msg.playerName)
-            );
-            if (exists) {
-              console.log("Гравець вже в списку:", msg.playerName);
-              return prev;
+            const next = [...prev];
+            for (const player of msg.players || []) {
+              // Перевіряємо, чи гравець вже є в списку (за playerId або name)
+              const exists = next.find(
+                p => (p.playerId && p.playerId === player.playerId) || 
+                     (p.name === player.name)
+              );
+              if (!exists) {
+                next.push({ 
+                  name: player.name, 
+                  playerId: player.playerId,
+                  score: 0 
+                });
+              }
             }
-            console.log("Додаємо гравця:", msg.playerName);
-            return [...prev, { 
-              name: msg.playerName, 
-              playerId: msg.playerId,
-              score: 0 
-            }];
+            return next.length === prev.length ? prev : next;
           });
         } else if (msg.type === "player_left") {
           setParticipants(prev => 
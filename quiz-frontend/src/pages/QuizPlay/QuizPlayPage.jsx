@@ -1,6 +1,10 @@
 import React, { useEffect, useState, useRef } from "react";
 import { useNavigate, useParams } from "react-router-dom";
-import { createQuizSocket } from "../../api/wsClient";
+import {
+  createQuizSocket,
+  MAX_RECONNECT_ATTEMPTS,
+  RECONNECT_DELAY_MS,
+} from "../../api/wsClient";
 import "./QuizPlayPage.css";
 
 function mapServerPhase(serverPhase) {
@@ -20,7 +24,7 @@ function mapServerPhase(serverPhase) {
 
 const buildAnswerStorageKey = (quizId) => `quiz_answer_${quizId}`;
 
-function PlayerScoreboard({ scoreboard, playerId, title }) {
+function PlayerScoreboard({ scoreboard, playerId, myRank, title }) {
   if (!Array.isArray(scoreboard) || scoreboard.length === 0) {
     return null;
   }
@@ -55,6 +59,13 @@ function PlayerScoreboard({ scoreboard, playerId, title }) {
           );
         })}
       </ol>
+      {myRank &&
+        !sorted.some((player) => playerId && player.playerId === playerId) && (
+          <p className="player-scoreboard-me">
+            Ваше місце: #{myRank.rank} з {myRank.totalPlayers} ({myRank.score}{" "}
+            балів)
+          </p>
+        )}
     </section>
   );
 }
@@ -76,10 +87,14 @@ function QuizPlayPage() {
 
   const [scoreboard, setScoreboard] = useState([]);
   const [playerId, setPlayerId] = useState(null);
+  // Сервер надсилає лише топ таблиці, своє місце гравець отримує окремо
+  const [myRank, setMyRank] = useState(null);
   const [finalSessionId, setFinalSessionId] = useState(null);
 
   const timerRef = useRef(null);
   const wsInitialized = useRef(false);
+  // Питання, надіслане сервером наперед (question_staged)
+  const stagedQuestionRef = useRef(null);
 
   useEffect(() => {
     if (wsInitialized.current) return;
@@ -92,295 +107,345 @@ function QuizPlayPage() {
 
     console.log("Підключення учасника:", { name: nameFromStorage, quizId });
 
-    const socket = createQuizSocket({
-      role: "player",
-      roomCode: quizId,
-      name: nameFromStorage,
-      onMessage: (msg) => {
-        console.log("Player отримав:", msg);
-
-        switch (msg.type) {
-          case "state_sync": {
-            console.log(
-              "State sync від сервера:",
-              msg.phase,
-              "questionIndex=",
-              msg.questionIndex
-            );
+    // Обрив мережі (закриття без close-фрейму) - перепідключаємось з resume:
+    // сервер досилає лише пропущені події замість повного state_sync
+    let disposed = false;
+    let current = null;
+    let reconnectTimer = null;
+    let reconnectAttempts = 0;
+
+    const connect = (resume) => {
+      const socket = createQuizSocket({
+        resume,
+        role: "player",
+        roomCode: quizId,
+        name: nameFromStorage,
+        onMessage: (msg) => {
+          console.log("Player отримав:", msg);
+
+          switch (msg.type) {
+            case "state_sync": {
+              console.log(
+                "State sync від сервера:",
+                msg.phase,
+                "questionIndex=",
+                msg.questionIndex
+              );
 
-            const mappedPhase = mapServerPhase(msg.phase);
-            setPhase(mappedPhase);
-            setConnectionStatus("connected");
+              const mappedPhase = mapServerPhase(msg.phase);
+              setPhase(mappedPhase);
+              setConnectionStatus("connected");
 
-            const serverQidx =
-              typeof msg.questionIndex === "number" ? msg.questionIndex : -1;
+              const serverQidx =
+                typeof msg.questionIndex === "number" ? msg.questionIndex : -1;
 
-            setQuestionIndex(serverQidx);
-            setQuestion(msg.question || null);
+              setQuestionIndex(serverQidx);
+              setQuestion(msg.question || null);
 
-            if (typeof msg.playerId === "string" && msg.playerId.length > 0) {
-              setPlayerId(msg.playerId);
-            }
+              if (typeof msg.playerId === "string" && msg.playerId.length > 0) {
+                setPlayerId(msg.playerId);
+              }
 
-            if (Array.isArray(msg.scoreboard)) {
-              setScoreboard(msg.scoreboard);
-            }
+              if (Array.isArray(msg.scoreboard)) {
+                setScoreboard(msg.scoreboard);
+              }
 
-            if (timerRef.current) {
-              clearInterval(timerRef.current);
-            }
+              if (timerRef.current) {
+                clearInterval(timerRef.current);
+              }
 
-            // Відновлюємо відповідь з localStorage, якщо для того ж питання
-            const answerKey = buildAnswerStorageKey(quizId);
-            let restoredSelected = null;
-
-            try {
-              const raw = window.localStorage.getItem(answerKey);
-              if (raw) {
-                const saved = JSON.parse(raw);
-                if (
-                  saved &&
-                  typeof saved.questionIndex === "number" &&
-                  saved.questionIndex === serverQidx &&
-                  typeof saved.selectedIndex === "number"
-                ) {
-                  restoredSelected = saved.selectedIndex;
-                } else {
-                  window.localStorage.removeItem(answerKey);
+              // Відновлюємо відповідь з localStorage, якщо для того ж питання
+              const answerKey = buildAnswerStorageKey(quizId);
+              let restoredSelected = null;
+
+              try {
+                const raw = window.localStorage.getItem(answerKey);
+                if (raw) {
+                  const saved = JSON.parse(raw);
+                  if (
+                    saved &&
+                    typeof saved.questionIndex === "number" &&
+                    saved.questionIndex === serverQidx &&
+                    typeof saved.selectedIndex === "number"
+                  ) {
+                    restoredSelected = saved.selectedIndex;
+                  } else {
+                    window.localStorage.removeItem(answerKey);
+                  }
                 }
+              } catch (e) {
+                console.warn("Не вдалося відновити збережену відповідь:", e);
               }
-            } catch (e) {
-              console.warn("Не вдалося відновити збережену відповідь:", e);
-            }
-
-            if (
-              msg.phase === "QUESTION_ACTIVE" &&
-              typeof msg.startedAt === "number" &&
-              typeof msg.durationMs === "number"
-            ) {
-              const now = Date.now();
-              const deadline = msg.startedAt + msg.durationMs;
-              const diffMs = deadline - now;
-              const initialSeconds = Math.max(
-                0,
-                Math.ceil(diffMs / 1000)
-              );
 
-              setRemaining(initialSeconds);
-              setTimeUp(initialSeconds <= 0);
-              setCorrectAnswer(null);
-              setSelected(restoredSelected);
-
-              if (initialSeconds > 0) {
-                timerRef.current = setInterval(() => {
-                  setRemaining((prev) => {
-                    if (prev <= 1) {
-                      clearInterval(timerRef.current);
-                      setTimeUp(true);
-                      return 0;
-                    }
-                    return prev - 1;
-                  });
-                }, 1000);
+              if (
+                msg.phase === "QUESTION_ACTIVE" &&
+                typeof msg.startedAt === "number" &&
+                typeof msg.durationMs === "number"
+              ) {
+                const now = Date.now();
+                const deadline = msg.startedAt + msg.durationMs;
+                const diffMs = deadline - now;
+                const initialSeconds = Math.max(
+                  0,
+                  Math.ceil(diffMs / 1000)
+                );
+
+                setRemaining(initialSeconds);
+                setTimeUp(initialSeconds <= 0);
+                setCorrectAnswer(null);
+                setSelected(restoredSelected);
+
+                if (initialSeconds > 0) {
+                  timerRef.current = setInterval(() => {
+                    setRemaining((prev) => {
+                      if (prev <= 1) {
+                        clearInterval(timerRef.current);
+                        setTimeUp(true);
+                        return 0;
+                      }
+                      return prev - 1;
+                    });
+                  }, 1000);
+                }
+              } else {
+                setRemaining(0);
+                setTimeUp(false);
+                setSelected(restoredSelected);
+                setCorrectAnswer(null);
               }
-            } else {
-              setRemaining(0);
-              setTimeUp(false);
-              setSelected(restoredSelected);
-              setCorrectAnswer(null);
-            }
 
-            break;
-          }
-
-          case "player_joined": {
-            console.log("Успішно приєдналися до вікторини!");
-            setConnectionStatus("connected");
-            setPhase((prev) =>
-              prev === "CONNECTING" ? "WAITING" : prev
-            );
-
-            // Оновлюємо локальний leaderboard, щоб усі бачили нових гравців
-            setScoreboard((prev) => {
-              if (!msg.playerId && !msg.playerName) return prev;
+              break;
+            }
 
-              const exists = prev.find(
-                (p) =>
-                  p.playerId === msg.playerId || p.name === msg.playerName
+            case "players_joined": {
+              setConnectionStatus("connected");
+              setPhase((prev) =>
+                prev === "CONNECTING" ? "WAITING" : prev
               );
-              if (exists) return prev;
-
-              return [
-                ...prev,
-                {
-                  playerId: msg.playerId,
-                  name: msg.playerName,
-                  score: 0,
-                },
-              ];
-            });
-
-            break;
-          }
 
-          case "question_started": {
-            console.log("Почалось питання:", msg.question);
+              // Оновлюємо локальний leaderboard, щоб усі бачили нових гравців
+              // (сервер надсилає підключення пакетами)
+              setScoreboard((prev) => {
+                const joined = Array.isArray(msg.players) ? msg.players : [];
+                const next = [...prev];
+
+                for (const player of joined) {
+                  const exists = next.find(
+                    (p) => p.playerId === player.playerId || p.name === player.name
+                  );
+                  if (!exists) {
+                    next.push({
+                      playerId: player.playerId,
+                      name: player.name,
+                      score: 0,
+                    });
+                  }
+                }
 
-            const answerKey = buildAnswerStorageKey(quizId);
-            try {
-              window.localStorage.removeItem(answerKey);
-            } catch (e) {
-              console.warn(
-                "Не вдалося видалити збережену відповідь:",
-                e
-              );
+                return next.length === prev.length ? prev : next;
+              });
+
+              break;
             }
 
-            setQuestion(msg.question);
-            const qidx =
-              typeof msg.questionIndex === "number"
-                ? msg.questionIndex
-                : 0;
-            setQuestionIndex(qidx);
-            setRemaining(Math.floor(msg.durationMs / 1000));
-            setPhase("QUESTION_ACTIVE");
-            setSelected(null);
-            setCorrectAnswer(null);
-            setTimeUp(false);
-
-            if (timerRef.current) {
-              clearInterval(timerRef.current);
+            case "question_staged": {
+              stagedQuestionRef.current = msg;
+              break;
             }
 
-            timerRef.current = setInterval(() => {
-              setRemaining((prev) => {
-                if (prev <= 1) {
-                  clearInterval(timerRef.current);
-                  setTimeUp(true);
-                  return 0;
-                }
-                return prev - 1;
-              });
-            }, 1000);
+            case "question_started": {
+              // Якщо питання вже надіслане наперед, старт містить лише номер і час
+              const staged = stagedQuestionRef.current;
+              const startedQuestion =
+                msg.question ??
+                (staged?.questionIndex === msg.questionIndex ? staged.question : null);
+              console.log("Почалось питання:", startedQuestion);
+
+              const answerKey = buildAnswerStorageKey(quizId);
+              try {
+                window.localStorage.removeItem(answerKey);
+              } catch (e) {
+                console.warn(
+                  "Не вдалося видалити збережену відповідь:",
+                  e
+                );
+              }
 
-            break;
-          }
+              setQuestion(startedQuestion);
+              const qidx =
+                typeof msg.questionIndex === "number"
+                  ? msg.questionIndex
+                  : 0;
+              setQuestionIndex(qidx);
+              setRemaining(Math.floor(msg.durationMs / 1000));
+              setPhase("QUESTION_ACTIVE");
+              setSelected(null);
+              setCorrectAnswer(null);
+              setTimeUp(false);
 
-          case "answer_revealed": {
-            console.log("Показано відповідь:", msg.correctIndex);
-            setPhase("REVEAL");
-            setCorrectAnswer(msg.correctIndex);
+              if (timerRef.current) {
+                clearInterval(timerRef.current);
+              }
 
-            if (Array.isArray(msg.scoreboard)) {
-              setScoreboard(msg.scoreboard);
+              timerRef.current = setInterval(() => {
+                setRemaining((prev) => {
+                  if (prev <= 1) {
+                    clearInterval(timerRef.current);
+                    setTimeUp(true);
+                    return 0;
+                  }
+                  return prev - 1;
+                });
+              }, 1000);
+
+              break;
             }
 
-            if (timerRef.current) {
-              clearInterval(timerRef.current);
-            }
-            break;
-          }
+            case "answer_revealed": {
+              console.log("Показано відповідь:", msg.correctIndex);
+              setPhase("REVEAL");
+              setCorrectAnswer(msg.correctIndex);
 
-          case "session_ended":
-          case "quiz_ended": {
-            console.log("Сесія завершена, показуємо фінальний лідерборд");
+              if (Array.isArray(msg.scoreboard)) {
+                setScoreboard(msg.scoreboard);
+              }
 
-            if (timerRef.current) {
-              clearInterval(timerRef.current);
+              if (timerRef.current) {
+                clearInterval(timerRef.current);
+              }
+              break;
             }
 
-            try {
-              window.localStorage.removeItem(
-                buildAnswerStorageKey(quizId)
-              );
-            } catch (e) {
-              console.warn(
-                "Не вдалося очистити відповідь при завершенні:",
-                e
-              );
-            }
+            case "session_ended":
+            case "quiz_ended": {
+              console.log("Сесія завершена, показуємо фінальний лідерборд");
 
-            setPhase("ENDED");
-            setRemaining(0);
-            setTimeUp(false);
-            setCorrectAnswer(null);
-            setQuestion(null);
-            setSelected(null);
-            setConnectionStatus("connected");
+              if (timerRef.current) {
+                clearInterval(timerRef.current);
+              }
 
-            if (Array.isArray(msg.scoreboard)) {
-              setScoreboard(msg.scoreboard);
-            }
+              try {
+                window.localStorage.removeItem(
+                  buildAnswerStorageKey(quizId)
+                );
+              } catch (e) {
+                console.warn(
+                  "Не вдалося очистити відповідь при завершенні:",
+                  e
+                );
+              }
 
-            if (typeof msg.sessionId === "string") {
-              setFinalSessionId(msg.sessionId);
-            }
+              setPhase("ENDED");
+              setRemaining(0);
+              setTimeUp(false);
+              setCorrectAnswer(null);
+              setQuestion(null);
+              setSelected(null);
+              setConnectionStatus("connected");
 
-            break;
-          }
+              if (Array.isArray(msg.scoreboard)) {
+                setScoreboard(msg.scoreboard);
+              }
+
+              if (typeof msg.sessionId === "string") {
+                setFinalSessionId(msg.sessionId);
+              }
 
-          case "connection_closed": {
-            console.log("З'єднання закрито:", msg.message);
-            setConnectionStatus("error");
-            setPhase("ENDED");
-            if (timerRef.current) {
-              clearInterval(timerRef.current);
+              break;
             }
-            alert(msg.message || "Хост вийшов з кімнати. Вікторина скасована.");
-            setTimeout(() => navigate("/join"), 2000);
-            break;
-          }
 
-          case "error": {
-            console.error("Помилка від сервера:", msg.message);
-            alert(`Помилка: ${msg.message}`);
-            setConnectionStatus("error");
+            case "player_rank": {
+              setMyRank({
+                rank: msg.rank,
+                score: msg.score,
+                totalPlayers: msg.totalPlayers,
+              });
+              break;
+            }
 
-            if (
-              msg.message?.includes("not found") ||
-              msg.message?.includes("does not exist") ||
-              msg.message?.includes("не знайдена")
-            ) {
+            case "connection_closed": {
+              console.log("З'єднання закрито:", msg.message);
+              setConnectionStatus("error");
+              setPhase("ENDED");
+              if (timerRef.current) {
+                clearInterval(timerRef.current);
+              }
+              alert(msg.message || "Хост вийшов з кімнати. Вікторина скасована.");
               setTimeout(() => navigate("/join"), 2000);
+              break;
+            }
+
+            case "error": {
+              console.error("Помилка від сервера:", msg.message);
+              alert(`Помилка: ${msg.message}`);
+              setConnectionStatus("error");
+
+              if (
+                msg.message?.includes("not found") ||
+                msg.message?.includes("does not exist") ||
+                msg.message?.includes("не знайдена")
+              ) {
+                setTimeout(() => navigate("/join"), 2000);
+              }
+              break;
             }
-            break;
-          }
 
-          default: {
-            console.log("Невідомий тип повідомлення:", msg.type);
+            default: {
+              console.log("Невідомий тип повідомлення:", msg.type);
+            }
           }
-        }
-      },
-    });
+        },
+      });
 
-    socket.onopen = () => {
-      console.log("WebSocket підключено як player");
-      setConnectionStatus("connected");
-    };
+      socket.onopen = () => {
+        console.log("WebSocket підключено як player");
+        setConnectionStatus("connected");
+        reconnectAttempts = 0;
+      };
 
-    socket.onclose = (event) => {
-      console.log("WebSocket закрито:", event);
-      setConnectionStatus("disconnected");
-      wsInitialized.current = false;
-      if (timerRef.current) {
-        clearInterval(timerRef.current);
-      }
-    };
+      socket.onclose = (event) => {
+        console.log("WebSocket закрито:", event);
+        setConnectionStatus("disconnected");
+        wsInitialized.current = false;
+        if (
+          !disposed &&
+          !event.wasClean &&
+          reconnectAttempts < MAX_RECONNECT_ATTEMPTS
+        ) {
+          // таймер питання продовжує йти, поки сервер досилає пропущене
+          reconnectAttempts += 1;
+          setConnectionStatus("connecting");
+          reconnectTimer = setTimeout(
+            () => connect(true),
+            RECONNECT_DELAY_MS * reconnectAttempts
+          );
+          return;
+        }
+        if (timerRef.current) {
+          clearInterval(timerRef.current);
+        }
+      };
+
+      socket.onerror = (error) => {
+        console.error("WebSocket помилка:", error);
+        setConnectionStatus("error");
+      };
 
-    socket.onerror = (error) => {
-      console.error("WebSocket помилка:", error);
-      setConnectionStatus("error");
+      setWs(socket);
+      current = socket;
     };
 
-    setWs(socket);
+    connect(false);
 
     return () => {
       console.log("Очищення WebSocket з'єднання");
+      disposed = true;
+      clearTimeout(reconnectTimer);
       if (timerRef.current) {
         clearInterval(timerRef.current);
       }
-      if (socket.readyState === WebSocket.OPEN) {
-        socket.close();
+      if (current && current.readyState === WebSocket.OPEN) {
+        current.close();
       }
       wsInitialized.current = false;
     };
@@ -491,6 +556,7 @@ function QuizPlayPage() {
           <PlayerScoreboard
             scoreboard={scoreboard}
             playerId={playerId}
+            myRank={myRank}
             title="Підсумкова таблиця лідерів"
           />
 
@@ -624,6 +690,7 @@ function QuizPlayPage() {
         <PlayerScoreboard
           scoreboard={scoreboard}
           playerId={playerId}
+          myRank={myRank}
           title="Таблиця лідерів"
         />
       )}